@@ -0,0 +1,186 @@
+"""Benchmark of the API client against a local mock server.
+
+Measures requests per second and p50/p99 latency of the sync, batch, cached
+and async paths, and the construction cost and memory of each model. Results
+can be written to JSON and compared with those of another version::
+
+    python benchmarks/api_bench.py --output before.json
+    python benchmarks/api_bench.py --compare before.json
+
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from budgetyourtrip_api import config, models
+from budgetyourtrip_api.api import Api
+from budgetyourtrip_api.async_api import AsyncApi
+from budgetyourtrip_api.cache import NO_CACHE, TieredCache
+from budgetyourtrip_api.ratelimit import RetryPolicy
+from mock_server import MockServer
+from models_bench import measure
+
+# Retry policy of every scenario, with a short backoff for the mock server's errors.
+RETRY = RetryPolicy(backoff=0.01)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def summarize(latencies, seconds):
+    return {'requests': len(latencies), 'seconds': seconds,
+            'rps': len(latencies) / seconds if seconds else float('nan'),
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000}
+
+
+def uncached_api(end_point):
+    return Api(cache=NO_CACHE, retry=RETRY, end_point=end_point)
+
+
+def timed_calls(func, args):
+    latencies = []
+    start = time.perf_counter()
+    for arg in args:
+        call_start = time.perf_counter()
+        func(arg)
+        latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def bench_sync(end_point, ids):
+    return timed_calls(uncached_api(end_point).location_costs, ids)
+
+
+def bench_batch(end_point, ids, workers):
+    # The latency of each item is its completion time since the batch started.
+    api = uncached_api(end_point)
+    start = time.perf_counter()
+    latencies = []
+    call_start = time.perf_counter()
+    for _ in api.location_costs_many(ids, stream=True, max_workers=workers):
+        latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def bench_cached(end_point, ids):
+    api = Api(cache=TieredCache(), retry=RETRY, end_point=end_point)
+    for geonameid in ids:
+        api.location_costs(geonameid)
+    return timed_calls(api.location_costs, ids * 10)
+
+
+def bench_async(end_point, ids, concurrency):
+    async def run():
+        latencies = []
+
+        async def call(geonameid):
+            call_start = time.perf_counter()
+            await api.location_costs(geonameid)
+            latencies.append(time.perf_counter() - call_start)
+
+        async with AsyncApi(concurrency=concurrency, retry=RETRY, end_point=end_point) as api:
+            start = time.perf_counter()
+            await asyncio.gather(*(call(geonameid) for geonameid in ids))
+            return summarize(latencies, time.perf_counter() - start)
+    return asyncio.run(run())
+
+
+def bench_models(dataset, count):
+    costs = [cost for location in dataset.locations
+             for cost in dataset.paths['costs/location/' + location['geonameid']]]
+    samples = {'Cost': (models.Cost, costs), 'Location': (models.Location, dataset.locations),
+               'Category': (models.Category, dataset.paths['categories/']),
+               'Currency': (models.Currency, dataset.paths['currencies/'])}
+    results = {}
+    for name, (model_class, data) in samples.items():
+        data = (data * (count // len(data) + 1))[:count]
+        rate, size = measure(model_class, data)
+        results[name] = {'objects_per_s': rate, 'bytes_per_object': size}
+    return results
+
+
+def version():
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(requests, latency, error_rate, workers, model_count):
+    with MockServer(latency=latency, error_rate=error_rate) as server:
+        end_point = server.end_point
+        ids = server.dataset.geonameids[:requests]
+        scenarios = {
+            'sync': bench_sync(end_point, ids),
+            'batch': bench_batch(end_point, ids, workers),
+            'cached': bench_cached(end_point, ids),
+            'async': bench_async(end_point, ids, workers),
+        }
+        return {'version': version(), 'python': platform.python_version(),
+                'settings': {'requests': requests, 'latency': latency,
+                             'error_rate': error_rate, 'workers': workers},
+                'scenarios': scenarios, 'models': bench_models(server.dataset, model_count)}
+
+
+def report(results, baseline=None):
+    print('version {0}, python {1}, {2}'.format(results['version'], results['python'],
+                                                results['settings']))
+    print('{0:<8} {1:>12} {2:>10} {3:>10} {4:>10}'.format('path', 'req/s', 'p50 ms', 'p99 ms',
+                                                        'vs base'))
+    for name, scenario in results['scenarios'].items():
+        ratio = ''
+        if baseline and name in baseline['scenarios']:
+            ratio = '{0:.2f}x'.format(scenario['rps'] / baseline['scenarios'][name]['rps'])
+        print('{0:<8} {1:>12,.0f} {2:>10.2f} {3:>10.2f} {4:>10}'.format(
+            name, scenario['rps'], scenario['p50_ms'], scenario['p99_ms'], ratio))
+    print('{0:<10} {1:>14} {2:>14} {3:>10}'.format('model', 'objects/s', 'bytes/object',
+                                                   'vs base'))
+    for name, model in results['models'].items():
+        ratio = ''
+        if baseline and name in baseline.get('models', {}):
+            ratio = '{0:.2f}x'.format(model['objects_per_s'] /
+                                      baseline['models'][name]['objects_per_s'])
+        print('{0:<10} {1:>14,.0f} {2:>14,.0f} {3:>10}'.format(
+            name, model['objects_per_s'], model['bytes_per_object'], ratio))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--latency', type=float, default=0.005, help='server latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of requests answered 503')
+    parser.add_argument('--workers', type=int, default=config.MAX_WORKERS,
+                        help='concurrency of the batch and async paths')
+    parser.add_argument('--models', type=int, default=50000, help='objects built per model')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of another version to compare with')
+    args = parser.parse_args(argv)
+    results = run(args.requests, args.latency, args.error_rate, args.workers, args.models)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+    report(results, baseline)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""Local stand-in for the budgetyourtrip API, for benchmarks.
+
+Serves deterministic, realistically shaped payloads for every path used by
+:class:`~budgetyourtrip_api.api.Api`, with configurable latency and error rate::
+
+    server = MockServer(latency=0.005, error_rate=0.01).start()
+    api = Api(end_point=server.end_point)
+    ...
+    server.stop()
+
+Run it on its own with ``python benchmarks/mock_server.py [port]``.
+
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+CATEGORY_NAMES = [
+    'Accommodation', 'Local Transportation', 'Food', 'Water', 'Entertainment',
+    'Communication', 'Tips and Handouts', 'Scams, Robberies, and Mishaps', 'Alcohol',
+    'Souvenirs', 'Intercity Transportation', 'Insurance', 'Laundry', 'Visa Fees',
+    'Charitable Donations', 'Fees', 'Toiletries', 'Miscellaneous',
+]
+
+COUNTRIES = [('US', 'United States of America', 'USD'), ('FR', 'France', 'EUR'),
+             ('GB', 'United Kingdom', 'GBP'), ('JP', 'Japan', 'JPY'), ('BR', 'Brazil', 'BRL'),
+             ('TH', 'Thailand', 'THB'), ('IN', 'India', 'INR'), ('AU', 'Australia', 'AUD')]
+
+CURRENCY_RATES = {'USD': 1.0, 'EUR': 0.92, 'GBP': 0.79, 'JPY': 149.5, 'BRL': 4.97,
+                  'THB': 35.6, 'INR': 83.2, 'AUD': 1.52}
+
+LOCATIONS_PER_COUNTRY = 250
+
+FIRST_GEONAMEID = 1000000
+
+
+def _costs(seed, country_code, geonameid=None):
+    rng = random.Random(seed)
+    costs = []
+    for category_id in range(1, len(CATEGORY_NAMES) + 1):
+        budget = round(rng.uniform(1, 40), 2)
+        cost = {'category_id': str(category_id), 'country_code': country_code,
+                'value_budget': str(budget), 'value_midrange': str(round(budget * 2.1, 2)),
+                'value_luxury': str(round(budget * 4.7, 2))}
+        if geonameid is not None:
+            cost['geonameid'] = str(geonameid)
+        costs.append(cost)
+    return costs
+
+
+class Dataset(object):
+    """The payloads served, keyed by path under the end point."""
+
+    def __init__(self, locations_per_country=LOCATIONS_PER_COUNTRY):
+        self.paths = {}
+        self.paths['categories/'] = [
+            {'category_id': str(i), 'name': name, 'description': name + ' costs.'}
+            for i, name in enumerate(CATEGORY_NAMES, 1)]
+        for category in self.paths['categories/']:
+            self.paths['categories/' + category['category_id']] = category
+        self.paths['currencies/'] = [
+            {'currency_code': code, 'currency': code + ' currency', 'symbol': code[0]}
+            for code in CURRENCY_RATES]
+        for currency in self.paths['currencies/']:
+            self.paths['currencies/' + currency['currency_code']] = currency
+        self.countries = []
+        self.locations = []
+        geonameid = FIRST_GEONAMEID
+        for code, name, currency in COUNTRIES:
+            info = {'country_code': code, 'name': name, 'currency_code': currency,
+                    'url': '/' + name.lower(), 'negotiate': '1'}
+            self.countries.append(info)
+            costs = _costs(code, code)
+            self.paths['costs/country/' + code] = costs
+            self.paths['costs/countryinfo/' + code] = {'info': info, 'costs': costs}
+            for number in range(locations_per_country):
+                location = {'geonameid': str(geonameid), 'name': '{0} City {1}'.format(name, number),
+                            'latitude': str(round(-60 + (geonameid * 7.31) % 120, 4)),
+                            'longitude': str(round(-180 + (geonameid * 13.7) % 360, 4)),
+                            'feature_class': 'P', 'feature_code': 'PPL', 'country_code': code,
+                            'country_name': name, 'admin1_code': '01', 'negotiate': '1',
+                            'currency_code': currency, 'currency': currency}
+                self.locations.append(location)
+                costs = _costs(geonameid, code, geonameid)
+                self.paths['costs/location/{0}'.format(geonameid)] = costs
+                self.paths['costs/locationinfo/{0}'.format(geonameid)] = {'info': location,
+                                                                           'costs': costs}
+                geonameid += 1
+
+    @property
+    def geonameids(self):
+        return [int(location['geonameid']) for location in self.locations]
+
+    def get(self, path):
+        """Get the data of a path, or None if it doesn't exist."""
+        path = path.strip('/')
+        if path in ('categories', 'currencies'):
+            path += '/'
+        if path in self.paths:
+            return self.paths[path]
+        parts = path.split('/')
+        if parts[:2] == ['search', 'country']:
+            term = parts[2].lower()
+            return [country for country in self.countries if term in country['name'].lower()]
+        if parts[:2] == ['search', 'location']:
+            term = parts[2].lower()
+            return [location for location in self.locations
+                    if term in location['name'].lower()][:50]
+        if parts[:2] == ['currencies', 'convert'] and len(parts) == 5:
+            from_cur, to_cur, amount = parts[2].upper(), parts[3].upper(), float(parts[4])
+            if from_cur in CURRENCY_RATES and to_cur in CURRENCY_RATES:
+                return {'newAmount': amount * CURRENCY_RATES[to_cur] / CURRENCY_RATES[from_cur]}
+        return None
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Clients giving up on a request (e.g. a cancelled benchmark) aren't errors.
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            ThreadingHTTPServer.handle_error(self, request, client_address)
+
+
+class MockServer(object):
+    """Threaded HTTP server serving a :class:`Dataset`.
+
+    Args:
+        latency (float, optional):      Seconds every response is delayed by.
+        error_rate (float, optional):   Fraction of requests answered 503 with ``Retry-After: 0``.
+        port (int, optional):           Port to listen on, any free one by default.
+        dataset (Dataset, optional):    Payloads to serve.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, port=0, dataset=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.dataset = dataset or Dataset()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(0)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately; don't let Nagle delay the body.
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    fail = server._random.random() < server.error_rate
+                if server.latency:
+                    time.sleep(server.latency)
+                path = self.path.split('?')[0]
+                prefix = '/api/v3/'
+                data = server.dataset.get(path[len(prefix):]) if path.startswith(prefix) else None
+                if fail:
+                    self._send(503, b'', {'Retry-After': '0'})
+                elif data is None:
+                    self._send(404, b'{"status": false}')
+                else:
+                    self._send(200, json.dumps({'status': True, 'data': data}).encode('utf-8'))
+
+            def _send(self, status, body, headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _QuietServer(('127.0.0.1', port), Handler)
+        self._thread = None
+
+    @property
+    def end_point(self):
+        return 'http://127.0.0.1:{0}/api/v3/'.format(self._server.server_port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    with MockServer(port=port) as server:
+        print('Serving on ' + server.end_point)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,69 @@
+"""Benchmark of model construction: memory per object and objects per second.
+
+Compares the slotted models with the previous layout, where every instance
+built its own ``attrs`` dict and stored its fields in ``__dict__``.
+
+Run with ``python benchmarks/models_bench.py [count]``.
+
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from budgetyourtrip_api.models import Cost
+
+
+class LegacyCost(object):
+    """Cost model as it was built before the models used ``__slots__``."""
+
+    def __init__(self, cost_json, api=None):
+        self._api = api
+        self.attrs = {
+            "id_"           : "category_id",
+            "budget"        : "value_budget",
+            "midrange"      : "value_midrange",
+            "luxury"        : "value_luxury",
+            "country_id"    : "country_code",
+            "geoname_id"    : "geonameid"
+        }
+        for key, value in self.attrs.items():
+            try:
+                self.__dict__.update({key: cost_json[value]})
+            except KeyError:
+                self.__dict__.update({key: None})
+
+
+def sample_costs(count):
+    return [{'category_id': str(i % 18 + 1), 'value_budget': '10.5', 'value_midrange': '25.0',
+             'value_luxury': '80.25', 'country_code': 'US', 'geonameid': str(4167147 + i)}
+            for i in range(count)]
+
+
+def measure(model_class, data):
+    """Return (objects per second, bytes per object) of building ``model_class``."""
+    start = time.perf_counter()
+    [model_class(item) for item in data]
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [model_class(item) for item in data]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(data) / elapsed, (after - before) / len(objects)
+
+
+def main(count=100000):
+    data = sample_costs(count)
+    print('{0:<12} {1:>14} {2:>14}'.format('model', 'objects/s', 'bytes/object'))
+    for name, model_class in (('legacy', LegacyCost), ('slotted', Cost)):
+        rate, size = measure(model_class, data)
+        print('{0:<12} {1:>14,.0f} {2:>14,.0f}'.format(name, rate, size))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
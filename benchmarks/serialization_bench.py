@@ -0,0 +1,87 @@
+"""Benchmark of the binary model format against pickle and JSON.
+
+Packs lists of the models built from the mock server dataset, and reports
+the size of each encoding and the speed of encoding and decoding it::
+
+    python benchmarks/serialization_bench.py --count 20000
+
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from budgetyourtrip_api import models
+from budgetyourtrip_api.serialization import to_bytes, from_bytes
+from mock_server import Dataset
+
+
+def to_json(item):
+    """Get back the JSON representation of an object, with its costs if loaded."""
+    data = dict((key, getattr(item, field)) for field, key in item.attrs.items())
+    costs = getattr(item, '_costs', None)
+    if isinstance(costs, list):
+        return {'info': data, 'costs': [to_json(cost) for cost in costs]}
+    return data
+
+
+def json_dumps(objects):
+    return json.dumps([to_json(item) for item in objects]).encode('utf-8')
+
+
+def json_loads(model_class):
+    def loads(data):
+        return [model_class(item) for item in json.loads(data)]
+    return loads
+
+
+def timed(func, arg, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(arg)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def samples(count):
+    # Objects built from fresh JSON, so that they share no strings or costs pickle could memoize.
+    dataset = Dataset()
+    costs = [cost for location in dataset.locations
+             for cost in dataset.paths['costs/location/' + location['geonameid']]]
+    locations = [dataset.paths['costs/locationinfo/' + location['geonameid']]
+                 for location in dataset.locations]
+    result = {}
+    for model_class, data in ((models.Cost, costs), (models.Location, locations)):
+        data = json.loads(json.dumps((data * (count // len(data) + 1))[:count]))
+        result[model_class.__name__] = (model_class, [model_class(item) for item in data])
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--count', type=int, default=20000, help='objects per list')
+    parser.add_argument('--repeat', type=int, default=3, help='runs kept the best of')
+    args = parser.parse_args(argv)
+    print('{0:<10} {1:<8} {2:>12} {3:>12} {4:>12}'.format('model', 'format', 'bytes/object',
+                                                         'dump obj/s', 'load obj/s'))
+    for name, (model_class, objects) in samples(args.count).items():
+        formats = [('binary', to_bytes, from_bytes),
+                   ('pickle', pickle.dumps, pickle.loads),
+                   ('json', json_dumps, json_loads(model_class))]
+        for format_name, dumps, loads in formats:
+            data, dump_time = timed(dumps, objects, args.repeat)
+            loaded, load_time = timed(loads, data, args.repeat)
+            assert loaded[:100] == objects[:100]
+            print('{0:<10} {1:<8} {2:>12,.1f} {3:>12,.0f} {4:>12,.0f}'.format(
+                name, format_name, len(data) / len(objects), len(objects) / dump_time,
+                len(objects) / load_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,34 +5,184 @@ Currently access:
 
 """
 
+import itertools
 import posixpath
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import wraps
+from urllib.parse import urlencode
 
 from cache_requests import Session
 import requests
 from budgetyourtrip_api import models, config
+from budgetyourtrip_api.cache import MISSING, NO_CACHE
+from budgetyourtrip_api.decoding import decode_data, get_decoder, project
+from budgetyourtrip_api.metrics import path_template
+from budgetyourtrip_api.ratelimit import RetryPolicy
+from budgetyourtrip_api.singleflight import SingleFlight
+from budgetyourtrip_api.streaming import iter_json_array, LazySequence
+from budgetyourtrip_api.table import CostTable
+from budgetyourtrip_api.transport import configure_session, uncached_session, HTTP2Session
+
+# Returned by :meth:`Api.revalidate` when the server answers 304 Not Modified.
+NOT_MODIFIED = object()
+
+# Bytes read from the network at a time when streaming a list endpoint.
+STREAM_CHUNK_SIZE = 16384
 
 class Api(object):
     """Main class of the API.
 
     Create an instance of this to access the api.
 
+    One instance can be shared by the threads of a worker pool: connections
+    come from a pool sized by ``max_connections``, and the response cache,
+    request coalescing, rate limiter and metrics all lock their own state.
+    Size ``max_connections`` to the number of threads, so that none of them
+    opens a connection discarded after use.
+
     """
 
-    def __init__(self, key = config.API_KEY):
+    def __init__(self, key = config.API_KEY, cache=None, rate_limiter=None,
+                 retry=RetryPolicy(), concurrency=None, coalesce=True, instrumentation=None,
+                 decoder=None, projection=True, session=None, timeout=None,
+                 pool_size=config.POOL_SIZE, max_connections=config.MAX_CONNECTIONS,
+                 keep_alive=True, http2=False, end_point=None):
         """Create an api object.
 
         Args:
             api_key (str, optional): api key to use.
                 If one is not supplied, a default one will be generated and used.
+            cache (object, optional): Response cache to use
+                (see :class:`~budgetyourtrip_api.cache.TieredCache`).
+                If one is not supplied, ``cache_requests`` caches the HTTP responses.
+                Pass :data:`~budgetyourtrip_api.cache.NO_CACHE` to cache nothing.
+            rate_limiter (object, optional): Limiter every request waits on
+                (see :class:`~budgetyourtrip_api.ratelimit.TokenBucket`).
+            retry (object, optional): Policy for retrying throttled and failed requests
+                (see :class:`~budgetyourtrip_api.ratelimit.RetryPolicy`), None to never retry.
+            concurrency (object, optional): Adaptive limit on requests in flight
+                (see :class:`~budgetyourtrip_api.ratelimit.AdaptiveConcurrency`).
+            coalesce (bool, optional): Let concurrent identical requests share one
+                request in flight and its parsed result.
+            instrumentation (object, optional): Dispatcher of request, cache, retry, parse
+                and model build events to hooks
+                (see :class:`~budgetyourtrip_api.metrics.Instrumentation`).
+            decoder (str or callable, optional): JSON backend name (see
+                :data:`~budgetyourtrip_api.decoding.BACKENDS`) or ``loads`` function,
+                the fastest installed one by default.
+            projection (bool, optional): Keep only the keys a model reads in the responses
+                stored in ``cache``, so that it holds less. Responses are still decoded
+                in full. A raw :meth:`get` of a path cached for a model requests it again,
+                and caches it in full for every caller.
+            session (object, optional): Session sending the requests, with a
+                ``requests.Session``-like ``get`` method and ``headers``.
+                The transport options below only apply to the session created when
+                one is not supplied.
+            timeout (float or tuple, optional): Connect and read timeout of every request,
+                in seconds, or a ``(connect, read)`` pair. None waits forever.
+            pool_size (int, optional): Number of hosts to keep a connection pool for.
+            max_connections (int, optional): Connections kept alive per host.
+            keep_alive (bool, optional): Reuse connections between requests.
+            http2 (bool, optional): Send the requests over HTTP/2, which needs ``httpx``
+                (see :class:`~budgetyourtrip_api.transport.HTTP2Session`).
+                Responses are then not cached unless ``cache`` is given.
+            end_point (str, optional): Base URL of the API, ``config.END_POINT`` by default.
+                Point it at a :mod:`~budgetyourtrip_api.gateway` to share its cache
+                and rate limit with other processes.
 
         """
-        self.__session = Session()
+        self.__end_point = end_point or config.END_POINT
+        http_cache = cache is None
+        if cache is NO_CACHE:
+            cache = None
+        self.__cache = cache
+        self.__rate_limiter = rate_limiter
+        self.__retry = retry
+        self.__concurrency = concurrency
+        self.__single_flight = SingleFlight() if coalesce else None
+        self.__instrumentation = instrumentation
+        self.__decoder = decoder if callable(decoder) else get_decoder(decoder)
+        self.__projection = projection and cache is not None
+        if session is None:
+            if http2:
+                session = HTTP2Session(max_connections, keep_alive)
+            else:
+                session = configure_session(Session() if http_cache else requests.Session(),
+                                            pool_size, max_connections, keep_alive)
+        self.__session = session
         self.__session.headers['X-API-KEY'] = key
+        # Sends the requests that must reach the server, such as revalidations.
+        self.__uncached_session = uncached_session(session)
+        self.__timeout = timeout
 
-    def __get_data(self, url, params=None):
+    def __get_data(self, url, params=None, model_class=None):
         """Get the data at the given URL, using supplied parameters.
 
+        Args:
+            url (str):                  The URL to retrieve data from.
+            params (dict, optional):    Key-value pairs to include when making the request.
+            model_class (type, optional): Model the data will be built into, whose keys
+                                        are the only ones kept when projection is on.
+
+        Returns:
+            json:                       The JSON response.
+
+        """
+        if not self.__projection:
+            model_class = None
+        key = self.__cache_key(url, params)
+        if self.__single_flight is None:
+            data, projected = self.__get_cached_data(key, url, params, model_class)
+        else:
+            # Raw and model callers share one request in flight, and one cache entry.
+            data, projected = self.__single_flight.do(key, self.__get_cached_data,
+                                                      key, url, params, model_class)
+        if projected and model_class is None:
+            # Shared from a model caller's cache hit, which lacks keys of the raw data.
+            data, projected = self.__get_cached_data(key, url, params)
+        return data
+
+    def __get_cached_data(self, key, url, params=None, model_class=None):
+        """Get the data at the given URL from the response cache, or request it on a miss.
+
+        The cache entry of a model caller is projected for its model, and only answers
+        other model callers.
+
+        Returns:
+            tuple:                      ``(data, projected)``.
+
+        """
+        if self.__cache is None:
+            return self.__fetch_data(url, params), False
+        entry = self.__cache.get(key)
+        if entry is not MISSING and (model_class is not None or not entry['projected']):
+            self.__emit('cache_hit', path=path_template(key))
+            return entry['data'], entry['projected']
+        self.__emit('cache_miss', path=path_template(key))
+        data = self.__fetch_data(url, params)
+        if model_class is not None and data:
+            self.__cache.set(key, {'data': project(data, model_class), 'projected': True})
+        else:
+            self.__cache.set(key, {'data': data, 'projected': False})
+        return data, False
+
+    def __emit(self, event, **fields):
+        """Send an event to the instrumentation hooks, if any."""
+        if self.__instrumentation is not None:
+            self.__instrumentation.emit(event, **fields)
+
+    def __cache_key(self, url, params):
+        """Build the cache key of a request: its path under the end point and sorted params."""
+        if url.startswith(self.__end_point):
+            url = url[len(self.__end_point):]
+        if params:
+            url += '?' + urlencode(sorted(params.items()))
+        return url
+
+    def __fetch_data(self, url, params=None):
+        """Request the data at the given URL, bypassing the response cache.
+
         Args:
             url (str):                  The URL to retrieve data from.
             params (dict, optional):    Key-value pairs to include when making the request.
@@ -41,20 +191,100 @@ class Api(object):
             json:                       The JSON response.
 
         """
-        response = self.__session.get(url, params=params)
+        response = self.__request(url, params)
+        if response is None:
+            return None
+        return self.__parse(response)
+
+    def __request(self, url, params=None, headers=None, stream=False, uncached=False):
+        """Send a GET request to the given URL and check its status code.
+
+        Args:
+            url (str):                  The URL to send the request to.
+            params (dict, optional):    Key-value pairs to include when making the request.
+            headers (dict, optional):   Extra headers to send.
+            stream (bool, optional):    Return before the body is downloaded.
+            uncached (bool, optional):  Skip the HTTP cache of a ``cache_requests`` session.
+
+        Returns:
+            Response:                   The response, or None if the item doesn't exist.
+                                        Other responses are closed, so that a streamed
+                                        one gives its connection back to the pool.
+
+        """
+        response = self.__send(url, params, headers, stream, uncached)
         # Check status code
-        if response.status_code == 401:
-            response.raise_for_status()
-        elif response.status_code == 404:
+        if response.status_code in (requests.codes.ok, requests.codes.not_modified):
+            return response
+        response.close()
+        if response.status_code == 404:
             # Api item doesn't exist
             return None
-        elif response.status_code != requests.codes.ok:
-            response.raise_for_status()
+        response.raise_for_status()
+        return response
+
+    def __send(self, url, params=None, headers=None, stream=False, uncached=False):
+        """Send a GET request, respecting the rate limit and retrying as the retry policy allows.
+
+        Returns:
+            Response:                   The last response received.
+
+        """
+        session = self.__uncached_session if uncached else self.__session
+        path = path_template(self.__cache_key(url, None)) if self.__instrumentation else None
+        for attempt in itertools.count():
+            if self.__rate_limiter is not None:
+                self.__rate_limiter.acquire()
+            self.__emit('request_start', path=path)
+            start = time.perf_counter()
+            try:
+                if self.__concurrency is None:
+                    response = session.get(url, params=params, headers=headers,
+                                           stream=stream, timeout=self.__timeout)
+                else:
+                    with self.__concurrency.slot():
+                        response = session.get(url, params=params, headers=headers,
+                                               stream=stream, timeout=self.__timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                self.__emit('request_end', path=path, status=None,
+                            seconds=time.perf_counter() - start, size=None)
+                if self.__retry is None or not self.__retry.should_retry(attempt):
+                    raise
+                delay = self.__retry.delay(attempt)
+                self.__emit('retry', path=path, attempt=attempt, status=None, delay=delay)
+                time.sleep(delay)
+                continue
+            if self.__instrumentation is not None:
+                size = response.headers.get('Content-Length') if stream else len(response.content)
+                self.__emit('request_end', path=path, status=response.status_code,
+                            seconds=time.perf_counter() - start,
+                            size=None if size is None else int(size))
+            if self.__concurrency is not None:
+                if response.status_code == requests.codes.too_many_requests or \
+                        response.status_code >= 500:
+                    self.__concurrency.throttled()
+                else:
+                    self.__concurrency.success()
+            if self.__retry is None or not self.__retry.should_retry(attempt, response.status_code):
+                return response
+            delay = self.__retry.delay(attempt, response.headers.get('Retry-After'))
+            response.close()
+            self.__emit('retry', path=path, attempt=attempt, status=response.status_code,
+                        delay=delay)
+            time.sleep(delay)
+
+    def __parse(self, response):
+        """Get the ``data`` of a response, or None if it isn't valid JSON."""
+        start = time.perf_counter()
         try:
-            return response.json()['data']
+            return decode_data(response.content, self.__decoder)
         except ValueError:
             # Parsing json response failed
             pass
+        finally:
+            if self.__instrumentation is not None:
+                self.__emit('parse', path=path_template(self.__cache_key(response.url, None)),
+                            seconds=time.perf_counter() - start)
 
     def __build_response(self, path, model_class):
         """Retrieve data from given path and load it into an object of given model class.
@@ -67,32 +297,150 @@ class Api(object):
             object:                 Instance of the specified model class.
 
         """
-        data = self.__get_data(posixpath.join(config.END_POINT, path))
+        data = self.__get_data(posixpath.join(self.__end_point, path), model_class=model_class)
         if not data:
             return None
-        return model_class(data, self)
+        start = time.perf_counter()
+        item = model_class(data, self)
+        self.__emit('model_build', model=model_class.__name__, count=1,
+                    seconds=time.perf_counter() - start)
+        return item
 
-    def __get_multiple(self, path, model_class):
+    def __get_multiple(self, path, model_class, stream=False):
         """Retrieve from API endpoint that returns a list of items.
 
         Args:
-            model (type):   The type of object to build using the response from the API.
-            path (str):     The path of API to send request to.
+            model (type):           The type of object to build using the response from the API.
+            path (str):             The path of API to send request to.
+            stream (bool, optional):Build the items lazily while the response is read
+                                    (see :meth:`__stream_multiple`).
 
         Returns:
             list:           A list containing items of type model_class.
 
         """
-        url = posixpath.join(config.END_POINT, path)
-        data = self.__get_data(url)
+        url = posixpath.join(self.__end_point, path)
+        if stream:
+            return self.__stream_multiple(url, model_class)
+        data = self.__get_data(url, model_class=model_class)
         if not data:
             return None
+        start = time.perf_counter()
         items = []
         for json_item in data:
             item = model_class(json_item, self)
             items.append(item)
+        self.__emit('model_build', model=model_class.__name__, count=len(items),
+                    seconds=time.perf_counter() - start)
         return items
 
+    @staticmethod
+    def __prefetch_costs(items, costs_many):
+        """Fetch the costs of many models in one concurrent batch and attach them.
+
+        Args:
+            items (list):           :class:`~budgetyourtrip_api.models.Country` or
+                                    :class:`~budgetyourtrip_api.models.Location` objects.
+            costs_many (callable):  The bulk costs method matching the type of ``items``.
+
+        """
+        for item, costs in zip(items, costs_many([item.id_ for item in items])):
+            item._set_costs(costs)
+
+    def __stream_multiple(self, url, model_class):
+        """Retrieve a list of items, building each one only when it is needed.
+
+        The response body is parsed incrementally, so the first items are available
+        before it is fully downloaded. Streamed requests bypass the response caches and
+        request coalescing.
+
+        Returns:
+            LazySequence:   The items of type model_class, or None if the list doesn't exist.
+
+        """
+        response = self.__request(url, stream=True, uncached=True)
+        if response is None:
+            return None
+
+        def items():
+            with response:
+                for json_item in iter_json_array(response.iter_content(STREAM_CHUNK_SIZE)):
+                    yield model_class(json_item, self)
+        return LazySequence(items())
+
+    def __get_many(self, method, keys, stream, max_workers):
+        """Call ``method`` once for every distinct key, on a bounded thread pool.
+
+        Args:
+            method (callable):  Single-item API method to call, e.g. ``self.location``.
+            keys (iterable):    The ids or codes to pass to ``method``.
+            stream (bool):      If True, return a generator of ``(key, result)`` pairs
+                                in completion order instead of a list.
+            max_workers (int):  Maximum number of requests in flight at once.
+
+        Returns:
+            list:               Results in the same order as ``keys``, with duplicates
+                                repeated and None for items that don't exist.
+
+        """
+        keys = list(keys)
+        unique_keys = list(dict.fromkeys(keys))
+        if stream:
+            return self.__stream_many(method, unique_keys, max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = dict(zip(unique_keys, executor.map(method, unique_keys)))
+        return [results[key] for key in keys]
+
+    @staticmethod
+    def __stream_many(method, unique_keys, max_workers):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = dict((executor.submit(method, key), key) for key in unique_keys)
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def get(self, path, params=None):
+        """Get the raw data of an API path, without building model objects.
+
+        Args:
+            path (str):                 Path under the end point, e.g. ``'costs/country/US'``.
+            params (dict, optional):    Key-value pairs to include when making the request.
+
+        Returns:
+            json:                       The ``data`` of the response, or None if it doesn't exist.
+
+        """
+        return self.__get_data(posixpath.join(self.__end_point, path), params)
+
+    def revalidate(self, path, etag=None, last_modified=None):
+        """Get the raw data of an API path, unless it is unchanged since it was last fetched.
+
+        Always goes to the server, bypassing every cache, and sends the validators of
+        the last fetch, if any.
+
+        Args:
+            path (str):                     Path under the end point.
+            etag (str, optional):           ``ETag`` header of the last response.
+            last_modified (str, optional):  ``Last-Modified`` header of the last response.
+
+        Returns:
+            tuple:  ``(data, etag, last_modified)``, where ``data`` is ``NOT_MODIFIED`` if
+                    the server says it is unchanged, or None if it doesn't exist.
+
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        response = self.__request(posixpath.join(self.__end_point, path), headers=headers,
+                                  uncached=True)
+        if response is None:
+            return None, None, None
+        validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        if response.status_code == requests.codes.not_modified:
+            return (NOT_MODIFIED,) + validators
+        return (self.__parse(response),) + validators
+
     def category(self, id):
         """Get a category by id.
 
@@ -105,13 +453,28 @@ class Api(object):
         """
         return self.__build_response('categories/{0}'.format(id), models.Category)
 
-    def categories(self):
+    def categories(self, stream=False):
         """Get a list of categories by id.
 
+        Args:
+            stream (bool, optional):    Build the items lazily while the response is read,
+                                        returning a :class:`~budgetyourtrip_api.streaming.LazySequence`.
+
         Returns:
             list:           List of categories objects.
         """
-        return self.__get_multiple('categories/', models.Category)
+        return self.__get_multiple('categories/', models.Category, stream)
+
+    @property
+    def session(self):
+        """The session sending the requests."""
+        return self.__session
+
+    @property
+    def cache(self):
+        """The response cache in use, or None when ``cache_requests`` handles caching
+        or nothing is cached."""
+        return self.__cache
 
     def currency(self, currency_code):
         """Get a currency object by code.
@@ -121,13 +484,17 @@ class Api(object):
         """
         return self.__build_response('currencies/{0}'.format(currency_code), models.Currency)
 
-    def currencies(self):
+    def currencies(self, stream=False):
         """Get a list of available currencies.
 
+        Args:
+            stream (bool, optional):    Build the items lazily while the response is read,
+                                        returning a :class:`~budgetyourtrip_api.streaming.LazySequence`.
+
         Returns:
             list:           List of currency objects.
         """
-        return self.__get_multiple('currencies/', models.Currency)
+        return self.__get_multiple('currencies/', models.Currency, stream)
 
     def location(self, geonameid):
         """Get a location by geonameid.
@@ -137,13 +504,24 @@ class Api(object):
         """
         return self.__build_response('costs/locationinfo/{0}'.format(geonameid), models.Location)
 
-    def locations_search(self, search_term):
+    def locations_search(self, search_term, stream=False, include_costs=False):
         """Get a list of matching locations by search term.
 
+        Args:
+            stream (bool, optional):    Build the items lazily while the response is read,
+                                        returning a :class:`~budgetyourtrip_api.streaming.LazySequence`.
+            include_costs (bool, optional): Fetch the costs of every result up front,
+                                        concurrently, instead of one at a time on first access.
+                                        Implies ``stream=False``.
+
         Returns:
             list:           List of location objects matching search term.
         """
-        return self.__get_multiple('search/location/{0}'.format(search_term), models.Location)
+        results = self.__get_multiple('search/location/{0}'.format(search_term), models.Location,
+                                      stream and not include_costs)
+        if include_costs and results:
+            self.__prefetch_costs(results, self.location_costs_many)
+        return results
 
     def country_info(self, country_code):
         """Get a country object with cost info by country code.
@@ -153,29 +531,120 @@ class Api(object):
         """
         return self.__build_response('costs/countryinfo/{0}'.format(country_code), models.Country)
 
-    def country_search(self, search_term):
+    def country_search(self, search_term, stream=False, include_costs=False):
         """Get a list of countries that match the search term.
 
+        Args:
+            stream (bool, optional):    Build the items lazily while the response is read,
+                                        returning a :class:`~budgetyourtrip_api.streaming.LazySequence`.
+            include_costs (bool, optional): Fetch the costs of every result up front,
+                                        concurrently, instead of one at a time on first access.
+                                        Implies ``stream=False``.
+
         Returns:
             list:           List of Countries.
         """
-        return self.__get_multiple('search/country/{0}'.format(search_term), models.Country)
+        results = self.__get_multiple('search/country/{0}'.format(search_term), models.Country,
+                                      stream and not include_costs)
+        if include_costs and results:
+            self.__prefetch_costs(results, self.country_costs_many)
+        return results
 
-    def country_costs(self, country_code):
+    def country_costs(self, country_code, stream=False):
         """Get a list of the costs associated with a country.
 
+        Args:
+            stream (bool, optional):    Build the items lazily while the response is read,
+                                        returning a :class:`~budgetyourtrip_api.streaming.LazySequence`.
+
         Returns:
             list:           List of Costs.
         """
-        return self.__get_multiple('costs/country/{0}'.format(country_code), models.Cost)
+        return self.__get_multiple('costs/country/{0}'.format(country_code), models.Cost,
+                                   stream)
 
-    def location_costs(self, geonameid):
+    def location_costs(self, geonameid, stream=False):
         """Get a list of costs associated with a location.
 
+        Args:
+            stream (bool, optional):    Build the items lazily while the response is read,
+                                        returning a :class:`~budgetyourtrip_api.streaming.LazySequence`.
+
         Returns:
             list:           List of Costs.
         """
-        return self.__get_multiple('costs/location/{0}'.format(geonameid), models.Cost)
+        return self.__get_multiple('costs/location/{0}'.format(geonameid), models.Cost,
+                                   stream)
+
+    def country_cost_table(self, country_code):
+        """Get the costs associated with a country as a columnar table.
+
+        Returns:
+            CostTable:      Table of the costs, without building Cost objects.
+        """
+        return CostTable.from_json(self.__get_data(posixpath.join(
+            self.__end_point, 'costs/country/{0}'.format(country_code))))
+
+    def location_cost_table(self, geonameid):
+        """Get the costs associated with a location as a columnar table.
+
+        Returns:
+            CostTable:      Table of the costs, without building Cost objects.
+        """
+        return CostTable.from_json(self.__get_data(posixpath.join(
+            self.__end_point, 'costs/location/{0}'.format(geonameid))))
+
+    def locations_many(self, geonameids, stream=False, max_workers=config.MAX_WORKERS):
+        """Get many locations by geonameid in parallel.
+
+        Args:
+            geonameids (iterable):      Geonameids to fetch.
+            stream (bool, optional):    Yield ``(geonameid, location)`` pairs as they complete.
+            max_workers (int, optional):Maximum number of concurrent requests.
+
+        Returns:
+            list:           Location objects (or None) in the order of ``geonameids``.
+        """
+        return self.__get_many(self.location, geonameids, stream, max_workers)
+
+    def location_costs_many(self, geonameids, stream=False, max_workers=config.MAX_WORKERS):
+        """Get the costs of many locations in parallel.
+
+        Args:
+            geonameids (iterable):      Geonameids to fetch costs for.
+            stream (bool, optional):    Yield ``(geonameid, costs)`` pairs as they complete.
+            max_workers (int, optional):Maximum number of concurrent requests.
+
+        Returns:
+            list:           Lists of Costs (or None) in the order of ``geonameids``.
+        """
+        return self.__get_many(self.location_costs, geonameids, stream, max_workers)
+
+    def country_info_many(self, country_codes, stream=False, max_workers=config.MAX_WORKERS):
+        """Get many country objects with cost info in parallel.
+
+        Args:
+            country_codes (iterable):   Country codes to fetch.
+            stream (bool, optional):    Yield ``(country_code, country)`` pairs as they complete.
+            max_workers (int, optional):Maximum number of concurrent requests.
+
+        Returns:
+            list:           Country objects (or None) in the order of ``country_codes``.
+        """
+        return self.__get_many(self.country_info, country_codes, stream, max_workers)
+
+    def country_costs_many(self, country_codes, stream=False, max_workers=config.MAX_WORKERS):
+        """Get the costs of many countries in parallel.
+
+        Args:
+            country_codes (iterable):   Country codes to fetch costs for.
+            stream (bool, optional):    Yield ``(country_code, costs)`` pairs as they complete.
+            max_workers (int, optional):Maximum number of concurrent requests.
+
+        Returns:
+            list:           Lists of Costs (or None) in the order of ``country_codes``.
+        """
+        return self.__get_many(self.country_costs, country_codes, stream, max_workers)
 
     def convert_currency(self, amount, from_cur='usd', to_cur='eur'):
         """Convert the given amount from one currency to the other.
@@ -183,7 +652,7 @@ class Api(object):
         Returns:
             float:          The monetary value of the amount given.
         """
-        data = self.__get_data(posixpath.join(config.END_POINT, 
+        data = self.__get_data(posixpath.join(self.__end_point, 
                                'currencies/convert/{0}/{1}/{2}'.format(from_cur, to_cur, amount)))
         if not data:
             return None
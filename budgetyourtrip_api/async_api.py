@@ -0,0 +1,237 @@
+"""Module containing the asyncio interface to the API.
+
+Mirrors :class:`~budgetyourtrip_api.api.Api`, but every method is a coroutine
+and all requests share one pooled ``aiohttp`` connector.
+
+"""
+
+import asyncio
+import itertools
+import posixpath
+
+import aiohttp
+from budgetyourtrip_api import models, config
+from budgetyourtrip_api.decoding import decode_data, get_decoder
+from budgetyourtrip_api.ratelimit import RetryPolicy
+
+class AsyncApi(object):
+    """Asyncio version of the API.
+
+    Use it as an async context manager, or call :meth:`close` when done::
+
+        async with AsyncApi() as api:
+            locations = await asyncio.gather(*(api.location(g) for g in ids))
+
+    Models built by this class are not bound to it, since their lazy ``costs``
+    property is synchronous: reading ``costs`` on an object fetched without them
+    raises ``NotImplementedError``. Fetch costs with :meth:`country_costs` or
+    :meth:`location_costs` instead.
+
+    """
+
+    def __init__(self, key = config.API_KEY, concurrency=100, pool_size=100,
+                 retry=RetryPolicy(), decoder=None, end_point=None):
+        """Create an async api object.
+
+        Args:
+            key (str, optional):            api key to use.
+            concurrency (int, optional):    Maximum number of requests in flight at once.
+            pool_size (int, optional):      Maximum number of pooled connections.
+            retry (object, optional):       Policy for retrying throttled and failed requests
+                                            (see :class:`~budgetyourtrip_api.ratelimit.RetryPolicy`),
+                                            None to never retry.
+            decoder (str or callable, optional): JSON backend name or ``loads`` function
+                                            (see :func:`~budgetyourtrip_api.decoding.get_decoder`).
+            end_point (str, optional):      Base URL of the API, ``config.END_POINT`` by default.
+
+        """
+        self.__key = key
+        self.__end_point = end_point or config.END_POINT
+        self.__retry = retry
+        self.__decoder = decoder if callable(decoder) else get_decoder(decoder)
+        self.__pool_size = pool_size
+        self.__semaphore = asyncio.Semaphore(concurrency)
+        self.__session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Close the underlying connection pool."""
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
+    def __get_session(self):
+        # Created lazily so that it binds to the running event loop.
+        if self.__session is None:
+            connector = aiohttp.TCPConnector(limit=self.__pool_size)
+            self.__session = aiohttp.ClientSession(connector=connector,
+                                                   headers={'X-API-KEY': self.__key})
+        return self.__session
+
+    async def __get_data(self, url, params=None):
+        """Get the data at the given URL, using supplied parameters.
+
+        Args:
+            url (str):                  The URL to retrieve data from.
+            params (dict, optional):    Key-value pairs to include when making the request.
+
+        Returns:
+            json:                       The JSON response.
+
+        """
+        for attempt in itertools.count():
+            try:
+                async with self.__semaphore:
+                    async with self.__get_session().get(url, params=params) as response:
+                        # Check status code
+                        if response.status == 404:
+                            # Api item doesn't exist
+                            return None
+                        if self.__retry is not None and \
+                                self.__retry.should_retry(attempt, response.status):
+                            delay = self.__retry.delay(attempt, response.headers.get('Retry-After'))
+                        else:
+                            response.raise_for_status()
+                            try:
+                                return decode_data(await response.read(), self.__decoder)
+                            except ValueError:
+                                # Parsing json response failed
+                                return None
+            except aiohttp.ClientConnectionError:
+                if self.__retry is None or not self.__retry.should_retry(attempt):
+                    raise
+                delay = self.__retry.delay(attempt)
+            await asyncio.sleep(delay)
+
+    async def __build_response(self, path, model_class):
+        """Retrieve data from given path and load it into an object of given model class.
+
+        Args:
+            path (str):             Path of API to send request to.
+            model_class (type):     The type of object to build using the response from the API.
+
+        Returns:
+            object:                 Instance of the specified model class.
+
+        """
+        data = await self.__get_data(posixpath.join(self.__end_point, path))
+        if not data:
+            return None
+        return model_class(data)
+
+    async def __get_multiple(self, path, model_class):
+        """Retrieve from API endpoint that returns a list of items.
+
+        Args:
+            path (str):     The path of API to send request to.
+            model (type):   The type of object to build using the response from the API.
+
+        Returns:
+            list:           A list containing items of type model_class.
+
+        """
+        data = await self.__get_data(posixpath.join(self.__end_point, path))
+        if not data:
+            return None
+        return [model_class(json_item) for json_item in data]
+
+    async def category(self, id):
+        """Get a category by id.
+
+        Args:
+            id (int):       Unique identifier of a category.
+
+        Returns:
+            object:         Category object with all fields.
+
+        """
+        return await self.__build_response('categories/{0}'.format(id), models.Category)
+
+    async def categories(self):
+        """Get a list of categories by id.
+
+        Returns:
+            list:           List of categories objects.
+        """
+        return await self.__get_multiple('categories/', models.Category)
+
+    async def currency(self, currency_code):
+        """Get a currency object by code.
+
+        Returns:
+            object:         Currency object.
+        """
+        return await self.__build_response('currencies/{0}'.format(currency_code), models.Currency)
+
+    async def currencies(self):
+        """Get a list of available currencies.
+
+        Returns:
+            list:           List of currency objects.
+        """
+        return await self.__get_multiple('currencies/', models.Currency)
+
+    async def location(self, geonameid):
+        """Get a location by geonameid.
+
+        Returns:
+            object:         Location object.
+        """
+        return await self.__build_response('costs/locationinfo/{0}'.format(geonameid), models.Location)
+
+    async def locations_search(self, search_term):
+        """Get a list of matching locations by search term.
+
+        Returns:
+            list:           List of location objects matching search term.
+        """
+        return await self.__get_multiple('search/location/{0}'.format(search_term), models.Location)
+
+    async def country_info(self, country_code):
+        """Get a country object with cost info by country code.
+
+        Returns:
+            object:         Country object.
+        """
+        return await self.__build_response('costs/countryinfo/{0}'.format(country_code), models.Country)
+
+    async def country_search(self, search_term):
+        """Get a list of countries that match the search term.
+
+        Returns:
+            list:           List of Countries.
+        """
+        return await self.__get_multiple('search/country/{0}'.format(search_term), models.Country)
+
+    async def country_costs(self, country_code):
+        """Get a list of the costs associated with a country.
+
+        Returns:
+            list:           List of Costs.
+        """
+        return await self.__get_multiple('costs/country/{0}'.format(country_code), models.Cost)
+
+    async def location_costs(self, geonameid):
+        """Get a list of costs associated with a location.
+
+        Returns:
+            list:           List of Costs.
+        """
+        return await self.__get_multiple('costs/location/{0}'.format(geonameid), models.Cost)
+
+    async def convert_currency(self, amount, from_cur='usd', to_cur='eur'):
+        """Convert the given amount from one currency to the other.
+
+        Returns:
+            float:          The monetary value of the amount given.
+        """
+        data = await self.__get_data(posixpath.join(self.__end_point,
+                                     'currencies/convert/{0}/{1}/{2}'.format(from_cur, to_cur, amount)))
+        if not data:
+            return None
+        return data['newAmount']
@@ -0,0 +1,160 @@
+"""Module containing the trip budget estimator.
+
+:class:`BudgetEngine` quotes the cost of many itineraries at once. The costs of
+every location involved are fetched in one deduplicated batch, and the
+arithmetic runs vectorized over all the stops of all the itineraries.
+
+"""
+
+import numpy as np
+
+from budgetyourtrip_api.models import CostedObject
+from budgetyourtrip_api.rates import RateMatrix
+
+STYLES = CostedObject.STYLES
+
+# Categories summed into the daily cost of a location: accommodation, food
+# and entertainment, as in ``accommodation_cost`` / ``food_cost`` / ``entertainment_cost``.
+DAILY_CATEGORIES = (1, 4, 6)
+
+
+class BudgetTable(object):
+    """Quotes of many itineraries.
+
+    Attributes:
+        styles (tuple):             Travel styles, one column of ``total`` and ``daily`` each.
+        currency (str):             Currency of the amounts.
+        nights (numpy.ndarray):     Total nights of each itinerary.
+        total (numpy.ndarray):      Cost of each itinerary for each style, shape ``(n, styles)``.
+        daily (numpy.ndarray):      Average cost per night of each itinerary for each style.
+        complete (numpy.ndarray):   False for itineraries with a location without costs,
+                                    whose amounts are NaN.
+    """
+
+    def __init__(self, styles, currency, nights, total, complete):
+        self.styles = tuple(styles)
+        self.currency = currency
+        self.nights = nights
+        self.total = total
+        self.complete = complete
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.daily = total / nights[:, None]
+
+    def __len__(self):
+        return len(self.nights)
+
+    def quote(self, index, style):
+        """Get the total cost of one itinerary in one style."""
+        return float(self.total[index, self.styles.index(style)])
+
+    def to_pandas(self):
+        """Convert to a ``pandas.DataFrame`` with one row per itinerary."""
+        import pandas as pd
+        columns = {'nights': self.nights, 'complete': self.complete}
+        for position, style in enumerate(self.styles):
+            columns['total_' + style] = self.total[:, position]
+            columns['daily_' + style] = self.daily[:, position]
+        return pd.DataFrame(columns)
+
+
+class BudgetEngine(object):
+    """Estimate the cost of itineraries in several travel styles and a target currency.
+
+    Args:
+        api (object):                   Object that implements the API
+                                        (see :class:`~budgetyourtrip_api.api.Api`).
+        categories (tuple, optional):   Category ids summed into the cost of a night.
+        rates (RateMatrix, optional):   Exchange rates, learned from ``api`` if not given.
+        source_currency (str, optional):Currency of the costs returned by the API.
+    """
+
+    def __init__(self, api, categories=DAILY_CATEGORIES, rates=None, source_currency='usd'):
+        self._api = api
+        self.categories = tuple(int(category) for category in categories)
+        self.rates = rates if rates is not None else RateMatrix(api)
+        self.source_currency = source_currency
+        # geonameid -> daily cost per style in the source currency, NaN if unknown
+        self._daily = {}
+
+    def _fetch_daily_costs(self, geonameids):
+        """Fetch, in one batch, the daily costs of the locations not seen yet."""
+        missing = [geonameid for geonameid in geonameids if geonameid not in self._daily]
+        if not missing:
+            return
+        costs_many = getattr(self._api, 'location_costs_many', None)
+        if costs_many is not None:
+            results = costs_many(missing)
+        else:
+            results = [self._api.location_costs(geonameid) for geonameid in missing]
+        positions = dict((category, position) for position, category in enumerate(self.categories))
+        for geonameid, costs in zip(missing, results):
+            values = np.full((len(self.categories), len(STYLES)), np.nan)
+            for cost in costs or []:
+                position = positions.get(int(cost.id_))
+                if position is not None:
+                    values[position] = [np.nan if getattr(cost, style) is None
+                                        else float(getattr(cost, style)) for style in STYLES]
+            # A location lacking any of the categories can't be quoted.
+            self._daily[geonameid] = values.sum(axis=0)
+
+    def quote_arrays(self, itinerary_index, geonameids, nights, styles=STYLES, currency='usd',
+                     count=None):
+        """Quote itineraries given as flat arrays of stops.
+
+        Args:
+            itinerary_index (array-like):   Itinerary each stop belongs to, from 0 to ``count - 1``.
+            geonameids (array-like):        Location of each stop.
+            nights (array-like):            Nights spent at each stop.
+            styles (tuple, optional):       Travel styles to quote.
+            currency (str, optional):       Currency of the quotes.
+            count (int, optional):          Number of itineraries, inferred if not given.
+
+        Returns:
+            BudgetTable:                    One row per itinerary.
+        """
+        itinerary_index = np.asarray(itinerary_index, dtype=np.int64)
+        nights = np.asarray(nights, dtype=np.float64)
+        if count is None:
+            count = int(itinerary_index.max()) + 1 if len(itinerary_index) else 0
+        if not len(itinerary_index):
+            # No stops: nothing to fetch, every itinerary costs nothing.
+            return BudgetTable(styles, currency, np.zeros(count), np.zeros((count, len(styles))),
+                               np.ones(count, dtype=bool))
+        unique_ids, location_index = np.unique(np.asarray(geonameids), return_inverse=True)
+        keys = [str(geonameid) for geonameid in unique_ids.tolist()]
+        self._fetch_daily_costs(keys)
+        style_columns = [STYLES.index(style) for style in styles]
+        daily = np.array([self._daily[key] for key in keys]).reshape(-1, len(STYLES))
+        daily = daily[:, style_columns] * self.rates.rate(self.source_currency, currency)
+
+        stop_costs = daily[location_index] * nights[:, None]
+        unknown = np.isnan(stop_costs).any(axis=1)
+        total = np.zeros((count, len(styles)))
+        for column in range(len(styles)):
+            total[:, column] = np.bincount(itinerary_index,
+                                           weights=np.nan_to_num(stop_costs[:, column]),
+                                           minlength=count)
+        complete = np.bincount(itinerary_index, weights=unknown, minlength=count) == 0
+        total[~complete] = np.nan
+        total_nights = np.bincount(itinerary_index, weights=nights, minlength=count)
+        return BudgetTable(styles, currency, total_nights, total, complete)
+
+    def quote(self, itineraries, styles=STYLES, currency='usd'):
+        """Quote itineraries.
+
+        Args:
+            itineraries (list):         Each itinerary is a list of ``(geonameid, nights)`` stops.
+            styles (tuple, optional):   Travel styles to quote.
+            currency (str, optional):   Currency of the quotes.
+
+        Returns:
+            BudgetTable:                One row per itinerary, in the order given.
+        """
+        itinerary_index, geonameids, nights = [], [], []
+        count = 0
+        for count, itinerary in enumerate(itineraries, 1):
+            for geonameid, stop_nights in itinerary:
+                itinerary_index.append(count - 1)
+                geonameids.append(str(geonameid))
+                nights.append(stop_nights)
+        return self.quote_arrays(itinerary_index, geonameids, nights, styles, currency, count)
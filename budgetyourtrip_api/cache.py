@@ -0,0 +1,243 @@
+"""Module containing the response cache used by the API.
+
+A :class:`TieredCache` is made of one or more stores, checked in order:
+usually a :class:`MemoryCache` in front of a :class:`SqliteCache` that is
+shared between processes. Entries expire after a TTL chosen per endpoint.
+
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by ``get`` when a key is not cached. ``None`` is a valid cached value
+# (the API answered 404), so it cannot double as the miss marker.
+MISSING = object()
+
+# Passed as the ``cache`` of an Api to cache nothing, not even HTTP responses.
+NO_CACHE = object()
+
+# Seconds each endpoint stays cached, matched on the longest path prefix.
+DEFAULT_TTLS = {
+    'categories':           7 * 24 * 3600,
+    'currencies':           7 * 24 * 3600,
+    'currencies/convert':   60,
+    'costs':                24 * 3600,
+    'search':               24 * 3600,
+}
+
+DEFAULT_TTL = 3600
+
+
+def endpoint_ttl(path, ttls=DEFAULT_TTLS, default_ttl=DEFAULT_TTL):
+    """Get the TTL of an endpoint path from the longest matching prefix in ``ttls``."""
+    best = None
+    for prefix in ttls:
+        if path.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return default_ttl if best is None else ttls[best]
+
+
+class CacheStats(object):
+    """Counters of a cache store.
+
+    Attributes:
+        hits (int):         Lookups answered from the store.
+        misses (int):       Lookups not found in the store, or found expired.
+        evictions (int):    Entries dropped to respect the size bound.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def __repr__(self):
+        return str(self.as_dict())
+
+
+class MemoryCache(object):
+    """In-process LRU store with a size bound.
+
+    Args:
+        max_size (int, optional):   Maximum number of entries kept.
+    """
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return entry if entry is MISSING else entry[1]
+
+    def get_entry(self, key):
+        """Get ``(expires, value)`` for a key, or ``MISSING``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.stats.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteCache(object):
+    """On-disk store that can be shared between processes.
+
+    Values are stored as JSON text. Each thread gets its own connection.
+
+    The size bound is enforced in batches: every tenth of ``max_size`` writes, the
+    entries closest to expiry are dropped until a tenth of the room is free again,
+    so the store may briefly hold up to a tenth more entries than ``max_size``.
+
+    Args:
+        path (str):                 Path of the sqlite database file.
+        max_size (int, optional):   Maximum number of entries kept, None for no bound.
+    """
+
+    def __init__(self, path, max_size=None):
+        self.path = path
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._evict_batch = max(1, max_size // 10) if max_size is not None else None
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        connection = self._connect()
+        connection.execute('CREATE TABLE IF NOT EXISTS cache '
+                           '(key TEXT PRIMARY KEY, expires REAL, value TEXT)')
+        connection.execute('CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)')
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return entry if entry is MISSING else entry[1]
+
+    def get_entry(self, key):
+        """Get ``(expires, value)`` for a key, or ``MISSING``."""
+        row = self._connect().execute('SELECT expires, value FROM cache WHERE key = ?',
+                                      (key,)).fetchone()
+        if row is None or row[0] < time.time():
+            with self._lock:
+                self.stats.misses += 1
+            return MISSING
+        with self._lock:
+            self.stats.hits += 1
+        return row[0], json.loads(row[1])
+
+    def set(self, key, value, ttl):
+        connection = self._connect()
+        connection.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+                           (key, time.time() + ttl, json.dumps(value)))
+        if self.max_size is None:
+            return
+        with self._lock:
+            self._writes += 1
+            if self._writes < self._evict_batch:
+                return
+            self._writes = 0
+        self._evict(connection)
+
+    def _evict(self, connection):
+        """Drop the entries closest to expiry, if the store is over its size bound."""
+        excess = connection.execute('SELECT count(*) FROM cache').fetchone()[0] - self.max_size
+        if excess <= 0:
+            return
+        evicted = connection.execute(
+            'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires LIMIT ?)',
+            (excess + self._evict_batch,)).rowcount
+        with self._lock:
+            self.stats.evictions += evicted
+
+    def clear(self):
+        self._connect().execute('DELETE FROM cache')
+
+    def __len__(self):
+        return self._connect().execute('SELECT count(*) FROM cache').fetchone()[0]
+
+
+class TieredCache(object):
+    """Cache made of several stores, checked in order.
+
+    A hit in a slower store is copied into the faster ones before it, for the
+    time it has left to live there.
+
+    Args:
+        *stores:                    Stores, fastest first. Defaults to one :class:`MemoryCache`.
+        ttls (dict, optional):      Seconds to keep each endpoint, keyed by path prefix.
+        default_ttl (int, optional):Seconds to keep paths not matching any prefix.
+    """
+
+    def __init__(self, *stores, ttls=None, default_ttl=DEFAULT_TTL):
+        self.stores = stores or (MemoryCache(),)
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+
+    def ttl_for(self, key):
+        """Get the TTL of a key from the longest matching path prefix."""
+        return endpoint_ttl(key, self.ttls, self.default_ttl)
+
+    def get(self, key):
+        for index, store in enumerate(self.stores):
+            entry = store.get_entry(key)
+            if entry is not MISSING:
+                expires, value = entry
+                if index:
+                    ttl = expires - time.time()
+                    for faster in self.stores[:index]:
+                        faster.set(key, value, ttl)
+                return value
+        return MISSING
+
+    def set(self, key, value):
+        ttl = self.ttl_for(key)
+        if ttl <= 0:
+            return
+        for store in self.stores:
+            store.set(key, value, ttl)
+
+    def clear(self):
+        for store in self.stores:
+            store.clear()
+
+    @property
+    def stats(self):
+        """Counters of every store, in order."""
+        return [store.stats for store in self.stores]
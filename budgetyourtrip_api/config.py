@@ -1,3 +1,10 @@
 # PUT TOKEN HERE
 END_POINT = 'https://www.budgetyourtrip.com/api/v3/'
-API_KEY = 'YOURS_HERE'
\ No newline at end of file
+API_KEY = 'YOURS_HERE'
+
+# Default number of concurrent requests for the bulk *_many methods
+MAX_WORKERS = 8
+
+# Connection pools kept by a session (one per host), and connections kept alive in each
+POOL_SIZE = 10
+MAX_CONNECTIONS = 32
\ No newline at end of file
@@ -0,0 +1,246 @@
+"""Module containing the parallel crawler of the API.
+
+:func:`crawl_parallel` fills a :class:`~budgetyourtrip_api.snapshot.Snapshot` like
+:func:`~budgetyourtrip_api.snapshot.crawl`, but splits the keyspace into shards
+(the shared lists, each country with its locations, each extra location) crawled
+by a pool of processes. Every process has its own Api, limited to an equal share
+of the overall rate. Finished shards are appended to a checkpoint file next to
+the snapshot, so that an interrupted crawl resumes where it left off::
+
+    python -m budgetyourtrip_api.crawler snapshot.sqlite --processes 8 --rate 20
+
+The locations of a country are the ones the API returns when searching
+locations by the country's name, which only match that name: the locations of
+the country that don't are left out. Pass their geonameids to crawl them.
+
+"""
+
+import argparse
+import json
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import partial
+from urllib.parse import quote
+
+from budgetyourtrip_api import config
+from budgetyourtrip_api.api import Api
+from budgetyourtrip_api.cache import NO_CACHE
+from budgetyourtrip_api.ratelimit import TokenBucket
+from budgetyourtrip_api.snapshot import Snapshot, crawl, discover_country_codes
+
+# Appended to the snapshot path to name its checkpoint file.
+CHECKPOINT_SUFFIX = '.checkpoint'
+
+# Shard of the lists shared by every country: categories, currencies and rates.
+SHARED_SHARD = 'shared'
+
+
+def default_api(key, rate=None):
+    """Build the Api of a crawler process.
+
+    Responses aren't cached, since every path is requested once.
+
+    Args:
+        key (str):              api key to use.
+        rate (float, optional): Requests per second allowed to the process, unlimited if None.
+    """
+    return Api(key, cache=NO_CACHE, rate_limiter=TokenBucket(rate) if rate else None)
+
+
+class Checkpoint(object):
+    """Append-only record of the shards of a crawl, and of those finished.
+
+    The first line of the file lists every shard, each following line is a
+    finished one. A line cut short by a crash is ignored.
+
+    Args:
+        path (str):     Path of the checkpoint file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.shards = None
+        self.done = set()
+        if os.path.exists(path):
+            with open(path) as checkpoint_file:
+                for line in checkpoint_file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if self.shards is None:
+                        self.shards = record
+                    else:
+                        self.done.add(record)
+
+    def start(self, shards):
+        """Record the shards of a new crawl."""
+        self.shards = list(shards)
+        self.done = set()
+        with open(self.path, 'w') as checkpoint_file:
+            checkpoint_file.write(json.dumps(self.shards) + '\n')
+
+    def finish(self, shard):
+        """Record a finished shard, durably."""
+        self.done.add(shard)
+        with open(self.path, 'a') as checkpoint_file:
+            checkpoint_file.write(json.dumps(shard) + '\n')
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+
+    def pending(self):
+        """List the shards not finished yet, in order."""
+        return [shard for shard in self.shards or [] if shard not in self.done]
+
+
+# State of a crawler process, set by ``_init_worker``.
+_worker = {}
+
+
+def _init_worker(api_factory, rate, path, rates, locations, max_workers):
+    _worker.update(api=api_factory(rate=rate), path=path, rates=rates, locations=locations,
+                   max_workers=max_workers)
+
+
+def _fetch_all(api, snapshot, paths, max_workers):
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = dict((executor.submit(api.get, path), path) for path in paths)
+        for future in as_completed(futures):
+            snapshot.put(futures[future], future.result())
+    return len(paths)
+
+
+def _crawl_shard(shard):
+    """Crawl one shard into the snapshot, in a crawler process.
+
+    Returns:
+        tuple:          ``(shard, number of paths stored)``.
+    """
+    api, path, max_workers = _worker['api'], _worker['path'], _worker['max_workers']
+    if shard == SHARED_SHARD:
+        snapshot = crawl(api, path, country_codes=[], rates=_worker['rates'],
+                         max_workers=max_workers)
+        count = len(snapshot.paths())
+        snapshot.close()
+        return shard, count
+    kind, _, key = shard.partition('/')
+    snapshot = Snapshot(path)
+    try:
+        if kind == 'location':
+            return shard, _fetch_all(api, snapshot, ['costs/locationinfo/' + key], max_workers)
+        info_path = 'costs/countryinfo/' + key
+        data = api.get(info_path)
+        snapshot.put(info_path, data)
+        if not data or not _worker['locations']:
+            return shard, 1
+        # Locations of the country are found by searching for its name. The search
+        # response is stored as is, so that it can be refreshed like any other path.
+        search_path = 'search/location/' + quote(data['info']['name'], safe='')
+        results = api.get(search_path)
+        snapshot.put(search_path, results)
+        paths = ['costs/locationinfo/{0}'.format(item['geonameid']) for item in results or []
+                 if item.get('country_code') == key]
+        return shard, 2 + _fetch_all(api, snapshot, paths, max_workers)
+    finally:
+        snapshot.close()
+
+
+def crawl_parallel(path, key=config.API_KEY, country_codes=None, geonameids=(), rates=True,
+                   locations=True, processes=None, rate=None, max_workers=config.MAX_WORKERS,
+                   restart=False, api_factory=default_api):
+    """Crawl the API into a snapshot file with a pool of processes, resuming if interrupted.
+
+    Args:
+        path (str):                     Path of the snapshot file, created if needed.
+        key (str, optional):            api key to use.
+        country_codes (list, optional): Countries to crawl, all of them if not given.
+        geonameids (list, optional):    Extra locations to crawl.
+        rates (bool, optional):         Also store an exchange rate for every currency.
+        locations (bool, optional):     Also crawl the locations found by searching for the
+                                        name of every country. Only the locations matching
+                                        that name are found, not all those of the country.
+        processes (int, optional):      Number of crawler processes, one per CPU by default.
+        rate (float, optional):         Overall requests per second, split evenly between
+                                        the processes. Unlimited if None.
+        max_workers (int, optional):    Maximum number of concurrent requests per process.
+        restart (bool, optional):       Ignore the checkpoint of an earlier crawl. Without it,
+                                        a crawl is resumed with its own shards, and the
+                                        countries and locations passed that aren't among
+                                        them are left out, with a warning.
+        api_factory (callable, optional): Called as ``api_factory(rate=...)`` in every
+                                        process to build its Api.
+
+    Returns:
+        Snapshot:                       The filled snapshot.
+
+    Raises:
+        RuntimeError:                   If some shards failed. They are left pending, to be
+                                        crawled by the next run.
+    """
+    if api_factory is default_api:
+        api_factory = partial(default_api, key)
+    processes = processes or os.cpu_count() or 1
+    snapshot = Snapshot(path)
+    checkpoint = Checkpoint(path + CHECKPOINT_SUFFIX)
+    if restart or checkpoint.shards is None:
+        if country_codes is None:
+            country_codes = discover_country_codes(api_factory(rate=rate))
+        checkpoint.start([SHARED_SHARD] + ['country/' + code for code in country_codes] +
+                         ['location/{0}'.format(geonameid) for geonameid in geonameids])
+    else:
+        ignored = [shard for shard in ['country/' + code for code in country_codes or []] +
+                   ['location/{0}'.format(geonameid) for geonameid in geonameids]
+                   if shard not in checkpoint.shards]
+        if ignored:
+            warnings.warn('Resuming the crawl of {0}, which leaves out {1}; pass restart=True '
+                          '(--restart) to crawl them'.format(checkpoint.path,
+                                                             ', '.join(ignored)))
+    failures = []
+    with ProcessPoolExecutor(processes, initializer=_init_worker,
+                             initargs=(api_factory, rate / processes if rate else None, path,
+                                       rates, locations, max_workers)) as executor:
+        futures = dict((executor.submit(_crawl_shard, shard), shard)
+                       for shard in checkpoint.pending())
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as error:
+                failures.append((futures[future], error))
+                continue
+            checkpoint.finish(futures[future])
+    if failures:
+        raise RuntimeError('{0} shards failed, run again to resume: {1}'.format(
+            len(failures), ', '.join(shard for shard, _ in failures))) from failures[0][1]
+    return snapshot
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Crawl the budgetyourtrip API into a snapshot with a pool of processes.')
+    parser.add_argument('path', help='snapshot file to create or resume')
+    parser.add_argument('--key', default=config.API_KEY, help='api key to use')
+    parser.add_argument('--countries', nargs='*', help='country codes to crawl (default: all)')
+    parser.add_argument('--geonameids', nargs='*', default=[], help='extra locations to crawl')
+    parser.add_argument('--no-rates', action='store_true', help="don't store exchange rates")
+    parser.add_argument('--no-locations', action='store_true',
+                        help="don't crawl the locations found by searching for the name of "
+                             "every country (only those matching the name are found)")
+    parser.add_argument('--processes', type=int, help='number of processes (default: one per CPU)')
+    parser.add_argument('--rate', type=float, help='overall requests per second (default: no limit)')
+    parser.add_argument('--workers', type=int, default=config.MAX_WORKERS,
+                        help='number of concurrent requests per process')
+    parser.add_argument('--restart', action='store_true',
+                        help='start over instead of resuming from the checkpoint')
+    args = parser.parse_args(argv)
+    if os.path.dirname(args.path) and not os.path.isdir(os.path.dirname(args.path)):
+        os.makedirs(os.path.dirname(args.path))
+    snapshot = crawl_parallel(args.path, args.key, args.countries, args.geonameids,
+                              rates=not args.no_rates, locations=not args.no_locations,
+                              processes=args.processes, rate=args.rate,
+                              max_workers=args.workers, restart=args.restart)
+    print('{0}: {1} paths'.format(args.path, len(snapshot.paths())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Module containing the JSON decoders of API responses.
+
+Responses are decoded straight from their body bytes, with the fastest
+backend installed: ``orjson``, then ``ujson``, then the standard library.
+All of them raise a ``ValueError`` on invalid JSON.
+
+"""
+
+import importlib
+
+# Backends tried in order by :func:`get_decoder`.
+BACKENDS = ('orjson', 'ujson', 'json')
+
+
+def get_decoder(backend=None):
+    """Get the ``loads`` function of a JSON backend.
+
+    Args:
+        backend (str, optional):    One of :data:`BACKENDS`, the first installed one by default.
+
+    Returns:
+        callable:                   Function decoding JSON from bytes or str.
+
+    Raises:
+        ImportError:                If the backend asked for isn't installed.
+    """
+    if backend is not None:
+        return importlib.import_module(backend).loads
+    for name in BACKENDS:
+        try:
+            return importlib.import_module(name).loads
+        except ImportError:
+            continue
+
+
+# Decoder used when none is given.
+loads = get_decoder()
+
+
+def decode_data(content, decoder=None):
+    """Get the ``data`` of a response body.
+
+    Args:
+        content (bytes):            The body of the response.
+        decoder (callable, optional): JSON decoder, :data:`loads` by default.
+
+    Returns:
+        json:                       The ``data`` of the response.
+
+    Raises:
+        ValueError:                 If the body isn't valid JSON.
+    """
+    return (decoder or loads)(content)['data']
+
+
+def project(data, model_class):
+    """Keep only the keys a model reads, in a JSON item or list of items.
+
+    Args:
+        data (dict or list):        JSON representation of one or many resources.
+        model_class (type):         The :class:`~budgetyourtrip_api.models.ApiObject`
+                                    subclass the data will be built into.
+
+    Returns:
+        dict or list:               The projected copy of ``data``.
+    """
+    if isinstance(data, list):
+        project_item = model_class.project
+        return [project_item(item) for item in data]
+    return model_class.project(data)
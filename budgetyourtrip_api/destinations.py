@@ -0,0 +1,196 @@
+"""Module containing the cheapest-destinations query engine.
+
+:class:`DestinationIndex` lays the costs of every country and location out as
+one ``(destinations, categories)`` matrix per travel style, once. Queries such
+as "the 20 cheapest cities for a midrange traveler, where food and
+accommodation are under 50 EUR a day" then run on those arrays, without
+any request::
+
+    index = DestinationIndex.from_snapshot(Snapshot('snapshot.sqlite', readonly=True))
+    index.top(20, 'midrange', categories=(1, 4), currency='eur', level='location',
+              max_total=50)
+
+"""
+
+import heapq
+from collections import namedtuple
+
+import numpy as np
+
+from budgetyourtrip_api.budget import DAILY_CATEGORIES
+from budgetyourtrip_api.rates import RateMatrix
+from budgetyourtrip_api.table import CostTable, NO_GEONAMEID, STYLES
+
+# Weighted totals kept per index, keyed by style and weights.
+TOTALS_CACHE_SIZE = 32
+
+Destination = namedtuple('Destination', 'country_code geonameid name total')
+Destination.__doc__ = """A query result: a country (with ``geonameid`` None) or a location,
+and its total cost in the currency of the query."""
+
+
+def _weights(categories):
+    """Turn a list of category ids, or a ``{category_id: weight}`` dict, into sorted pairs."""
+    if isinstance(categories, dict):
+        pairs = categories.items()
+    else:
+        pairs = ((category, 1.0) for category in categories)
+    return tuple(sorted((int(category), float(weight)) for category, weight in pairs))
+
+
+def _cost_table(costs, country_code, geonameid):
+    """Build the table of the costs of one destination, keyed by its own code and id."""
+    table = CostTable.from_costs(costs if isinstance(costs, list) else None)
+    return CostTable(table.category_id, table.budget, table.midrange, table.luxury,
+                     [country_code or ''] * len(table), [geonameid] * len(table))
+
+
+class DestinationIndex(object):
+    """Per-destination cost matrices of a catalog, for top-k queries.
+
+    Args:
+        table (CostTable):              Costs of the countries and locations.
+        names (dict, optional):         Name of each country code and of each (int) geonameid.
+        rates (RateMatrix, optional):   Exchange rates for the currency of queries.
+        source_currency (str, optional):Currency of the costs in ``table``.
+    """
+
+    def __init__(self, table, names=None, rates=None, source_currency='usd'):
+        self.names = names or {}
+        self.rates = rates if rates is not None else RateMatrix()
+        self.source_currency = source_currency
+        # Destinations are distinct (country, geonameid) pairs, packed into one integer
+        # key so that they are found with a numeric sort.
+        codes, code_index = np.unique(table.country_code, return_inverse=True)
+        span = int(table.geonameid.max()) + 2 if len(table) else 1
+        keys, destination_index = np.unique(code_index * span + (table.geonameid + 1),
+                                            return_inverse=True)
+        self.country_code = codes[keys // span]
+        self.geonameid = keys % span - 1
+        self.categories, category_index = np.unique(table.category_id, return_inverse=True)
+        self._columns = dict((int(category), column)
+                             for column, category in enumerate(self.categories.tolist()))
+        # style -> cost of every category (columns) for every destination (rows), NaN if unknown
+        self.values = {}
+        for style in STYLES:
+            matrix = np.full((len(keys), len(self.categories)), np.nan)
+            matrix[destination_index, category_index] = getattr(table, style)
+            self.values[style] = matrix
+        self._totals = {}
+
+    @classmethod
+    def from_snapshot(cls, snapshot, rates=None):
+        """Index every cost stored in a :class:`~budgetyourtrip_api.snapshot.Snapshot`.
+
+        Exchange rates default to the ones stored in the snapshot.
+        """
+        from budgetyourtrip_api.snapshot import PIVOT_CURRENCY
+        names = dict((item['country_code'], item.get('name'))
+                     for item in snapshot.search_countries(''))
+        names.update((int(item['geonameid']), item.get('name'))
+                     for item in snapshot.search_locations(''))
+        if rates is None:
+            rates = RateMatrix(pivot=PIVOT_CURRENCY, ttl=float('inf'))
+            rates.load(snapshot.rates())
+        return cls(snapshot.cost_table(), names, rates)
+
+    @classmethod
+    def from_api(cls, api, country_codes, geonameids=(), rates=None):
+        """Fetch and index the costs of countries and locations.
+
+        Args:
+            api (object):                   Object that implements the API
+                                            (see :class:`~budgetyourtrip_api.api.Api`).
+            country_codes (iterable):       Countries to index.
+            geonameids (iterable, optional):Locations to index.
+            rates (RateMatrix, optional):   Exchange rates, learned from ``api`` if not given.
+        """
+        tables, names = [], {}
+        for country in api.country_info_many(country_codes):
+            if country is not None:
+                tables.append(_cost_table(country.costs, country.id_, NO_GEONAMEID))
+                names[country.id_] = country.name
+        for location in api.locations_many(geonameids):
+            if location is not None:
+                tables.append(_cost_table(location.costs, location.country_code,
+                                          int(location.id_)))
+                names[int(location.id_)] = location.name
+        return cls(CostTable.concat(tables), names,
+                   rates if rates is not None else RateMatrix(api))
+
+    def __len__(self):
+        return len(self.geonameid)
+
+    def totals(self, style='midrange', categories=DAILY_CATEGORIES):
+        """Get the weighted sum of the costs of some categories for every destination.
+
+        Args:
+            style (str, optional):          One of ``'budget'``, ``'midrange'`` or ``'luxury'``.
+            categories (iterable or dict, optional): Category ids summed, or
+                                            ``{category_id: weight}``.
+
+        Returns:
+            numpy.ndarray:                  Total of each destination in the source currency,
+                                            NaN if it lacks any of the categories.
+        """
+        weights = _weights(categories)
+        key = (style, weights)
+        totals = self._totals.get(key)
+        if totals is None:
+            columns = [self._columns.get(category) for category, _ in weights]
+            if None in columns:
+                totals = np.full(len(self), np.nan)
+            else:
+                totals = self.values[style][:, columns] @ np.array([w for _, w in weights])
+            if len(self._totals) >= TOTALS_CACHE_SIZE:
+                self._totals.pop(next(iter(self._totals)))
+            self._totals[key] = totals
+        return totals
+
+    def _destination(self, position, total):
+        geonameid = int(self.geonameid[position])
+        country_code = str(self.country_code[position])
+        if geonameid == NO_GEONAMEID:
+            return Destination(country_code, None, self.names.get(country_code), total)
+        return Destination(country_code, geonameid, self.names.get(geonameid), total)
+
+    def top(self, k=20, style='midrange', categories=DAILY_CATEGORIES, currency='usd',
+            level=None, max_total=None, where=None, largest=False):
+        """Find the cheapest (or most expensive) destinations.
+
+        Args:
+            k (int, optional):              Number of destinations to return.
+            style (str, optional):          Travel style.
+            categories (iterable or dict, optional): Category ids summed into the total, or
+                                            ``{category_id: weight}``.
+            currency (str, optional):       Currency of the totals.
+            level (str, optional):          ``'country'`` or ``'location'`` to only rank those.
+            max_total (float, optional):    Only destinations whose total is at most this.
+            where (callable, optional):     Only destinations for which it returns True,
+                                            given the :class:`Destination`.
+            largest (bool, optional):       Rank the most expensive first.
+
+        Returns:
+            list:                           Up to ``k`` :class:`Destination` tuples,
+                                            best first. Destinations missing any of the
+                                            categories are left out.
+        """
+        totals = self.totals(style, categories) * self.rates.rate(self.source_currency, currency)
+        mask = ~np.isnan(totals)
+        if level == 'country':
+            mask &= self.geonameid == NO_GEONAMEID
+        elif level == 'location':
+            mask &= self.geonameid != NO_GEONAMEID
+        if max_total is not None:
+            mask &= totals <= max_total
+        candidates = np.flatnonzero(mask)
+        keys = -totals if largest else totals
+        if where is None:
+            if k < len(candidates):
+                candidates = candidates[np.argpartition(keys[candidates], k)[:k]]
+            best = sorted(zip(keys[candidates].tolist(), candidates.tolist()))
+        else:
+            destinations = ((keys[position], position) for position in candidates.tolist()
+                            if where(self._destination(position, float(totals[position]))))
+            best = heapq.nsmallest(k, destinations)
+        return [self._destination(position, float(totals[position])) for _, position in best]
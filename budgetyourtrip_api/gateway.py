@@ -0,0 +1,209 @@
+"""Module containing a local caching gateway to the API.
+
+The gateway serves the paths of ``config.END_POINT`` to every process of a
+host, and proxies misses to the real service with one shared response cache,
+request coalescing and rate limit, so that upstream traffic doesn't grow with
+the number of worker processes. Validators (``ETag``, ``Last-Modified``) are
+passed through, and checked against the cache, so that
+:meth:`~budgetyourtrip_api.api.Api.revalidate` gets 304 answers. Start it with::
+
+    python -m budgetyourtrip_api.gateway --key KEY --port 8080 --rate 10
+
+and point the workers at it::
+
+    api = Api(end_point='http://127.0.0.1:8080/api/v3/')
+
+"""
+
+import argparse
+import asyncio
+import itertools
+from urllib.parse import urlencode
+
+import aiohttp
+from aiohttp import web
+
+from budgetyourtrip_api import config
+from budgetyourtrip_api.cache import MISSING, MemoryCache, SqliteCache, TieredCache
+from budgetyourtrip_api.ratelimit import RetryPolicy, TokenBucket
+
+# Path the API is served under, as in ``config.END_POINT``.
+PREFIX = '/api/v3/'
+
+# Upstream statuses passed on to clients and cached: found and not found.
+CACHED_STATUSES = (200, 404)
+
+# Response headers passed on to clients and cached with the body.
+VALIDATORS = ('ETag', 'Last-Modified')
+
+
+class GatewayStats(object):
+    """Counters of a gateway.
+
+    Attributes:
+        requests (int):     Requests received.
+        hits (int):         Requests answered from the cache.
+        coalesced (int):    Requests that waited on an identical upstream request in flight.
+        upstream (int):     Requests sent upstream, retries included.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.hits = 0
+        self.coalesced = 0
+        self.upstream = 0
+
+    def as_dict(self):
+        return {'requests': self.requests, 'hits': self.hits, 'coalesced': self.coalesced,
+                'upstream': self.upstream}
+
+
+class Gateway(object):
+    """Caching, coalescing and rate limiting proxy to the API.
+
+    Args:
+        key (str, optional):            api key sent upstream; clients don't need one.
+        upstream (str, optional):       Base URL of the real API.
+        cache (object, optional):       Response cache
+                                        (see :class:`~budgetyourtrip_api.cache.TieredCache`),
+                                        an in-memory one by default.
+        rate_limiter (object, optional):Limiter of the upstream requests
+                                        (see :class:`~budgetyourtrip_api.ratelimit.TokenBucket`).
+        retry (object, optional):       Policy for retrying throttled and failed upstream
+                                        requests, None to never retry.
+        pool_size (int, optional):      Maximum number of upstream connections.
+    """
+
+    def __init__(self, key=config.API_KEY, upstream=None, cache=None, rate_limiter=None,
+                 retry=RetryPolicy(), pool_size=100):
+        self.key = key
+        self.upstream = upstream or config.END_POINT
+        self.cache = cache if cache is not None else TieredCache()
+        self.rate_limiter = rate_limiter
+        self.retry = retry
+        self.pool_size = pool_size
+        self.stats = GatewayStats()
+        self._in_flight = {}
+        self._session = None
+
+    def app(self):
+        """Build the ``aiohttp`` application serving the API paths."""
+        app = web.Application()
+        app.router.add_get(PREFIX + '{path:.*}', self.handle)
+        app.on_startup.append(self._open)
+        app.on_cleanup.append(self._close)
+        return app
+
+    async def _open(self, app):
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            headers={'X-API-KEY': self.key})
+
+    async def _close(self, app):
+        await self._session.close()
+
+    async def handle(self, request):
+        """Answer a request from the cache, or from the upstream response shared by
+        every identical request in flight."""
+        self.stats.requests += 1
+        path = request.match_info['path']
+        if request.query:
+            path += '?' + urlencode(sorted(request.query.items()))
+        conditions = (request.headers.get('If-None-Match'),
+                      request.headers.get('If-Modified-Since'))
+        loop = asyncio.get_running_loop()
+        # The cache may be on disk, so it is used off the event loop.
+        cached = await loop.run_in_executor(None, self.cache.get, path)
+        if cached is not MISSING:
+            self.stats.hits += 1
+            # Bodies are cached as latin-1 text, which maps every byte to one character.
+            status, body, headers = cached[0], cached[1].encode('latin-1'), cached[2]
+            if status == 200 and _not_modified(headers, *conditions):
+                status, body = 304, None
+        else:
+            # Conditional requests may be answered 304 upstream, so they are only
+            # coalesced with requests with the same validators.
+            key = (path,) + conditions
+            task = self._in_flight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(self._fetch(path, conditions))
+                self._in_flight[key] = task
+                task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            else:
+                self.stats.coalesced += 1
+            # Shielded, so that a client hanging up doesn't cancel the others' request.
+            status, body, headers = await asyncio.shield(task)
+        return web.Response(status=status, body=body, headers=headers,
+                            content_type=None if status == 304 else 'application/json')
+
+    async def _fetch(self, path, conditions=(None, None)):
+        """Request a path upstream, caching found and not found answers.
+
+        Args:
+            path (str):                 Path under the upstream end point, with its query.
+            conditions (tuple, optional): ``If-None-Match`` and ``If-Modified-Since`` of
+                                        the client, sent upstream when given.
+
+        Returns:
+            tuple:          ``(status, body, validators)`` of the upstream response.
+        """
+        url = self.upstream + path
+        request_headers = dict((name, value) for name, value in
+                               zip(('If-None-Match', 'If-Modified-Since'), conditions) if value)
+        loop = asyncio.get_running_loop()
+        for attempt in itertools.count():
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            self.stats.upstream += 1
+            try:
+                async with self._session.get(url, headers=request_headers) as response:
+                    status, body = response.status, await response.read()
+                    retry_after = response.headers.get('Retry-After')
+                    headers = dict((name, response.headers[name]) for name in VALIDATORS
+                                   if name in response.headers)
+            except aiohttp.ClientConnectionError:
+                if self.retry is None or not self.retry.should_retry(attempt):
+                    return 502, b'{"status": false}', {}
+                await asyncio.sleep(self.retry.delay(attempt))
+                continue
+            if status in CACHED_STATUSES:
+                await loop.run_in_executor(None, self.cache.set, path,
+                                           [status, body.decode('latin-1'), headers])
+                return status, body, headers
+            if status == 304 or self.retry is None or \
+                    not self.retry.should_retry(attempt, status):
+                return status, body or None, headers
+            await asyncio.sleep(self.retry.delay(attempt, retry_after))
+
+
+def _not_modified(validators, if_none_match, if_modified_since):
+    """Tell if a client's validators match those of a cached response."""
+    if if_none_match:
+        etag = validators.get('ETag')
+        return etag is not None and (if_none_match.strip() == '*' or
+                                     etag in (tag.strip() for tag in if_none_match.split(',')))
+    return if_modified_since is not None and \
+        if_modified_since == validators.get('Last-Modified')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Serve a caching gateway to the budgetyourtrip API.')
+    parser.add_argument('--key', default=config.API_KEY, help='api key to use upstream')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='port to listen on')
+    parser.add_argument('--upstream', default=config.END_POINT, help='base URL of the API')
+    parser.add_argument('--rate', type=float,
+                        help='upstream requests per second (default: no limit)')
+    parser.add_argument('--cache', help='sqlite file to keep the cache in (default: memory only)')
+    args = parser.parse_args(argv)
+    stores = [MemoryCache()]
+    if args.cache:
+        stores.append(SqliteCache(args.cache))
+    gateway = Gateway(args.key, args.upstream, TieredCache(*stores),
+                      TokenBucket(args.rate) if args.rate else None)
+    web.run_app(gateway.app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""Module containing the instrumentation of the API.
+
+:class:`Instrumentation` dispatches the events of an :class:`~budgetyourtrip_api.api.Api`
+to hooks. A hook is any object with ``on_<event>`` methods for the events it wants:
+
+====================  ==============================================================
+``request_start``     ``path``
+``request_end``       ``path``, ``status`` (None on connection errors), ``seconds``, ``size``
+``retry``             ``path``, ``attempt``, ``status``, ``delay``
+``cache_hit``         ``path``
+``cache_miss``        ``path``
+``parse``             ``path``, ``seconds``
+``model_build``       ``model``, ``count``, ``seconds``
+====================  ==============================================================
+
+``path`` is a template such as ``costs/location/{id}``, so that metrics don't grow
+with the number of distinct ids. :class:`MetricsRegistry` is a hook keeping counters
+and latency histograms, exportable in the Prometheus text format.
+:class:`OpenTelemetryHook` turns requests into OpenTelemetry spans.
+
+"""
+
+import re
+import threading
+from collections import defaultdict
+
+# Number of leading path segments naming each endpoint; the rest are ids.
+ENDPOINT_SEGMENTS = {
+    'costs':                2,
+    'search':               2,
+    'currencies/convert':   2,
+}
+
+# Upper bounds in seconds of the latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def path_template(path):
+    """Replace the ids of an endpoint path by ``{id}``, e.g. ``costs/location/{id}``."""
+    segments = [segment for segment in re.split('[?#]', path)[0].split('/') if segment]
+    literal = ENDPOINT_SEGMENTS.get('/'.join(segments[:2]),
+                                    ENDPOINT_SEGMENTS.get(''.join(segments[:1]), 1))
+    return '/'.join(segments[:literal] + ['{id}'] * (len(segments) - literal))
+
+
+class Instrumentation(object):
+    """Dispatcher of API events to hooks.
+
+    Args:
+        *hooks:     Objects with ``on_<event>`` methods.
+    """
+
+    def __init__(self, *hooks):
+        self.hooks = list(hooks)
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def emit(self, event, **fields):
+        for hook in self.hooks:
+            handler = getattr(hook, 'on_' + event, None)
+            if handler is not None:
+                handler(**fields)
+
+
+class Histogram(object):
+    """Cumulative histogram, as in the Prometheus data model."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+    def quantile(self, fraction):
+        """Estimate a quantile as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= rank:
+                return bound
+        return float('inf')
+
+
+class MetricsRegistry(object):
+    """Hook keeping in-process metrics of the API, by endpoint path template.
+
+    Attributes:
+        requests (dict):        ``{(path, status): count}``.
+        latency (dict):         ``{path: Histogram}`` of request durations.
+        parse_time (dict):      ``{path: Histogram}`` of JSON decoding durations.
+        build_time (dict):      ``{model: Histogram}`` of model construction durations.
+        bytes (dict):           ``{path: total response bytes}``.
+        retries (dict):         ``{path: count}``.
+        cache_hits (dict):      ``{path: count}``.
+        cache_misses (dict):    ``{path: count}``.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(self._histogram)
+        self.parse_time = defaultdict(self._histogram)
+        self.build_time = defaultdict(self._histogram)
+        self.bytes = defaultdict(int)
+        self.retries = defaultdict(int)
+        self.cache_hits = defaultdict(int)
+        self.cache_misses = defaultdict(int)
+
+    def _histogram(self):
+        return Histogram(self._buckets)
+
+    def on_request_end(self, path, status, seconds, size):
+        with self._lock:
+            self.requests[(path, status)] += 1
+            self.latency[path].observe(seconds)
+            self.bytes[path] += size or 0
+
+    def on_retry(self, path, attempt, status, delay):
+        with self._lock:
+            self.retries[path] += 1
+
+    def on_cache_hit(self, path):
+        with self._lock:
+            self.cache_hits[path] += 1
+
+    def on_cache_miss(self, path):
+        with self._lock:
+            self.cache_misses[path] += 1
+
+    def on_parse(self, path, seconds):
+        with self._lock:
+            self.parse_time[path].observe(seconds)
+
+    def on_model_build(self, model, count, seconds):
+        with self._lock:
+            self.build_time[model].observe(seconds)
+
+    def hottest(self, count=10):
+        """Get the ``count`` endpoints with the most total request time, as ``(path, seconds)``."""
+        with self._lock:
+            totals = [(path, histogram.sum) for path, histogram in self.latency.items()]
+        return sorted(totals, key=lambda item: -item[1])[:count]
+
+    def to_prometheus(self, prefix='budgetyourtrip'):
+        """Export the metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def counter(name, help_text, values, label):
+            lines.append('# HELP {0}_{1} {2}'.format(prefix, name, help_text))
+            lines.append('# TYPE {0}_{1} counter'.format(prefix, name))
+            for key, value in sorted(values.items(), key=str):
+                lines.append('{0}_{1}{{{2}}} {3}'.format(prefix, name, label(key), value))
+
+        def histogram(name, help_text, values, label_name):
+            lines.append('# HELP {0}_{1} {2}'.format(prefix, name, help_text))
+            lines.append('# TYPE {0}_{1} histogram'.format(prefix, name))
+            for key, hist in sorted(values.items()):
+                label = '{0}="{1}"'.format(label_name, key)
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append('{0}_{1}_bucket{{{2},le="{3}"}} {4}'.format(
+                        prefix, name, label, bound, count))
+                lines.append('{0}_{1}_bucket{{{2},le="+Inf"}} {3}'.format(
+                    prefix, name, label, hist.count))
+                lines.append('{0}_{1}_sum{{{2}}} {3}'.format(prefix, name, label, hist.sum))
+                lines.append('{0}_{1}_count{{{2}}} {3}'.format(prefix, name, label, hist.count))
+
+        with self._lock:
+            counter('requests_total', 'Requests sent, by endpoint and status.', self.requests,
+                    lambda key: 'path="{0}",status="{1}"'.format(*key))
+            counter('response_bytes_total', 'Response bytes received, by endpoint.', self.bytes,
+                    'path="{0}"'.format)
+            counter('retries_total', 'Requests retried, by endpoint.', self.retries,
+                    'path="{0}"'.format)
+            counter('cache_hits_total', 'Response cache hits, by endpoint.', self.cache_hits,
+                    'path="{0}"'.format)
+            counter('cache_misses_total', 'Response cache misses, by endpoint.',
+                    self.cache_misses, 'path="{0}"'.format)
+            histogram('request_seconds', 'Request duration, by endpoint.', self.latency, 'path')
+            histogram('parse_seconds', 'JSON decoding duration, by endpoint.', self.parse_time,
+                      'path')
+            histogram('model_build_seconds', 'Model construction duration, by model.',
+                      self.build_time, 'model')
+        return '\n'.join(lines) + '\n'
+
+
+class OpenTelemetryHook(object):
+    """Hook recording every request as an OpenTelemetry span.
+
+    Requires the ``opentelemetry-api`` package.
+
+    Args:
+        tracer (object, optional):  Tracer to use, the ``budgetyourtrip_api`` one by default.
+    """
+
+    def __init__(self, tracer=None):
+        if tracer is None:
+            from opentelemetry import trace
+            tracer = trace.get_tracer('budgetyourtrip_api')
+        self._tracer = tracer
+        self._spans = threading.local()
+
+    def on_request_start(self, path):
+        span = self._tracer.start_span('GET ' + path, attributes={'http.method': 'GET',
+                                                                  'http.route': path})
+        self._spans.current = span
+
+    def on_request_end(self, path, status, seconds, size):
+        span = getattr(self._spans, 'current', None)
+        if span is None:
+            return
+        if status is not None:
+            span.set_attribute('http.status_code', status)
+        if size is not None:
+            span.set_attribute('http.response_content_length', size)
+        span.end()
+        self._spans.current = None
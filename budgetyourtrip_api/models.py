@@ -21,32 +21,60 @@ def api_method(func):
         if args[0]._api:
             return func(*args, **kwargs)
         else:
-            raise NotImplementedError
+            raise NotImplementedError('{0} is not bound to an api: {1} needs one'.format(
+                type(args[0]).__name__, func.__name__))
     return api_call
 
 # Base class
 class ApiObject(object):
+    """Base of the API models.
+
+    Subclasses declare ``attrs`` once, at class level, mapping each attribute
+    name to its key (or list of nested keys) in the JSON representation, and
+    list those names in ``__slots__`` so instances carry no ``__dict__``.
+    """
+    __slots__ = ('_api',)
+    attrs = {}
+
     def __init__(self):
         pass
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Split the field map once per class: plain keys can be read with a
+        # single ``dict.get``, nested ones go through ``_get_from_dict``.
+        cls._flat_fields = tuple((key, value) for key, value in cls.attrs.items()
+                                 if not isinstance(value, (list, tuple)))
+        cls._nested_fields = tuple((key, value) for key, value in cls.attrs.items()
+                                   if isinstance(value, (list, tuple)))
+        # Top-level JSON keys read by ``_build``, kept by ``project``.
+        cls._json_keys = tuple(dict.fromkeys(
+            value[0] if isinstance(value, (list, tuple)) else value
+            for value in cls.attrs.values()))
+
+    @classmethod
+    def project(cls, model_json):
+        """Copy a JSON representation, keeping only the keys the model reads."""
+        return dict((key, model_json[key]) for key in cls._json_keys if key in model_json)
+
     def _build(self, model_json):
         """Assemble an object from a JSON representation.
 
         Uses ``self.attrs`` to pull values from ``model_json`` and create object attributes.
+        Attributes whose key is not in ``model_json`` are set to None.
 
         Args:
             model_json: JSON representation of an API resource.
 
-        Raises:
-            KeyError: if the key from ``self.attrs`` is not a key in ``model_json``
-
         """
-        for key, value in self.attrs.items():
+        get = model_json.get
+        for key, value in self._flat_fields:
+            setattr(self, key, get(value))
+        for key, value in self._nested_fields:
             try:
-                # TODO use setattr(self, key, value) instead?
-                self.__dict__.update({key: ApiObject._get_from_dict(model_json, value)})
+                setattr(self, key, ApiObject._get_from_dict(model_json, value))
             except KeyError:
-                self.__dict__.update({key: None})
+                setattr(self, key, None)
         
     @staticmethod
     def _get_from_dict(data_dict, map_list):
@@ -70,15 +98,130 @@ class ApiObject(object):
             data_dict = data_dict[map_list]
         return data_dict
 
+    def _fields(self):
+        return dict((k, getattr(self, k)) for k in self.attrs)
+
+    def __getstate__(self):
+        """Pickle the fields only: the api, if any, holds a live session."""
+        return self._fields()
+
+    def __setstate__(self, state):
+        self._api = None
+        for key, value in state.items():
+            setattr(self, key, value)
+
     def __eq__(self, other):
         """Define equality of two API objects as having the same type and attributes."""
-        return (type(self) == type(other) and
-                dict((k, self.__dict__[k]) for k in self.attrs.keys()) ==
-                dict((k, other.__dict__[k]) for k in other.attrs.keys()))
+        return type(self) == type(other) and self._fields() == other._fields()
 
     def __repr__(self):
         """Nicer printing of API objects."""
-        return str(dict((k, self.__dict__[k]) for k in self.attrs.keys()))
+        return str(self._fields())
+
+
+# Value of ``_costs`` until the costs of an object are fetched.
+_NOT_LOADED = object()
+
+
+class CostedObject(ApiObject):
+    """Base of the models that have a list of :class:`Costs <Cost>`.
+
+    Costs are fetched with ``_fetch_costs`` on first access, once: an empty or
+    missing list is remembered too. The first cost lookup indexes the costs by
+    category and style, with values parsed to float once.
+    """
+    __slots__ = ('_costs', '_cost_index')
+
+    STYLES = ('budget', 'midrange', 'luxury')
+
+    # Value of ``costs`` when the API has no costs for the object.
+    _MISSING_COSTS = None
+
+    @classmethod
+    def project(cls, model_json):
+        """Copy a JSON representation, keeping only the keys the model and its costs read."""
+        if 'info' in model_json:
+            return {'info': super(CostedObject, cls).project(model_json['info']),
+                    'costs': [Cost.project(cost_json) for cost_json in model_json['costs']]}
+        return super(CostedObject, cls).project(model_json)
+
+    def __getstate__(self):
+        state = super(CostedObject, self).__getstate__()
+        if self._costs is not _NOT_LOADED:
+            state['_costs'] = self._costs
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        self._costs = state.pop('_costs', _NOT_LOADED)
+        self._cost_index = None
+        super(CostedObject, self).__setstate__(state)
+
+    def _fetch_costs(self):
+        raise NotImplementedError
+
+    def _set_costs(self, costs):
+        """Store the costs of the object, e.g. when they were fetched in a batch."""
+        self._costs = self._MISSING_COSTS if costs is None else costs
+        self._cost_index = None
+
+    @property
+    def costs(self):
+        if self._costs is _NOT_LOADED:
+            self._set_costs(self._fetch_costs())
+        return self._costs
+
+    def _get_cost_index(self):
+        """Get the costs indexed as ``{style: {category_id: value}}``, or None without costs."""
+        if self._cost_index is None:
+            costs = self.costs
+            if not costs or costs == -1:
+                return None
+            index = dict((style, {}) for style in self.STYLES)
+            for cost in costs:
+                if cost.id_ is None:
+                    continue
+                category_id = int(cost.id_)
+                for style in self.STYLES:
+                    value = getattr(cost, style)
+                    index[style][category_id] = None if value is None else float(value)
+            self._cost_index = index
+        return self._cost_index
+
+    def cost(self, category_id, style):
+        """Get the cost of one category for a travel style.
+
+        Args:
+            category_id (int or str):   Unique identifier of a category.
+            style (str):                One of ``'budget'``, ``'midrange'`` or ``'luxury'``.
+
+        Returns:
+            float:                      The cost, or None if it is unknown.
+        """
+        index = self._get_cost_index()
+        if index is None:
+            return None
+        return index[style].get(int(category_id))
+
+    def costs_by_style(self, style):
+        """Get the cost of every category for a travel style.
+
+        Returns:
+            dict:                       Cost per category id.
+        """
+        index = self._get_cost_index()
+        if index is None:
+            return {}
+        return dict(index[style])
+
+    def accommodation_cost(self, style):
+        return self.cost(1, style)
+
+    def food_cost(self, style):
+        return self.cost(4, style)
+
+    def entertainment_cost(self, style):
+        return self.cost(6, style)
 
 
 # Travel costs categories
@@ -91,6 +234,13 @@ class Category(ApiObject):
         description (str):  Description of the category.
     """
 
+    attrs = {
+        "id_"           : "category_id",
+        "name"          : "name",
+        "description"   : "description"
+    }
+    __slots__ = tuple(attrs)
+
     def __init__(self, category_json, api=None):
         """Take in a JSON representation of a category and convert it into Categories Object.
 
@@ -102,14 +252,9 @@ class Category(ApiObject):
         """
         super(Category, self).__init__()
         self._api = api
-        self.attrs = {
-            "id_"           : "category_id",
-            "name"          : "name",
-            "description"   : "description"
-        }
         self._build(category_json)
 
-class Country(ApiObject):
+class Country(CostedObject):
     """ Class representing a Country.
 
     Attributes:
@@ -121,6 +266,15 @@ class Country(ApiObject):
         costs (list):       All of the :class:`Costs <Cost>` of the country.
     """
 
+    attrs = {
+        "id_"           : "country_code",
+        "name"          : "name",
+        "canonical_url" : "url",
+        "negotiate"     : "negotiate",
+        "currency"      : "currency_code"
+    }
+    __slots__ = tuple(attrs)
+
     def __init__(self, country_json, api=None):
         """Take in a JSON representation of a country and make a Country Object.
 
@@ -132,52 +286,20 @@ class Country(ApiObject):
         """
         super(Country, self).__init__()
         self._api = api
-        self.attrs = {
-            "id_"           : "country_code",
-            "name"          : "name",
-            "canonical_url" : "url",
-            "negotiate"     : "negotiate",
-            "currency"      : "currency_code"
-        }
         if 'info' in country_json:
             self._costs = []
+            self._cost_index = None
             self._build(country_json['info'])
             for cost_json in country_json['costs']:
                 self._costs.append(Cost(cost_json))
         else:
-            self._costs = None
+            self._costs = _NOT_LOADED
+            self._cost_index = None
             self._build(country_json)
 
-    @property
-    def costs(self):
-        if self._costs:
-            return self._costs
-        self._costs = self._api.country_costs(self.id_)
-        return self._costs
-
-    def accommodation_cost(self, style):
-        if self.costs == -1:
-            return None
-        for cost in self.costs:
-            if cost.id_ == '1':
-                return float(cost.__dict__[style])
-        return None
-
-    def food_cost(self, style):
-        if self.costs == -1:
-            return None
-        for cost in self.costs:
-            if cost.id_ == '4':
-                return float(cost.__dict__[style])
-        return None
-
-    def entertainment_cost(self, style):
-        if self.costs == -1:
-            return None
-        for cost in self.costs:
-            if cost.id_ == '6':
-                return float(cost.__dict__[style])
-        return None
+    @api_method
+    def _fetch_costs(self):
+        return self._api.country_costs(self.id_)
 
 class Cost(ApiObject):
     """ Class representing a cost.
@@ -190,6 +312,16 @@ class Cost(ApiObject):
         country_code (str):     Unique country code identifier.
     """
 
+    attrs = {
+        "id_"           : "category_id",
+        "budget"        : "value_budget",
+        "midrange"      : "value_midrange",
+        "luxury"        : "value_luxury",
+        "country_id"    : "country_code",
+        "geoname_id"    : "geonameid"
+    }
+    __slots__ = tuple(attrs)
+
     def __init__(self, cost_json, api=None):
         """Take in a JSON representation of a cost and make a Cost Object.
 
@@ -201,14 +333,6 @@ class Cost(ApiObject):
         """
         super(Cost, self).__init__()
         self._api = api
-        self.attrs = {
-            "id_"           : "category_id",
-            "budget"        : "value_budget",
-            "midrange"      : "value_midrange",
-            "luxury"        : "value_luxury",
-            "country_id"    : "country_code",
-            "geoname_id"    : "geonameid"
-        }
         self._build(cost_json)
 
 
@@ -220,6 +344,14 @@ class Currency(ApiObject):
         name (str):             Currency name.
         symbol (str):           Currency symbol.
     """
+
+    attrs = {
+        "id_"           : "currency_code",
+        "name"          : "currency",
+        "symbol"        : "symbol"
+    }
+    __slots__ = tuple(attrs)
+
     def __init__(self, currency_json, api=None):
         """take in a JSON representation of a currency and make a Currency object.
 
@@ -231,15 +363,10 @@ class Currency(ApiObject):
         """
         super(Currency, self).__init__()
         self._api = api
-        self.attrs = {
-            "id_"           : "currency_code",
-            "name"          : "currency",
-            "symbol"        : "symbol"
-        }
         self._build(currency_json)
 
 
-class Location(ApiObject):
+class Location(CostedObject):
     """ Class representing a location.
 
     Attributes:
@@ -257,6 +384,22 @@ class Location(ApiObject):
         currency (str):         Full currency string.
     """
 
+    attrs = {
+        "id_"           : "geonameid",
+        "name"          : "name",
+        "latitude"      : "latitude",
+        "longitude"     : "longitude",
+        "feature_class" : "feature_class",
+        "feature_code"  : "feature_code",
+        "country_code"  : "country_code",
+        "country_name"  : "country_name",
+        "admin1_code"   : "admin1_code",
+        "negotiate"     : "negotiate",
+        "currency_code" : "currency_code",
+        "currency"      : "currency"
+    }
+    __slots__ = tuple(attrs)
+
     def __init__(self, location_json, api=None):
         """Take in a JSON representation of a cost and make a Cost Object.
 
@@ -268,58 +411,19 @@ class Location(ApiObject):
         """
         super(Location, self).__init__()
         self._api = api
-        self.attrs = {
-            "id_"           : "geonameid",
-            "name"          : "name",
-            "latitude"      : "latitude",
-            "longitude"     : "longitude",
-            "feature_class" : "feature_class",
-            "feature_code"  : "feature_code",
-            "country_code"  : "country_code",
-            "country_name"  : "country_name",
-            "admin1_code"   : "admin1_code",
-            "negotiate"     : "negotiate",
-            "currency_code" : "currency_code",
-            "currency"      : "currency"
-        }
         if 'info' in location_json:
             self._costs = []
+            self._cost_index = None
             self._build(location_json['info'])
             for cost_json in location_json['costs']:
                 self._costs.append(Cost(cost_json))
         else:
-            self._costs = None
+            self._costs = _NOT_LOADED
+            self._cost_index = None
             self._build(location_json)
 
-    @property
-    def costs(self):
-        if self._costs:
-            return self._costs
-        self._costs = self._api.location_costs(self.id_)
-        if self._costs == None:
-            self._costs = -1
-        return self._costs
+    _MISSING_COSTS = -1
 
-    def accommodation_cost(self, style):
-        if self.costs == -1:
-            return None
-        for cost in self.costs:
-            if cost.id_ == '1':
-                return float(cost.__dict__[style])
-        return None
-
-    def food_cost(self, style):
-        if self.costs == -1:
-            return None
-        for cost in self.costs:
-            if cost.id_ == '4':
-                return float(cost.__dict__[style])
-        return None
-
-    def entertainment_cost(self, style):
-        if self.costs == -1:
-            return None
-        for cost in self.costs:
-            if cost.id_ == '6':
-                return float(cost.__dict__[style])
-        return None
+    @api_method
+    def _fetch_costs(self):
+        return self._api.location_costs(self.id_)
@@ -0,0 +1,170 @@
+"""Module containing the client-side flow control used by the API.
+
+* :class:`TokenBucket` caps the request rate, across threads and optionally processes.
+* :class:`AdaptiveConcurrency` caps the requests in flight, growing the cap
+  additively while the server copes and halving it when it pushes back (AIMD).
+* :class:`RetryPolicy` decides which failures to retry and how long to wait,
+  with jittered exponential backoff that honors ``Retry-After``.
+
+"""
+
+import asyncio
+import multiprocessing
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket(object):
+    """Token bucket rate limiter.
+
+    Args:
+        rate (float):               Tokens added per second, i.e. sustained requests per second.
+        burst (int, optional):      Maximum tokens stored, i.e. the largest burst allowed.
+        shared (bool, optional):    Keep the bucket in shared memory, so processes forked
+                                    after it is created (or given it at start-up) share one budget.
+    """
+
+    def __init__(self, rate, burst=None, shared=False):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1, rate))
+        if shared:
+            self._lock = multiprocessing.Lock()
+            self._tokens = multiprocessing.RawValue('d', self.burst)
+            self._updated = multiprocessing.RawValue('d', time.monotonic())
+        else:
+            self._lock = threading.Lock()
+            self._tokens = _Value(self.burst)
+            self._updated = _Value(time.monotonic())
+
+    def _take(self):
+        """Take a token if one is available, else return the seconds until one is."""
+        with self._lock:
+            now = time.monotonic()
+            tokens = min(self.burst, self._tokens.value + (now - self._updated.value) * self.rate)
+            self._updated.value = now
+            if tokens >= 1:
+                self._tokens.value = tokens - 1
+                return 0
+            self._tokens.value = tokens
+            return (1 - tokens) / self.rate
+
+    def acquire(self):
+        """Wait until a request may be sent."""
+        wait = self._take()
+        while wait:
+            time.sleep(wait)
+            wait = self._take()
+
+    async def acquire_async(self):
+        """Wait until a request may be sent, without blocking the event loop."""
+        wait = self._take()
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self._take()
+
+
+class _Value(object):
+    """Same interface as ``multiprocessing.RawValue``, for buckets that aren't shared."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class AdaptiveConcurrency(object):
+    """Limit on requests in flight, adapted with AIMD.
+
+    Every successful request grows the limit by ``1 / limit`` (about one per round
+    of requests); every throttled one halves it.
+
+    Args:
+        initial (int, optional):    Starting limit.
+        minimum (int, optional):    The limit never drops below this.
+        maximum (int, optional):    The limit never grows above this.
+    """
+
+    def __init__(self, initial=8, minimum=1, maximum=256):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(initial)
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the allowed in-flight slots for the duration of a request."""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify()
+
+    def success(self):
+        with self._condition:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify()
+
+    def throttled(self):
+        with self._condition:
+            self.limit = max(self.minimum, self.limit / 2)
+
+
+class RetryPolicy(object):
+    """Which failed requests to retry, and how long to wait before doing so.
+
+    Args:
+        max_retries (int, optional):    Retries after the first attempt.
+        backoff (float, optional):      Base delay in seconds, doubled on every attempt.
+        max_backoff (float, optional):  Longest delay between two attempts.
+        statuses (tuple, optional):     HTTP status codes worth retrying.
+    """
+
+    def __init__(self, max_retries=5, backoff=0.5, max_backoff=30,
+                 statuses=(429, 500, 502, 503, 504)):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+
+    def should_retry(self, attempt, status_code=None):
+        """Tell whether attempt number ``attempt`` (0 for the first) may be retried.
+
+        Args:
+            attempt (int):                  Number of the attempt that failed.
+            status_code (int, optional):    Status of the response, None for a connection error.
+        """
+        if attempt >= self.max_retries:
+            return False
+        return status_code is None or status_code in self.statuses
+
+    def delay(self, attempt, retry_after=None):
+        """Get the seconds to wait before retrying attempt number ``attempt``.
+
+        Uses "full jitter": a random delay up to the exponential backoff, so that
+        clients failing together don't retry together. A ``Retry-After`` header,
+        in seconds or as an HTTP date, is a lower bound.
+        """
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        return max(delay, parse_retry_after(retry_after))
+
+
+def parse_retry_after(value):
+    """Get the seconds a ``Retry-After`` header asks to wait, 0 if it is missing or invalid."""
+    if not value:
+        return 0
+    try:
+        return max(0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0
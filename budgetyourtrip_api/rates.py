@@ -0,0 +1,112 @@
+"""Module containing a local currency rate matrix.
+
+Rates are learned once per currency, relative to a pivot currency, and every
+conversion after that is a lookup and a multiply. Cross rates go through the
+pivot: ``rate(a, b) = rate(pivot, b) / rate(pivot, a)``.
+
+"""
+
+import threading
+import time
+
+import numpy as np
+
+# Amount converted when learning a rate, large enough that the API's rounding
+# of ``newAmount`` doesn't cost precision.
+PROBE_AMOUNT = 1000000
+
+
+class RateMatrix(object):
+    """Exchange rates of many currencies against one pivot currency.
+
+    Args:
+        api (object, optional):     Object that implements the API
+                                    (see :class:`~budgetyourtrip_api.api.Api`).
+                                    Used to learn rates that are unknown or stale.
+        pivot (str, optional):      Currency all rates are stored against.
+        ttl (int, optional):        Seconds before a learned rate is fetched again.
+    """
+
+    def __init__(self, api=None, pivot='usd', ttl=3600):
+        self._api = api
+        self.pivot = pivot.lower()
+        self.ttl = ttl
+        self._rates = {self.pivot: (1.0, float('inf'))}
+        self._lock = threading.Lock()
+
+    def load(self, rates, ttl=None):
+        """Load rates in bulk.
+
+        Args:
+            rates (dict):           Units of each currency worth one unit of the pivot.
+            ttl (int, optional):    Seconds before these rates go stale, defaults to ``self.ttl``.
+        """
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            for currency, rate in rates.items():
+                self._rates[currency.lower()] = (float(rate), expires)
+
+    def refresh(self):
+        """Fetch every known rate again from the API."""
+        for currency in self.currencies:
+            if currency != self.pivot:
+                self._learn(currency)
+
+    @property
+    def currencies(self):
+        """Codes of the currencies with a known rate."""
+        return list(self._rates)
+
+    def _learn(self, currency):
+        if self._api is None:
+            raise KeyError(currency)
+        amount = self._api.convert_currency(PROBE_AMOUNT, self.pivot, currency)
+        if amount is None:
+            raise KeyError(currency)
+        rate = float(amount) / PROBE_AMOUNT
+        with self._lock:
+            self._rates[currency] = (rate, time.time() + self.ttl)
+        return rate
+
+    def pivot_rate(self, currency):
+        """Get the units of ``currency`` worth one unit of the pivot.
+
+        Raises:
+            KeyError: if the rate is unknown and can't be learned from the API.
+        """
+        currency = currency.lower()
+        entry = self._rates.get(currency)
+        if entry is None or entry[1] < time.time():
+            return self._learn(currency)
+        return entry[0]
+
+    def rate(self, from_cur, to_cur):
+        """Get the units of ``to_cur`` worth one unit of ``from_cur``."""
+        return self.pivot_rate(to_cur) / self.pivot_rate(from_cur)
+
+    def convert(self, amount, from_cur='usd', to_cur='eur'):
+        """Convert a scalar or an array of amounts from one currency to the other.
+
+        Returns:
+            float or numpy.ndarray: The converted amount(s).
+        """
+        rate = self.rate(from_cur, to_cur)
+        if np.ndim(amount) == 0:
+            return float(amount) * rate
+        return np.asarray(amount, dtype=np.float64) * rate
+
+    def convert_many(self, amounts, from_curs, to_cur='eur'):
+        """Convert amounts that are each in their own currency to one currency.
+
+        Args:
+            amounts (array-like):   The amounts to convert.
+            from_curs (array-like): Currency code of each amount.
+            to_cur (str, optional): Currency to convert to.
+
+        Returns:
+            numpy.ndarray:          The converted amounts.
+        """
+        codes, inverse = np.unique(np.asarray(from_curs, dtype=str), return_inverse=True)
+        target = self.pivot_rate(to_cur)
+        factors = np.array([target / self.pivot_rate(code) for code in codes], dtype=np.float64)
+        return np.asarray(amounts, dtype=np.float64) * factors[inverse]
@@ -0,0 +1,253 @@
+"""Module containing a local search index of locations.
+
+:class:`LocationIndex` answers autocomplete and nearest-location queries from
+memory, instead of one ``search/location`` request per keystroke:
+
+* names and country names are matched by word prefix, with a sorted list and
+  bisection, then by trigram similarity of their words for typos. Only the
+  words sharing one of the term's rarest trigrams, and of a close length,
+  are scored;
+* nearest neighbours are found with a grid over the unit-sphere coordinates
+  of the locations, where straight-line distance ranks like great-circle distance.
+
+"""
+
+import math
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Edge of a grid cell in unit-sphere coordinates, about 127 km on the surface.
+CELL_SIZE = 0.02
+
+# Rings of grid cells searched around a point before falling back to a full scan.
+MAX_RINGS = 3
+
+# Most words and names scored by one trigram search, those closest in length first.
+MAX_CANDIDATES = 500
+
+
+def normalize(text):
+    """Lowercase and strip accents, so that accented names match their plain spelling."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower().strip()
+
+
+def trigrams(text):
+    padded = '  ' + text + ' '
+    return set(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _unit_vector(latitude, longitude):
+    latitude, longitude = math.radians(latitude), math.radians(longitude)
+    return (math.cos(latitude) * math.cos(longitude), math.cos(latitude) * math.sin(longitude),
+            math.sin(latitude))
+
+
+def _chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class LocationIndex(object):
+    """In-memory search index of :class:`~budgetyourtrip_api.models.Location` objects.
+
+    Args:
+        locations (iterable, optional): Locations to index.
+        api (object, optional):         Object that implements the API
+                                        (see :class:`~budgetyourtrip_api.api.Api`).
+                                        Searches without local results are sent to it,
+                                        and its results are added to the index.
+    """
+
+    def __init__(self, locations=(), api=None):
+        self._api = api
+        self._locations = {}
+        self._keys = []             # sorted (normalized word suffix, geonameid)
+        self._pending_keys = []
+        # Words and full names, each with its trigram count and locations, and the
+        # words and names having each trigram, by trigram count.
+        self._words = {}
+        self._word_sizes = []
+        self._word_texts = []
+        self._word_locations = []
+        self._trigrams = defaultdict(dict)
+        self._cells = defaultdict(list)
+        self._points = {}
+        self._coordinates = None    # (geonameids, unit vectors) for full scans
+        self.add(locations)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, api=None):
+        """Index every location of a :class:`~budgetyourtrip_api.snapshot.Snapshot`."""
+        from budgetyourtrip_api.models import Location
+        return cls([Location(item, api) for item in snapshot.search_locations('')], api)
+
+    def __len__(self):
+        return len(self._locations)
+
+    def add(self, locations):
+        """Add locations to the index, skipping geonameids already in it."""
+        for location in locations:
+            geonameid = str(location.id_)
+            if geonameid in self._locations:
+                continue
+            self._locations[geonameid] = location
+            for field in (location.name, location.country_name):
+                text = normalize(field)
+                if not text:
+                    continue
+                words = text.split()
+                for start in range(len(words)):
+                    self._pending_keys.append((' '.join(words[start:]), geonameid))
+                for word in set(words + [text]):
+                    self._word_locations[self._word(word)][geonameid] = None
+            try:
+                point = _unit_vector(float(location.latitude), float(location.longitude))
+            except (TypeError, ValueError):
+                continue
+            self._points[geonameid] = point
+            self._cells[self._cell(point)].append(geonameid)
+            self._coordinates = None
+
+    def _word(self, word):
+        """Get the position of a word or name, indexing its trigrams the first time."""
+        position = self._words.get(word)
+        if position is None:
+            position = self._words[word] = len(self._word_texts)
+            word_trigrams = trigrams(word)
+            self._word_texts.append(word)
+            self._word_sizes.append(len(word_trigrams))
+            self._word_locations.append({})
+            for trigram in word_trigrams:
+                self._trigrams[trigram].setdefault(len(word_trigrams), set()).add(position)
+        return position
+
+    def _sorted_keys(self):
+        if self._pending_keys:
+            self._keys.extend(self._pending_keys)
+            self._keys.sort()
+            self._pending_keys = []
+        return self._keys
+
+    def _prefix_matches(self, term):
+        keys = self._sorted_keys()
+        position = bisect_left(keys, (term,))
+        while position < len(keys) and keys[position][0].startswith(term):
+            yield keys[position][1]
+            position += 1
+
+    def _trigram_matches(self, term, threshold):
+        """Yield the locations with a word or name similar to the term, most similar first.
+
+        Similarity is the Dice coefficient of the trigram sets, ``2 * shared / (m + n)``.
+        """
+        query = trigrams(term)
+        size = len(query)
+        threshold = min(max(threshold, 1e-6), 1.0)
+        # A similarity of ``threshold`` needs this many shared trigrams, so at least one
+        # of the ``size - needed + 1`` rarest ones, and a word of a close trigram count.
+        needed = max(1, int(math.ceil(threshold * size / (2 - threshold) - 1e-9)))
+        postings = [self._trigrams.get(trigram, {}) for trigram in query]
+        postings.sort(key=lambda posting: sum(len(words) for words in posting.values()))
+        low, high = threshold * size / (2 - threshold), size * (2 - threshold) / threshold
+        lengths = sorted(range(int(math.ceil(low)), int(high) + 1),
+                         key=lambda length: abs(length - size))
+        candidates, scanned = set(), []
+        for length in lengths:
+            for posting in postings[:size - needed + 1]:
+                candidates.update(posting.get(length, ()))
+            scanned.append(length)
+            if len(candidates) >= MAX_CANDIDATES:
+                break
+        shared = Counter()
+        for posting in postings:
+            for length in scanned:
+                words = posting.get(length)
+                if words:
+                    shared.update(words & candidates)
+        sizes = self._word_sizes
+        scored = [(2.0 * count / (size + sizes[word]), word) for word, count in shared.items()
+                  if count >= needed]
+        scored = sorted((-score, self._word_texts[word], word) for score, word in scored
+                        if score >= threshold)
+        for _, _, word in scored:
+            for geonameid in self._word_locations[word]:
+                yield geonameid
+
+    def search(self, search_term, limit=10, threshold=0.5):
+        """Find locations whose name or country name matches the search term.
+
+        Word-prefix matches come first, then locations with a word or name whose
+        trigram similarity to the term is at least ``threshold``. Without any local
+        match, the search goes to the API, if there is one.
+
+        Returns:
+            list:           Up to ``limit`` Location objects.
+        """
+        term = normalize(search_term)
+        if not term:
+            return []
+        found = []
+        for geonameid in self._prefix_matches(term):
+            if geonameid not in found:
+                found.append(geonameid)
+                if len(found) >= limit:
+                    break
+        if len(found) < limit:
+            for geonameid in self._trigram_matches(term, threshold):
+                if geonameid not in found:
+                    found.append(geonameid)
+                    if len(found) >= limit:
+                        break
+        if not found and self._api is not None:
+            remote = self._api.locations_search(search_term) or []
+            self.add(remote)
+            return list(remote)[:limit]
+        return [self._locations[geonameid] for geonameid in found]
+
+    @staticmethod
+    def _cell(point):
+        return tuple(int(math.floor(coordinate / CELL_SIZE)) for coordinate in point)
+
+    def _scan(self, point, k):
+        if self._coordinates is None:
+            ids = list(self._points)
+            self._coordinates = (ids, np.array([self._points[i] for i in ids]).reshape(-1, 3))
+        ids, vectors = self._coordinates
+        chords = np.sqrt(((vectors - point) ** 2).sum(axis=1))
+        nearest = np.argsort(chords)[:k] if k >= len(ids) else \
+            np.argpartition(chords, k)[:k]
+        return sorted((float(chords[i]), ids[i]) for i in nearest)
+
+    def nearest(self, latitude, longitude, k=1):
+        """Find the locations closest to a point.
+
+        Returns:
+            list:           Up to ``k`` ``(distance_km, Location)`` pairs, closest first.
+        """
+        if not self._points or k <= 0:
+            return []
+        point = _unit_vector(latitude, longitude)
+        center = self._cell(point)
+        best = []
+        for ring in range(MAX_RINGS + 1):
+            for dx in range(-ring, ring + 1):
+                for dy in range(-ring, ring + 1):
+                    for dz in range(-ring, ring + 1):
+                        if max(abs(dx), abs(dy), abs(dz)) != ring:
+                            continue
+                        cell = (center[0] + dx, center[1] + dy, center[2] + dz)
+                        for geonameid in self._cells.get(cell, ()):
+                            best.append((math.dist(point, self._points[geonameid]), geonameid))
+            best.sort()
+            del best[k:]
+            # Anything outside the rings searched so far is at least ``ring`` cells away.
+            if len(best) == k and best[-1][0] <= ring * CELL_SIZE:
+                break
+        else:
+            best = self._scan(point, k)
+        return [(_chord_to_km(chord), self._locations[geonameid]) for chord, geonameid in best]
@@ -0,0 +1,207 @@
+"""Module containing a compact binary format for lists of model objects.
+
+:func:`to_bytes` packs a list of :mod:`~budgetyourtrip_api.models` objects
+column by column: the objects of each model class are stored together, and
+each field as one array of lengths followed by one UTF-8 blob. The link of the
+objects to their Api is dropped, and :func:`from_bytes` binds them to another
+one, so that the lists can be sent to other processes or stored in caches.
+The costs already loaded on countries and locations are packed along with them.
+
+"""
+
+import json
+import struct
+import sys
+from array import array
+from collections import deque
+from itertools import accumulate, repeat
+
+from budgetyourtrip_api import models
+from budgetyourtrip_api.models import ApiObject, CostedObject, _NOT_LOADED
+
+MAGIC = b'BYT\x01'
+
+# Model classes that can be packed; an object's class is stored as its position here.
+MODELS = (models.Category, models.Country, models.Cost, models.Currency, models.Location)
+
+# Kinds of column
+_STRINGS = 0    # every value is a str or None
+_JSON = 1       # anything else JSON can represent
+
+# State of the costs of a costed object
+_COSTS_NOT_LOADED, _COSTS_MISSING, _COSTS_LIST = 0, 1, 2
+
+_HEADER = struct.Struct('<4sI')
+_UINT32 = struct.Struct('<I')
+
+
+def _int_array(typecode, values=()):
+    values = array(typecode, values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _slice(data, offset, size):
+    end = offset + size
+    if end > len(data):
+        raise ValueError('Truncated packed model objects')
+    return data[offset:end], end
+
+
+def _read_array(typecode, data, offset, count):
+    values = _int_array(typecode)
+    end = offset + count * values.itemsize
+    if end > len(data):
+        raise ValueError('Truncated packed model objects')
+    values.frombytes(data[offset:end])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values, end
+
+
+def _pack_column(values, out):
+    if all(value is None or type(value) is str for value in values):
+        # None is stored as an empty string, and its position in a list of nulls.
+        nulls = [position for position, value in enumerate(values) if value is None]
+        if nulls:
+            values = ['' if value is None else value for value in values]
+        blob = ''.join(values).encode('utf-8')
+        out += bytes((_STRINGS,))
+        out += _UINT32.pack(len(nulls))
+        out += _int_array('I', nulls).tobytes()
+        out += _int_array('I', map(len, values)).tobytes()
+        out += _UINT32.pack(len(blob))
+        out += blob
+    else:
+        blob = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        out += bytes((_JSON,))
+        out += _UINT32.pack(len(blob))
+        out += blob
+
+
+def _unpack_column(data, offset, count):
+    kind = data[offset]
+    offset += 1
+    if kind == _JSON:
+        size, = _UINT32.unpack_from(data, offset)
+        blob, offset = _slice(data, offset + _UINT32.size, size)
+        return json.loads(blob), offset
+    null_count, = _UINT32.unpack_from(data, offset)
+    nulls, offset = _read_array('I', data, offset + _UINT32.size, null_count)
+    lengths, offset = _read_array('I', data, offset, count)
+    size, = _UINT32.unpack_from(data, offset)
+    blob, offset = _slice(data, offset + _UINT32.size, size)
+    text = blob.decode('utf-8')
+    ends = list(accumulate(lengths))
+    values = list(map(text.__getitem__, map(slice, [0] + ends[:-1], ends)))
+    for position in nulls:
+        values[position] = None
+    return values, offset
+
+
+def _pack_objects(model_class, objects, out):
+    for field in model_class.attrs:
+        _pack_column([getattr(item, field) for item in objects], out)
+    if issubclass(model_class, CostedObject):
+        states, counts, costs = [], [], []
+        for item in objects:
+            item_costs = item._costs
+            if item_costs is _NOT_LOADED:
+                states.append(_COSTS_NOT_LOADED)
+            elif isinstance(item_costs, list):
+                states.append(_COSTS_LIST)
+                counts.append(len(item_costs))
+                costs.extend(item_costs)
+            else:
+                states.append(_COSTS_MISSING)
+        out += bytes(states)
+        out += _int_array('I', counts).tobytes()
+        out += _UINT32.pack(len(costs))
+        _pack_objects(models.Cost, costs, out)
+
+
+def _unpack_objects(model_class, data, offset, count, api):
+    objects = list(map(model_class.__new__, repeat(model_class, count)))
+    # Fields are set through their slot descriptors, in loops that run in C.
+    for field in model_class.attrs:
+        values, offset = _unpack_column(data, offset, count)
+        deque(map(getattr(model_class, field).__set__, objects, values), 0)
+    deque(map(ApiObject._api.__set__, objects, repeat(api)), 0)
+    if issubclass(model_class, CostedObject):
+        states, offset = _slice(data, offset, count)
+        counts, offset = _read_array('I', data, offset, states.count(_COSTS_LIST))
+        total, = _UINT32.unpack_from(data, offset)
+        costs, offset = _unpack_objects(models.Cost, data, offset + _UINT32.size, total, None)
+        counts = iter(counts)
+        start = 0
+        for item, state in zip(objects, states):
+            item._cost_index = None
+            if state == _COSTS_LIST:
+                end = start + next(counts)
+                item._costs = costs[start:end]
+                start = end
+            elif state == _COSTS_MISSING:
+                item._costs = model_class._MISSING_COSTS
+            else:
+                item._costs = _NOT_LOADED
+    return objects, offset
+
+
+def to_bytes(objects):
+    """Pack model objects into bytes.
+
+    Args:
+        objects (iterable):     Objects of the classes in :data:`MODELS`, in any mix.
+
+    Returns:
+        bytes:                  The packed objects, without their link to an Api.
+
+    Raises:
+        TypeError:              If an object isn't of one of the classes in :data:`MODELS`.
+    """
+    objects = list(objects)
+    positions = dict((model_class, position) for position, model_class in enumerate(MODELS))
+    try:
+        classes = bytes(positions[type(item)] for item in objects)
+    except KeyError as error:
+        raise TypeError('Cannot pack {0} objects'.format(error.args[0].__name__))
+    out = bytearray(_HEADER.pack(MAGIC, len(objects)))
+    out += classes
+    for position, model_class in enumerate(MODELS):
+        group = [item for item, item_class in zip(objects, classes) if item_class == position]
+        if group:
+            _pack_objects(model_class, group, out)
+    return bytes(out)
+
+
+def from_bytes(data, api=None):
+    """Unpack model objects packed by :func:`to_bytes`.
+
+    Args:
+        data (bytes):           The packed objects.
+        api (object, optional): Object that implements the API
+                                (see :class:`~budgetyourtrip_api.api.Api`),
+                                bound to the objects for their lazy ``costs``.
+
+    Returns:
+        list:                   The objects, in the order they were packed.
+
+    Raises:
+        ValueError:             If ``data`` wasn't packed by :func:`to_bytes`, or is truncated.
+    """
+    data = bytes(data)
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError('Not packed model objects')
+    try:
+        _, count = _HEADER.unpack_from(data)
+        classes, offset = _slice(data, _HEADER.size, count)
+        groups = {}
+        for position, model_class in enumerate(MODELS):
+            group_count = classes.count(position)
+            if group_count:
+                objects, offset = _unpack_objects(model_class, data, offset, group_count, api)
+                groups[position] = iter(objects)
+        return [next(groups[position]) for position in classes]
+    except (struct.error, IndexError):
+        raise ValueError('Truncated packed model objects')
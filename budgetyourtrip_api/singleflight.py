@@ -0,0 +1,58 @@
+"""Module containing request coalescing for the API.
+
+When several threads ask for the same key at once, :class:`SingleFlight` runs
+the work once and hands its result to all of them.
+
+"""
+
+import threading
+
+
+class _Call(object):
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Deduplicate concurrent calls for the same key.
+
+    Attributes:
+        shared (int):   Calls answered with the result of another call in flight.
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args):
+        """Call ``func(*args)``, unless a call for ``key`` is already in flight.
+
+        In that case, wait for it and return its result, or raise its exception.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func(*args)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
@@ -0,0 +1,527 @@
+"""Module containing offline snapshots of the API data.
+
+A :class:`Snapshot` is an indexed sqlite file that stores the raw ``data`` of
+every crawled endpoint path. :func:`crawl` fills one through
+:class:`~budgetyourtrip_api.api.Api`, and :class:`OfflineApi` serves the same
+methods as ``Api`` from it, without any network I/O. :func:`refresh` keeps it
+up to date by requesting only the paths that are due and rewriting only the
+ones that changed.
+
+Create one from the command line with::
+
+    python -m budgetyourtrip_api.snapshot snapshot.sqlite --countries US FR --geonameids 4167147
+    python -m budgetyourtrip_api.snapshot snapshot.sqlite --refresh
+
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from budgetyourtrip_api import models, config
+from budgetyourtrip_api.api import Api, NOT_MODIFIED
+from budgetyourtrip_api.cache import MISSING, DEFAULT_TTLS, endpoint_ttl
+from budgetyourtrip_api.rates import RateMatrix
+from budgetyourtrip_api.table import CostTable, NO_GEONAMEID, _float
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS records (path TEXT PRIMARY KEY, data TEXT);
+CREATE TABLE IF NOT EXISTS countries (country_code TEXT PRIMARY KEY, name TEXT, data TEXT);
+CREATE TABLE IF NOT EXISTS locations (geonameid INTEGER PRIMARY KEY, name TEXT,
+                                      country_code TEXT, data TEXT);
+CREATE TABLE IF NOT EXISTS costs (country_code TEXT, geonameid INTEGER, category_id INTEGER,
+                                  budget REAL, midrange REAL, luxury REAL,
+                                  PRIMARY KEY (country_code, geonameid, category_id));
+CREATE TABLE IF NOT EXISTS rates (currency_code TEXT PRIMARY KEY, rate REAL);
+CREATE TABLE IF NOT EXISTS meta (path TEXT PRIMARY KEY, hash TEXT, etag TEXT,
+                                 last_modified TEXT, fetched REAL);
+CREATE INDEX IF NOT EXISTS countries_name ON countries (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS locations_name ON locations (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS locations_country ON locations (country_code);
+CREATE INDEX IF NOT EXISTS costs_geonameid ON costs (geonameid);
+'''
+
+# Bytes of the file memory-mapped by each connection, so that processes
+# reading the same snapshot share its pages through the OS page cache.
+MMAP_SIZE = 1 << 30
+
+# Currency all stored exchange rates are relative to.
+PIVOT_CURRENCY = 'usd'
+
+
+def content_hash(data):
+    """Hash the data of an endpoint path, independently of key order."""
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class Snapshot(object):
+    """Indexed sqlite store of API data.
+
+    Args:
+        path (str):                 Path of the snapshot file.
+        readonly (bool, optional):  Open the file read-only, as web workers should.
+    """
+
+    def __init__(self, path, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self._local = threading.local()
+        if not readonly:
+            self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            if self.readonly:
+                connection = sqlite3.connect('file:{0}?mode=ro'.format(self.path), uri=True,
+                                             check_same_thread=False)
+            else:
+                connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+                connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA mmap_size={0}'.format(MMAP_SIZE))
+            self._local.connection = connection
+        return connection
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def get(self, path):
+        """Get the stored data of an endpoint path, or ``MISSING`` if it was never crawled."""
+        row = self._connect().execute('SELECT data FROM records WHERE path = ?',
+                                      (path,)).fetchone()
+        return MISSING if row is None else json.loads(row[0])
+
+    def paths(self, prefix=''):
+        """List the stored endpoint paths starting with ``prefix``."""
+        rows = self._connect().execute('SELECT path FROM records WHERE path >= ? AND path < ?',
+                                       (prefix, prefix + '\uffff'))
+        return [row[0] for row in rows]
+
+    def put(self, path, data, etag=None, last_modified=None):
+        """Store the data of an endpoint path and index the entities in it.
+
+        Without data, as when the path now answers 404, the costs indexed from
+        the path are removed.
+
+        Args:
+            path (str):                     Endpoint path the data was fetched from.
+            data (json):                    The ``data`` of the response.
+            etag (str, optional):           ``ETag`` header of the response.
+            last_modified (str, optional):  ``Last-Modified`` header of the response.
+        """
+        with self._connect() as connection:
+            connection.execute('INSERT OR REPLACE INTO records VALUES (?, ?)',
+                               (path, json.dumps(data)))
+            connection.execute('INSERT OR REPLACE INTO meta VALUES (?, ?, ?, ?, ?)',
+                               (path, content_hash(data), etag, last_modified, time.time()))
+            if data:
+                self._index(connection, path, data)
+            else:
+                self._unindex_costs(connection, path)
+
+    def touch(self, path, etag=None, last_modified=None):
+        """Record that an endpoint path was checked and found unchanged."""
+        with self._connect() as connection:
+            connection.execute('UPDATE meta SET fetched = ?, etag = coalesce(?, etag), '
+                               'last_modified = coalesce(?, last_modified) WHERE path = ?',
+                               (time.time(), etag, last_modified, path))
+
+    def meta(self, path):
+        """Get ``(hash, etag, last_modified, fetched)`` of an endpoint path, or None."""
+        return self._connect().execute('SELECT hash, etag, last_modified, fetched FROM meta '
+                                       'WHERE path = ?', (path,)).fetchone()
+
+    def due_paths(self, ttls=None, now=None):
+        """List the stored endpoint paths whose data is older than their endpoint's TTL.
+
+        Args:
+            ttls (dict, optional):  Seconds each endpoint stays fresh, keyed by path prefix
+                                    (defaults to :data:`~budgetyourtrip_api.cache.DEFAULT_TTLS`).
+            now (float, optional):  Time to compare against, defaults to the current time.
+        """
+        ttls = DEFAULT_TTLS if ttls is None else ttls
+        now = time.time() if now is None else now
+        rows = self._connect().execute('SELECT records.path, meta.fetched FROM records '
+                                       'LEFT JOIN meta ON meta.path = records.path')
+        return [path for path, fetched in rows
+                if fetched is None or fetched + endpoint_ttl(path, ttls) <= now]
+
+    def delete(self, path):
+        """Forget the data of an endpoint path."""
+        with self._connect() as connection:
+            connection.execute('DELETE FROM records WHERE path = ?', (path,))
+            connection.execute('DELETE FROM meta WHERE path = ?', (path,))
+
+    def _index(self, connection, path, data):
+        head, _, key = path.rpartition('/')
+        if head == 'costs/countryinfo':
+            self._index_countries(connection, [data['info']])
+            self._index_costs(connection, key, NO_GEONAMEID, data['costs'])
+        elif head == 'costs/locationinfo':
+            self._index_locations(connection, [data['info']])
+            self._index_costs(connection, data['info'].get('country_code'), int(key),
+                              data['costs'])
+        elif head == 'costs/country':
+            self._index_costs(connection, key, NO_GEONAMEID, data)
+        elif head == 'costs/location':
+            country_code = data[0].get('country_code') if data else None
+            self._index_costs(connection, country_code, int(key), data)
+        elif head == 'search/country':
+            self._index_countries(connection, data)
+        elif head == 'search/location':
+            self._index_locations(connection, data)
+
+    @staticmethod
+    def _unindex_costs(connection, path):
+        head, _, key = path.rpartition('/')
+        if head in ('costs/countryinfo', 'costs/country'):
+            connection.execute('DELETE FROM costs WHERE country_code = ? AND geonameid = ?',
+                               (key, NO_GEONAMEID))
+        elif head in ('costs/locationinfo', 'costs/location'):
+            connection.execute('DELETE FROM costs WHERE geonameid = ?', (int(key),))
+
+    @staticmethod
+    def _index_countries(connection, countries):
+        connection.executemany('INSERT OR REPLACE INTO countries VALUES (?, ?, ?)',
+                               [(item['country_code'], item.get('name'), json.dumps(item))
+                                for item in countries])
+
+    @staticmethod
+    def _index_locations(connection, locations):
+        connection.executemany('INSERT OR REPLACE INTO locations VALUES (?, ?, ?, ?)',
+                               [(int(item['geonameid']), item.get('name'),
+                                 item.get('country_code'), json.dumps(item))
+                                for item in locations])
+
+    @staticmethod
+    def _index_costs(connection, country_code, geonameid, costs):
+        connection.execute('DELETE FROM costs WHERE country_code IS ? AND geonameid = ?',
+                           (country_code, geonameid))
+        connection.executemany('INSERT OR REPLACE INTO costs VALUES (?, ?, ?, ?, ?, ?)',
+                               [(country_code, geonameid, int(item['category_id']),
+                                 _float(item.get('value_budget'), None),
+                                 _float(item.get('value_midrange'), None),
+                                 _float(item.get('value_luxury'), None))
+                                for item in costs])
+
+    def put_rates(self, rates):
+        """Store exchange rates, as units of each currency worth one unit of ``PIVOT_CURRENCY``."""
+        with self._connect() as connection:
+            connection.executemany('INSERT OR REPLACE INTO rates VALUES (?, ?)',
+                                   [(code.lower(), rate) for code, rate in rates.items()])
+
+    def rates(self):
+        """Get the stored exchange rates by currency code."""
+        return dict(self._connect().execute('SELECT currency_code, rate FROM rates'))
+
+    def search_countries(self, search_term):
+        """Get the stored data of the countries whose name contains ``search_term``."""
+        rows = self._connect().execute('SELECT data FROM countries WHERE name LIKE ? ORDER BY name',
+                                       ('%' + search_term + '%',))
+        return [json.loads(row[0]) for row in rows]
+
+    def search_locations(self, search_term):
+        """Get the stored data of the locations whose name contains ``search_term``."""
+        rows = self._connect().execute('SELECT data FROM locations WHERE name LIKE ? ORDER BY name',
+                                       ('%' + search_term + '%',))
+        return [json.loads(row[0]) for row in rows]
+
+    def cost_table(self, country_code=None, geonameid=None):
+        """Get the stored costs as a :class:`~budgetyourtrip_api.table.CostTable`.
+
+        Args:
+            country_code (str, optional):   Only the costs of this country.
+            geonameid (int, optional):      Only the costs of this location
+                                            (``NO_GEONAMEID`` for country-level costs).
+        """
+        query = 'SELECT category_id, budget, midrange, luxury, country_code, geonameid FROM costs'
+        clauses, args = [], []
+        if country_code is not None:
+            clauses.append('country_code = ?')
+            args.append(country_code)
+        if geonameid is not None:
+            clauses.append('geonameid = ?')
+            args.append(int(geonameid))
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        rows = self._connect().execute(query, args).fetchall()
+        if not rows:
+            return CostTable.from_json([])
+        columns = list(zip(*rows))
+        columns[4] = [code or '' for code in columns[4]]
+        columns[1:4] = [[float('nan') if value is None else value for value in column]
+                        for column in columns[1:4]]
+        return CostTable(*columns)
+
+
+def discover_country_codes(api):
+    """Find every country code by searching countries for each letter."""
+    codes = set()
+    for letter in string.ascii_lowercase:
+        for item in api.get('search/country/{0}'.format(letter)) or []:
+            codes.add(item['country_code'])
+    return sorted(codes)
+
+
+def crawl(api, path, country_codes=None, geonameids=(), rates=True,
+          max_workers=config.MAX_WORKERS):
+    """Crawl the API into a snapshot file.
+
+    Args:
+        api (object):                   Object that implements the API
+                                        (see :class:`~budgetyourtrip_api.api.Api`).
+        path (str):                     Path of the snapshot file, created if needed.
+        country_codes (list, optional): Countries to crawl, all of them if not given.
+        geonameids (list, optional):    Locations to crawl.
+        rates (bool, optional):         Also store an exchange rate for every currency.
+        max_workers (int, optional):    Maximum number of concurrent requests.
+
+    Returns:
+        Snapshot:                       The filled snapshot.
+    """
+    snapshot = Snapshot(path)
+    if country_codes is None:
+        country_codes = discover_country_codes(api)
+    paths = ['categories/', 'currencies/']
+    paths += ['costs/countryinfo/{0}'.format(code) for code in country_codes]
+    paths += ['costs/locationinfo/{0}'.format(geonameid) for geonameid in geonameids]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = dict((executor.submit(api.get, item), item) for item in dict.fromkeys(paths))
+        for future in as_completed(futures):
+            snapshot.put(futures[future], future.result())
+        if rates:
+            currencies = [item['currency_code'] for item in snapshot.get('currencies/') or []]
+            matrix = RateMatrix(api, pivot=PIVOT_CURRENCY)
+            futures = dict((executor.submit(matrix.pivot_rate, code), code) for code in currencies)
+            learned = {}
+            for future in as_completed(futures):
+                try:
+                    learned[futures[future]] = future.result()
+                except KeyError:
+                    pass
+            snapshot.put_rates(learned)
+    return snapshot
+
+
+def _cost_values(path, data):
+    """Get ``{category_id: (budget, midrange, luxury)}`` of the costs in the data of a path."""
+    if not data or not path.startswith('costs/'):
+        return {}
+    costs = data['costs'] if isinstance(data, dict) else data
+    return dict((int(item['category_id']),
+                 tuple(_float(item.get(key), None) for key in
+                       ('value_budget', 'value_midrange', 'value_luxury')))
+                for item in costs)
+
+
+class RefreshReport(object):
+    """Outcome of :func:`refresh`.
+
+    Attributes:
+        checked (list):     Endpoint paths that were due and requested again.
+        changed (list):     Endpoint paths whose data changed and was rewritten.
+        cost_changes (list):``(path, category_id, style, old, new)`` for every changed cost.
+        failed (list):      ``(path, error)`` for every path that couldn't be requested,
+                            left as it was.
+    """
+
+    def __init__(self):
+        self.checked = []
+        self.changed = []
+        self.cost_changes = []
+        self.failed = []
+
+    def __repr__(self):
+        return str({'checked': len(self.checked), 'changed': len(self.changed),
+                    'cost_changes': len(self.cost_changes), 'failed': len(self.failed)})
+
+
+def refresh(api, snapshot, paths=None, ttls=None, max_workers=config.MAX_WORKERS):
+    """Bring a snapshot up to date, rewriting only the data that changed.
+
+    Each due path is requested with the validators of its last response, so the
+    server can answer 304 Not Modified. Otherwise the new data is compared with
+    the stored one by content hash. A path whose request fails is reported and
+    kept as it was, and the other paths are still refreshed.
+
+    Args:
+        api (object):                   Object that implements the API
+                                        (see :class:`~budgetyourtrip_api.api.Api`).
+        snapshot (Snapshot):            The snapshot to refresh.
+        paths (list, optional):         Paths to refresh, defaults to the ones that are due.
+        ttls (dict, optional):          Seconds each endpoint stays fresh, keyed by path prefix.
+        max_workers (int, optional):    Maximum number of concurrent requests.
+
+    Returns:
+        RefreshReport:                  What was checked and what changed.
+    """
+    report = RefreshReport()
+    if paths is None:
+        paths = snapshot.due_paths(ttls)
+
+    def fetch(path):
+        meta = snapshot.meta(path)
+        etag, last_modified = (meta[1], meta[2]) if meta else (None, None)
+        return api.revalidate(path, etag, last_modified)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = dict((executor.submit(fetch, path), path) for path in paths)
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                data, etag, last_modified = future.result()
+            except Exception as error:
+                report.failed.append((path, error))
+                continue
+            report.checked.append(path)
+            meta = snapshot.meta(path)
+            if data is NOT_MODIFIED or (meta is not None and meta[0] == content_hash(data)):
+                snapshot.touch(path, etag, last_modified)
+                continue
+            old = _cost_values(path, snapshot.get(path))
+            new = _cost_values(path, data)
+            for category_id in sorted(set(old) | set(new)):
+                old_values = old.get(category_id, (None, None, None))
+                new_values = new.get(category_id, (None, None, None))
+                for style, old_value, new_value in zip(CostTable.columns[1:4], old_values,
+                                                       new_values):
+                    if old_value != new_value:
+                        report.cost_changes.append((path, category_id, style, old_value,
+                                                    new_value))
+            snapshot.put(path, data, etag, last_modified)
+            report.changed.append(path)
+    return report
+
+
+class OfflineApi(object):
+    """Serve the methods of :class:`~budgetyourtrip_api.api.Api` from a snapshot.
+
+    Args:
+        snapshot (Snapshot or str):     Snapshot, or path of a snapshot file to open read-only.
+    """
+
+    def __init__(self, snapshot):
+        if not isinstance(snapshot, Snapshot):
+            snapshot = Snapshot(snapshot, readonly=True)
+        self.snapshot = snapshot
+        self.__rates = None
+
+    def __data(self, path):
+        data = self.snapshot.get(path)
+        return None if data is MISSING else data
+
+    def __find(self, list_path, key, value, model_class):
+        for item in self.__data(list_path) or []:
+            if str(item.get(key)).lower() == str(value).lower():
+                return model_class(item, self)
+        return None
+
+    def get(self, path, params=None):
+        """Get the stored data of an API path, or None if it was not crawled."""
+        return self.__data(path)
+
+    def category(self, id):
+        """Get a category by id."""
+        return self.__find('categories/', 'category_id', id, models.Category)
+
+    def categories(self):
+        """Get a list of categories."""
+        data = self.__data('categories/')
+        return [models.Category(item, self) for item in data] if data else None
+
+    def currency(self, currency_code):
+        """Get a currency object by code."""
+        return self.__find('currencies/', 'currency_code', currency_code, models.Currency)
+
+    def currencies(self):
+        """Get a list of available currencies."""
+        data = self.__data('currencies/')
+        return [models.Currency(item, self) for item in data] if data else None
+
+    def location(self, geonameid):
+        """Get a location by geonameid."""
+        data = self.__data('costs/locationinfo/{0}'.format(geonameid))
+        return models.Location(data, self) if data else None
+
+    def locations_search(self, search_term):
+        """Get a list of stored locations whose name contains the search term."""
+        data = self.snapshot.search_locations(search_term)
+        return [models.Location(item, self) for item in data] if data else None
+
+    def country_info(self, country_code):
+        """Get a country object with cost info by country code."""
+        data = self.__data('costs/countryinfo/{0}'.format(country_code))
+        return models.Country(data, self) if data else None
+
+    def country_search(self, search_term):
+        """Get a list of stored countries whose name contains the search term."""
+        data = self.snapshot.search_countries(search_term)
+        return [models.Country(item, self) for item in data] if data else None
+
+    def country_costs(self, country_code):
+        """Get a list of the costs associated with a country."""
+        data = self.__data('costs/country/{0}'.format(country_code))
+        if data is None:
+            data = (self.__data('costs/countryinfo/{0}'.format(country_code)) or {}).get('costs')
+        return [models.Cost(item, self) for item in data] if data else None
+
+    def location_costs(self, geonameid):
+        """Get a list of costs associated with a location."""
+        data = self.__data('costs/location/{0}'.format(geonameid))
+        if data is None:
+            data = (self.__data('costs/locationinfo/{0}'.format(geonameid)) or {}).get('costs')
+        return [models.Cost(item, self) for item in data] if data else None
+
+    def convert_currency(self, amount, from_cur='usd', to_cur='eur'):
+        """Convert the given amount with the stored exchange rates.
+
+        Returns:
+            float:          The monetary value of the amount given, or None if a rate is unknown.
+        """
+        if self.__rates is None:
+            self.__rates = RateMatrix(pivot=PIVOT_CURRENCY, ttl=float('inf'))
+            self.__rates.load(self.snapshot.rates())
+        try:
+            return self.__rates.convert(amount, from_cur, to_cur)
+        except KeyError:
+            return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Crawl the budgetyourtrip API into a snapshot.')
+    parser.add_argument('path', help='snapshot file to create or update')
+    parser.add_argument('--key', default=config.API_KEY, help='api key to use')
+    parser.add_argument('--countries', nargs='*', help='country codes to crawl (default: all)')
+    parser.add_argument('--geonameids', nargs='*', default=[], help='locations to crawl')
+    parser.add_argument('--no-rates', action='store_true', help="don't store exchange rates")
+    parser.add_argument('--refresh', action='store_true',
+                        help='only request the paths of an existing snapshot that are due')
+    parser.add_argument('--workers', type=int, default=config.MAX_WORKERS,
+                        help='number of concurrent requests')
+    args = parser.parse_args(argv)
+    if args.refresh:
+        report = refresh(Api(args.key), Snapshot(args.path), max_workers=args.workers)
+        for change in report.cost_changes:
+            print('{0} category {1} {2}: {3} -> {4}'.format(*change))
+        for path, error in report.failed:
+            print('{0} failed: {1}'.format(path, error))
+        print('{0}: {1}'.format(args.path, report))
+        return
+    if os.path.dirname(args.path) and not os.path.isdir(os.path.dirname(args.path)):
+        os.makedirs(os.path.dirname(args.path))
+    snapshot = crawl(Api(args.key), args.path, args.countries, args.geonameids,
+                     rates=not args.no_rates, max_workers=args.workers)
+    print('{0}: {1} paths'.format(args.path, len(snapshot.paths())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Module containing the streaming parser for list endpoints.
+
+:func:`iter_json_array` yields the items of the ``data`` array of a response
+while its body is still arriving, so that only one item at a time needs to be
+decoded and held in memory. :class:`LazySequence` wraps the resulting
+generator for callers that need ``len()`` or indexing.
+
+"""
+
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class _Buffer(object):
+    """Text read so far from a stream of byte chunks."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+
+    def more(self):
+        """Read another chunk, dropping the text already consumed. Return False at the end."""
+        for chunk in self._chunks:
+            if chunk:
+                self.text = self.text[self.pos:] + self._utf8.decode(chunk)
+                self.pos = 0
+                return True
+        return False
+
+    def peek(self):
+        """Skip whitespace and return the next character, or '' at the end of the stream."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.more():
+                return ''
+
+    def expect(self, chars):
+        char = self.peek()
+        if char == '' or char not in chars:
+            raise ValueError('Expected one of {0!r} at offset {1}'.format(chars, self.pos))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value, reading more chunks until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except ValueError:
+                if not self.more():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk.
+            if end == len(self.text) and not isinstance(value, (dict, list, str)) and self.more():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(chunks, key='data'):
+    """Yield the items of the array under ``key`` of a JSON object, as it is read.
+
+    Args:
+        chunks (iterable):      The body of the response, as byte chunks.
+        key (str, optional):    Top-level key of the array.
+
+    Raises:
+        ValueError: if the body is not valid JSON.
+        KeyError: if the object has no such key.
+    """
+    buffer = _Buffer(chunks)
+    buffer.expect('{')
+    if buffer.peek() == '}':
+        raise KeyError(key)
+    while True:
+        name = buffer.value()
+        buffer.expect(':')
+        if name == key:
+            break
+        buffer.value()
+        if buffer.expect(',}') == '}':
+            raise KeyError(key)
+    if buffer.peek() != '[':
+        # Not a list: yield the value itself (or nothing for null)
+        value = buffer.value()
+        if value is not None:
+            yield value
+        return
+    buffer.expect('[')
+    if buffer.peek() == ']':
+        return
+    while True:
+        yield buffer.value()
+        if buffer.expect(',]') == ']':
+            return
+
+
+class LazySequence(object):
+    """Sequence over an iterator, pulling items only as far as they are needed.
+
+    Iterating yields items as they arrive. ``len()`` and negative indexes read
+    the whole iterator first.
+    """
+
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+        self._items = []
+
+    def _fill(self, count=None):
+        while count is None or len(self._items) < count:
+            try:
+                self._items.append(next(self._iterator))
+            except StopIteration:
+                self._iterator = iter(())
+                return
+
+    def __iter__(self):
+        index = 0
+        while True:
+            if index >= len(self._items):
+                self._fill(index + 1)
+                if index >= len(self._items):
+                    return
+            yield self._items[index]
+            index += 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if (index.start or 0) < 0 or index.stop is None or index.stop < 0:
+                self._fill()
+            else:
+                self._fill(index.stop)
+            return self._items[index]
+        if index < 0:
+            self._fill()
+        else:
+            self._fill(index + 1)
+        return self._items[index]
+
+    def __len__(self):
+        self._fill()
+        return len(self._items)
+
+    def __bool__(self):
+        self._fill(1)
+        return bool(self._items)
+
+    def __repr__(self):
+        return 'LazySequence({0!r}, ...)'.format(self._items)
@@ -0,0 +1,145 @@
+"""Module containing a columnar representation of costs.
+
+A :class:`CostTable` holds many cost records as NumPy arrays, one per field,
+instead of one :class:`~budgetyourtrip_api.models.Cost` object per record.
+
+"""
+
+import numpy as np
+
+STYLES = ('budget', 'midrange', 'luxury')
+
+# Stored in ``geonameid`` for country-level costs, which have none.
+NO_GEONAMEID = -1
+
+
+def _float(value, missing=np.nan):
+    return missing if value is None else float(value)
+
+
+class CostTable(object):
+    """Cost records stored as typed arrays.
+
+    Attributes:
+        category_id (numpy.ndarray):    Category of each cost, int16.
+        budget (numpy.ndarray):         Cost for budget travel, float64.
+        midrange (numpy.ndarray):       Cost for midrange travel, float64.
+        luxury (numpy.ndarray):         Cost for luxury travel, float64.
+        country_code (numpy.ndarray):   Country code of each cost, unicode.
+        geonameid (numpy.ndarray):      Geoname ID of each cost, int64
+                                        (``NO_GEONAMEID`` for country costs).
+    """
+
+    columns = ('category_id',) + STYLES + ('country_code', 'geonameid')
+
+    def __init__(self, category_id, budget, midrange, luxury, country_code, geonameid):
+        self.category_id = np.asarray(category_id, dtype=np.int16)
+        self.budget = np.asarray(budget, dtype=np.float64)
+        self.midrange = np.asarray(midrange, dtype=np.float64)
+        self.luxury = np.asarray(luxury, dtype=np.float64)
+        self.country_code = np.asarray(country_code, dtype=str)
+        self.geonameid = np.asarray(geonameid, dtype=np.int64)
+
+    @classmethod
+    def from_json(cls, data):
+        """Build a table straight from the ``data`` list of a costs response.
+
+        Args:
+            data (list):    JSON representations of cost resources.
+        """
+        data = data or []
+        count = len(data)
+        return cls(
+            np.fromiter((int(item['category_id']) for item in data), np.int16, count),
+            np.fromiter((_float(item.get('value_budget')) for item in data), np.float64, count),
+            np.fromiter((_float(item.get('value_midrange')) for item in data), np.float64, count),
+            np.fromiter((_float(item.get('value_luxury')) for item in data), np.float64, count),
+            [item.get('country_code') or '' for item in data],
+            np.fromiter((int(item.get('geonameid') or NO_GEONAMEID) for item in data),
+                        np.int64, count))
+
+    @classmethod
+    def from_costs(cls, costs):
+        """Build a table from :class:`~budgetyourtrip_api.models.Cost` objects."""
+        costs = costs or []
+        return cls([int(cost.id_) for cost in costs],
+                   [_float(cost.budget) for cost in costs],
+                   [_float(cost.midrange) for cost in costs],
+                   [_float(cost.luxury) for cost in costs],
+                   [cost.country_id or '' for cost in costs],
+                   [int(cost.geoname_id or NO_GEONAMEID) for cost in costs])
+
+    @classmethod
+    def concat(cls, tables):
+        """Join several tables into one."""
+        tables = list(tables)
+        if not tables:
+            return cls.from_json([])
+        return cls(*[np.concatenate([getattr(table, column) for table in tables])
+                     for column in cls.columns])
+
+    def __len__(self):
+        return len(self.category_id)
+
+    def __getitem__(self, selection):
+        """Select rows with a boolean mask, an index array or a slice."""
+        return CostTable(*[getattr(self, column)[selection] for column in self.columns])
+
+    def filter(self, category_id=None, country_code=None, geonameid=None):
+        """Select the rows matching every given value.
+
+        Each argument may be a single value or a list of accepted values.
+
+        Returns:
+            CostTable:      The matching rows.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for column, wanted in (('category_id', category_id), ('country_code', country_code),
+                               ('geonameid', geonameid)):
+            if wanted is not None:
+                mask &= np.isin(getattr(self, column), np.atleast_1d(wanted))
+        return self[mask]
+
+    def total(self, style='midrange'):
+        """Sum the costs of one travel style, ignoring missing values."""
+        return float(np.nansum(getattr(self, style)))
+
+    def totals(self):
+        """Sum the costs of every travel style.
+
+        Returns:
+            dict:           Total per style.
+        """
+        return dict((style, self.total(style)) for style in STYLES)
+
+    def by_category(self, style='midrange'):
+        """Sum the costs of one travel style per category.
+
+        Returns:
+            dict:           Total per category id, for the categories present.
+        """
+        values = np.nan_to_num(getattr(self, style))
+        sums = np.bincount(self.category_id, weights=values)
+        present = np.unique(self.category_id)
+        return dict((int(category), float(sums[category])) for category in present)
+
+    def to_pandas(self):
+        """Convert to a ``pandas.DataFrame``, sharing the numeric arrays where possible."""
+        import pandas as pd
+        return pd.DataFrame(dict((column, getattr(self, column)) for column in self.columns),
+                            copy=False)
+
+    @classmethod
+    def from_pandas(cls, frame):
+        """Build a table from a ``pandas.DataFrame`` with the columns of :attr:`columns`."""
+        return cls(*[frame[column].to_numpy() for column in cls.columns])
+
+    def to_arrow(self):
+        """Convert to a ``pyarrow.Table``, sharing the numeric arrays where possible."""
+        import pyarrow as pa
+        return pa.table(dict((column, getattr(self, column)) for column in self.columns))
+
+    @classmethod
+    def from_arrow(cls, table):
+        """Build a table from a ``pyarrow.Table`` with the columns of :attr:`columns`."""
+        return cls(*[table.column(column).to_numpy() for column in cls.columns])
@@ -0,0 +1,134 @@
+"""Module containing the HTTP transports of the API.
+
+:func:`configure_session` sizes the connection pools of a ``requests`` session,
+so that a client shared by a worker pool reuses one keep-alive connection per
+thread. Threads beyond the pool size open extra connections that are discarded
+after use, unless the pool is made to block.
+:class:`HTTP2Session` sends the requests over HTTP/2 with ``httpx``.
+
+Both are safe to share between threads: ``urllib3`` pools and ``httpx``
+clients hand every request in flight its own connection.
+
+"""
+
+import cache_requests
+import requests
+from requests.adapters import HTTPAdapter
+
+from budgetyourtrip_api import config
+
+
+def configure_session(session, pool_size=config.POOL_SIZE,
+                      max_connections=config.MAX_CONNECTIONS, keep_alive=True, block=False):
+    """Mount connection pools of the given size on a ``requests`` session.
+
+    Args:
+        session (Session):              The session to configure.
+        pool_size (int, optional):      Number of hosts to keep a connection pool for.
+        max_connections (int, optional):Connections kept alive per host.
+        keep_alive (bool, optional):    Reuse connections between requests.
+        block (bool, optional):         Make requests beyond ``max_connections`` wait for a
+                                        free connection, instead of opening one discarded
+                                        after use. ``requests`` has no pool timeout, so a
+                                        response left open then blocks the others forever.
+
+    Returns:
+        Session:                        The same session.
+    """
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=max_connections,
+                          pool_block=block)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def uncached_session(session):
+    """Get a session sending requests like ``session``, but never answering from a cache.
+
+    A ``cache_requests`` session memoizes every GET, so requests that must reach the
+    server go through a plain ``requests`` session sharing its headers and connection
+    pools. Any other session is returned as is.
+
+    Args:
+        session (Session):              The session of an Api.
+
+    Returns:
+        Session:                        A session without response cache.
+    """
+    if not isinstance(session, cache_requests.Session):
+        return session
+    uncached = requests.Session()
+    uncached.headers = session.headers
+    uncached.adapters = session.adapters
+    return uncached
+
+
+class _HTTP2Response(object):
+    """The parts of a ``requests.Response`` the API uses, over an ``httpx.Response``."""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+
+    @property
+    def content(self):
+        return self._response.read()
+
+    def json(self):
+        return self._response.json()
+
+    def iter_content(self, chunk_size):
+        return self._response.iter_bytes(chunk_size)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError('{0} Error for url: {1}'.format(self.status_code, self.url),
+                                     response=self)
+
+    def close(self):
+        self._response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class HTTP2Session(object):
+    """Session sending requests over HTTP/2, for use as the ``session`` of an Api.
+
+    Requires the ``httpx`` package with its ``http2`` extra. Connection errors
+    and timeouts are raised as their ``requests`` equivalents, so that the
+    retry policy of the Api applies.
+
+    Args:
+        max_connections (int, optional):    Connections kept alive.
+        keep_alive (bool, optional):        Reuse connections between requests.
+    """
+
+    def __init__(self, max_connections=config.MAX_CONNECTIONS, keep_alive=True):
+        import httpx
+        self._httpx = httpx
+        limits = httpx.Limits(max_connections=max_connections,
+                              max_keepalive_connections=max_connections if keep_alive else 0)
+        self._client = httpx.Client(http2=True, limits=limits)
+        self.headers = self._client.headers
+
+    def get(self, url, params=None, headers=None, stream=False, timeout=None):
+        request = self._client.build_request('GET', url, params=params, headers=headers,
+                                             timeout=timeout)
+        try:
+            response = self._client.send(request, stream=stream)
+        except self._httpx.TimeoutException as error:
+            raise requests.Timeout(error)
+        except self._httpx.TransportError as error:
+            raise requests.ConnectionError(error)
+        return _HTTP2Response(response)
+
+    def close(self):
+        self._client.close()
@@ -0,0 +1,22 @@
+from setuptools import setup, find_packages
+
+setup(
+    name='budgetyourtrip_api',
+    description='A Python 3 compatible api for the budgetyourtrip API',
+    packages=find_packages(exclude=['tests', 'benchmarks']),
+    python_requires='>=3.7',
+    install_requires=[
+        'requests',
+        'cache_requests',
+        'aiohttp',
+        'numpy',
+    ],
+    extras_require={
+        'fast': ['orjson'],
+        'http2': ['httpx[http2]'],
+        'pandas': ['pandas'],
+        'arrow': ['pyarrow'],
+        'opentelemetry': ['opentelemetry-api'],
+        'test': ['httmock', 'pytest'],
+    },
+)
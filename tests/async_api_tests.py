@@ -0,0 +1,136 @@
+import asyncio
+import unittest
+import context
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from budgetyourtrip_api import models
+from budgetyourtrip_api.async_api import AsyncApi
+from budgetyourtrip_api.ratelimit import RetryPolicy
+
+COUNTRY = {'country_code': 'FR', 'name': 'France', 'currency_code': 'EUR'}
+LOCATION = {'geonameid': '2988507', 'name': 'Paris', 'country_code': 'FR'}
+COST = {'category_id': '1', 'value_budget': '30', 'value_midrange': '80',
+        'value_luxury': '200', 'country_code': 'FR', 'geonameid': '2988507'}
+
+class Server(object):
+    def __init__(self):
+        self.paths = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # Statuses answered to the first requests of a path, None to drop the connection.
+        self.failures = {}
+
+    async def handle(self, request):
+        path = request.match_info['path']
+        self.paths.append(path)
+        failures = self.failures.get(path)
+        if failures:
+            status = failures.pop(0)
+            if status is None:
+                request.transport.close()
+                return web.Response()
+            return web.json_response({'status': False}, status=status,
+                                     headers={'Retry-After': '0'})
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.02)
+        finally:
+            self.in_flight -= 1
+        if path == 'costs/countryinfo/FR':
+            return web.json_response({'status': True, 'data': {'info': COUNTRY, 'costs': [COST]}})
+        if path.startswith('costs/locationinfo/'):
+            return web.json_response({'status': True,
+                                      'data': dict(LOCATION, geonameid=path.rsplit('/', 1)[1])})
+        if path == 'costs/location/2988507':
+            return web.json_response({'status': True, 'data': [COST]})
+        return web.json_response({'status': False}, status=404)
+
+class TestAsyncApi(unittest.TestCase):
+    def setUp(self):
+        self.server = Server()
+
+    def run_with_api(self, calls, **kwargs):
+        kwargs.setdefault('retry', RetryPolicy(backoff=0))
+        async def run():
+            app = web.Application()
+            app.router.add_get('/api/v3/{path:.*}', self.server.handle)
+            async with TestServer(app) as server:
+                api = AsyncApi('key', end_point=str(server.make_url('/api/v3/')), **kwargs)
+                async with api:
+                    result = await calls(api)
+                return api, result
+        return asyncio.run(run())
+
+    def test_country_and_location(self):
+        async def calls(api):
+            return (await api.country_info('FR'), await api.location(2988507),
+                    await api.location_costs(2988507))
+        _, (country, location, costs) = self.run_with_api(calls)
+        self.assertEqual(country.name, 'France')
+        self.assertEqual(country.accommodation_cost('budget'), 30.0)
+        self.assertEqual(location.name, 'Paris')
+        self.assertEqual(costs, [models.Cost(COST)])
+        # Models aren't bound to the async api, so lazy costs can't be fetched.
+        with self.assertRaises(NotImplementedError):
+            location.costs
+
+    def test_not_found(self):
+        async def calls(api):
+            return await api.country_info('XX'), await api.categories()
+        _, (country, categories) = self.run_with_api(calls)
+        self.assertIsNone(country)
+        self.assertIsNone(categories)
+
+    def test_concurrency_cap(self):
+        async def calls(api):
+            return await asyncio.gather(*(api.location(i) for i in range(10)))
+        _, locations = self.run_with_api(calls, concurrency=3)
+        self.assertEqual([location.id_ for location in locations], [str(i) for i in range(10)])
+        self.assertEqual(len(self.server.paths), 10)
+        self.assertEqual(self.server.max_in_flight, 3)
+
+    def test_retries_throttled_and_unavailable(self):
+        path = 'costs/location/2988507'
+        self.server.failures[path] = [429, 503]
+        _, costs = self.run_with_api(lambda api: api.location_costs(2988507))
+        self.assertEqual(costs, [models.Cost(COST)])
+        self.assertEqual(self.server.paths, [path] * 3)
+
+    def test_retries_connection_errors(self):
+        # aiohttp itself resends a request once on a dropped connection.
+        path = 'costs/location/2988507'
+        self.server.failures[path] = [None] * 3
+        _, costs = self.run_with_api(lambda api: api.location_costs(2988507))
+        self.assertEqual(costs, [models.Cost(COST)])
+        self.assertEqual(self.server.failures[path], [])
+
+    def test_gives_up(self):
+        path = 'costs/location/2988507'
+        self.server.failures[path] = [503] * 3
+        with self.assertRaises(aiohttp.ClientResponseError):
+            self.run_with_api(lambda api: api.location_costs(2988507),
+                              retry=RetryPolicy(max_retries=2, backoff=0))
+        self.assertEqual(len(self.server.paths), 3)
+
+    def test_gives_up_on_connection_errors(self):
+        async def run(retry):
+            # Nothing listens on port 1.
+            async with AsyncApi('key', end_point='http://127.0.0.1:1/api/v3/',
+                                retry=retry) as api:
+                return await api.location_costs(2988507)
+        for retry in (None, RetryPolicy(max_retries=2, backoff=0)):
+            with self.assertRaises(aiohttp.ClientConnectionError):
+                asyncio.run(run(retry))
+
+    def test_close(self):
+        async def calls(api):
+            await api.location(1)
+            return api._AsyncApi__session
+        api, session = self.run_with_api(calls)
+        self.assertTrue(session.closed)
+        self.assertIsNone(api._AsyncApi__session)
+
+if __name__ == '__main__':
+    unittest.main()
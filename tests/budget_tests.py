@@ -0,0 +1,64 @@
+import unittest
+import context
+import numpy as np
+from budgetyourtrip_api import models
+from budgetyourtrip_api.budget import BudgetEngine
+from budgetyourtrip_api.rates import RateMatrix
+
+def cost(category_id, budget, midrange, luxury):
+    return models.Cost({'category_id': str(category_id), 'value_budget': str(budget),
+                        'value_midrange': str(midrange), 'value_luxury': str(luxury)})
+
+COSTS = {
+    '1': [cost(1, 10, 20, 40), cost(4, 5, 10, 20), cost(6, 1, 2, 4), cost(2, 100, 100, 100)],
+    '2': [cost(1, 20, 30, 60), cost(4, 5, 5, 5), cost(6, 0, 0, 0)],
+    '3': [cost(1, 20, 30, 60)],
+}
+
+class FakeApi(object):
+    def __init__(self):
+        self.batches = []
+
+    def location_costs_many(self, geonameids):
+        self.batches.append(list(geonameids))
+        return [COSTS.get(geonameid) for geonameid in geonameids]
+
+class TestBudgetEngine(unittest.TestCase):
+    def setUp(self):
+        self.api = FakeApi()
+        rates = RateMatrix()
+        rates.load({'eur': 0.5})
+        self.engine = BudgetEngine(self.api, rates=rates)
+
+    def test_quote(self):
+        table = self.engine.quote([[(1, 2), (2, 1)], [(2, 3)]])
+        np.testing.assert_allclose(table.total, [[57, 99, 193], [75, 105, 195]])
+        np.testing.assert_allclose(table.nights, [3, 3])
+        self.assertEqual(table.quote(1, 'budget'), 75)
+        self.assertAlmostEqual(table.daily[0, 0], 19)
+
+    def test_costs_fetched_once_in_one_batch(self):
+        self.engine.quote([[(1, 1), (2, 1)], [(1, 4)]])
+        self.engine.quote([[(2, 1)]])
+        self.assertEqual(self.api.batches, [['1', '2']])
+
+    def test_currency_and_styles(self):
+        table = self.engine.quote([[(1, 1)]], styles=('luxury',), currency='eur')
+        np.testing.assert_allclose(table.total, [[32]])
+
+    def test_incomplete_itinerary(self):
+        table = self.engine.quote([[(1, 1), (3, 1)], [(4, 1)], [(1, 1)]])
+        self.assertEqual(table.complete.tolist(), [False, False, True])
+        self.assertTrue(np.isnan(table.total[0]).all())
+
+    def test_empty(self):
+        table = self.engine.quote([])
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.total.shape, (0, 3))
+        table = self.engine.quote([[]])
+        np.testing.assert_allclose(table.total, [[0, 0, 0]])
+        self.assertEqual(table.complete.tolist(), [True])
+        self.assertEqual(self.api.batches, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import json
+import threading
+import unittest
+import context
+from httmock import HTTMock, urlmatch
+from budgetyourtrip_api.api import Api
+
+calls = []
+calls_lock = threading.Lock()
+
+@urlmatch(path=r'.*/costs/locationinfo/.*')
+def location_mock(url, request):
+    geonameid = url.path.rstrip('/').split('/')[-1]
+    with calls_lock:
+        calls.append(geonameid)
+    if geonameid == '0':
+        return {'status_code': 404, 'content': ''}
+    return {'status_code': 200,
+            'content': json.dumps({'data': {'geonameid': geonameid, 'name': 'Place ' + geonameid}})}
+
+@urlmatch(path=r'.*/search/location/.*')
+def search_mock(url, request):
+    return {'status_code': 200,
+            'content': json.dumps({'data': [{'geonameid': '1'}, {'geonameid': '2'}]})}
+
+@urlmatch(path=r'.*/costs/location/.*')
+def costs_mock(url, request):
+    geonameid = url.path.rstrip('/').split('/')[-1]
+    with calls_lock:
+        calls.append(geonameid)
+    if geonameid == '2':
+        return {'status_code': 200, 'content': json.dumps({'data': []})}
+    return {'status_code': 200, 'content': json.dumps({'data': [
+        {'category_id': '1', 'value_budget': '3', 'geonameid': geonameid}]})}
+
+class TestBulk(unittest.TestCase):
+    def setUp(self):
+        self._api = Api()
+        # cache_requests keeps responses between runs: start from an empty store
+        self._api._Api__session.cache.connection.flushdb()
+        del calls[:]
+
+    def test_locations_many_keeps_order(self):
+        with HTTMock(location_mock):
+            locations = self._api.locations_many([3, 1, 0, 2])
+        self.assertEqual([l and l.id_ for l in locations], ['3', '1', None, '2'])
+
+    def test_locations_many_collapses_duplicates(self):
+        with HTTMock(location_mock):
+            locations = self._api.locations_many([5, 5, 6, 5])
+        self.assertEqual([l.id_ for l in locations], ['5', '5', '6', '5'])
+        self.assertEqual(sorted(calls), ['5', '6'])
+
+    def test_locations_many_stream(self):
+        with HTTMock(location_mock):
+            results = dict(self._api.locations_many([7, 8, 7], stream=True))
+        self.assertEqual(sorted(results), [7, 8])
+        self.assertEqual(results[8].name, 'Place 8')
+
+    def test_search_include_costs(self):
+        with HTTMock(search_mock, costs_mock):
+            locations = self._api.locations_search('x', include_costs=True)
+            self.assertEqual(sorted(calls), ['1', '2'])
+            self.assertEqual(locations[0].accommodation_cost('budget'), 3.0)
+            self.assertIsNone(locations[1].accommodation_cost('budget'))
+            locations[1].costs
+        self.assertEqual(len(calls), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+import context
+from httmock import HTTMock, urlmatch
+from budgetyourtrip_api.api import Api
+from budgetyourtrip_api.cache import MemoryCache, SqliteCache, TieredCache, MISSING, NO_CACHE
+
+requests_made = []
+
+@urlmatch(path=r'.*/categories/.*')
+def category_mock(url, request):
+    requests_made.append(url.path)
+    return {'status_code': 200,
+            'content': json.dumps({'data': {'category_id': '1', 'name': 'Accommodation'}})}
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        del requests_made[:]
+
+    def test_memory_cache_lru_eviction(self):
+        store = MemoryCache(max_size=2)
+        store.set('a', 1, 60)
+        store.set('b', 2, 60)
+        store.get('a')
+        store.set('c', 3, 60)
+        self.assertIs(store.get('b'), MISSING)
+        self.assertEqual(store.get('a'), 1)
+        self.assertEqual(store.stats.evictions, 1)
+
+    def test_memory_cache_expiry(self):
+        store = MemoryCache()
+        store.set('a', 1, -1)
+        self.assertIs(store.get('a'), MISSING)
+
+    def test_ttl_per_endpoint(self):
+        tiered = TieredCache()
+        self.assertEqual(tiered.ttl_for('currencies/convert/usd/eur/1'), 60)
+        self.assertEqual(tiered.ttl_for('currencies/AUD'), 7 * 24 * 3600)
+
+    def test_sqlite_tier_promotes_to_memory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            disk = SqliteCache(os.path.join(directory, 'cache.sqlite'))
+            disk.set('categories/1', {'name': 'x'}, 60)
+            memory = MemoryCache()
+            tiered = TieredCache(memory, disk)
+            self.assertEqual(tiered.get('categories/1'), {'name': 'x'})
+            self.assertEqual(memory.get('categories/1'), {'name': 'x'})
+            # Promoted for the time left on disk, not the endpoint's full TTL
+            self.assertLess(memory.get_entry('categories/1')[0], time.time() + 61)
+
+    def test_sqlite_cache_evicts_in_batches(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = SqliteCache(os.path.join(directory, 'cache.sqlite'), max_size=20)
+            for index in range(25):
+                store.set(str(index), index, 60 + index)
+            # Over the bound on the 22nd write: down to 18, then 3 more writes
+            self.assertEqual(len(store), 21)
+            self.assertEqual(store.stats.evictions, 4)
+            self.assertIs(store.get('0'), MISSING)
+            self.assertEqual(store.get('24'), 24)
+
+    def test_api_uses_cache(self):
+        api = Api(cache=TieredCache())
+        with HTTMock(category_mock):
+            self.assertEqual(api.category(1).name, 'Accommodation')
+            self.assertEqual(api.category(1).name, 'Accommodation')
+        self.assertEqual(len(requests_made), 1)
+        self.assertEqual(api.cache.stats[0].hits, 1)
+
+    def test_api_without_cache(self):
+        api = Api(cache=NO_CACHE)
+        self.assertIsNone(api.cache)
+        with HTTMock(category_mock):
+            self.assertEqual(api.category(1).name, 'Accommodation')
+            self.assertEqual(api.category(1).name, 'Accommodation')
+        self.assertEqual(len(requests_made), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+import context
+from budgetyourtrip_api.crawler import Checkpoint, crawl_parallel, CHECKPOINT_SUFFIX
+from budgetyourtrip_api.snapshot import Snapshot
+
+def costs(country_code, geonameid=None):
+    cost = {'category_id': '1', 'value_budget': '10', 'country_code': country_code}
+    if geonameid:
+        cost['geonameid'] = geonameid
+    return [cost]
+
+def location(geonameid, name, country_code):
+    return {'geonameid': geonameid, 'name': name, 'country_code': country_code}
+
+DATA = {
+    'categories/': [{'category_id': '1', 'name': 'Accommodation'}],
+    'currencies/': [{'currency_code': 'USD'}],
+    'search/country/f': [{'country_code': 'FR', 'name': 'France'}],
+    'search/country/u': [{'country_code': 'US', 'name': 'United States'}],
+    'costs/countryinfo/FR': {'info': {'country_code': 'FR', 'name': 'France'},
+                             'costs': costs('FR')},
+    'costs/countryinfo/US': {'info': {'country_code': 'US', 'name': 'United States'},
+                             'costs': costs('US')},
+    'search/location/France': [location('1', 'Paris', 'FR'), location('9', 'Paris', 'US')],
+    'search/location/United%20States': [location('2', 'Austin', 'US')],
+    'costs/locationinfo/1': {'info': location('1', 'Paris', 'FR'), 'costs': costs('FR', '1')},
+    'costs/locationinfo/2': {'info': location('2', 'Austin', 'US'), 'costs': costs('US', '2')},
+    'costs/locationinfo/3': {'info': location('3', 'Lyon', 'FR'), 'costs': costs('FR', '3')},
+}
+
+class FakeApi(object):
+    def __init__(self, broken=()):
+        self.broken = broken
+
+    def get(self, path, params=None):
+        if path in self.broken:
+            raise IOError('unreachable')
+        return DATA.get(path)
+
+    def convert_currency(self, amount, from_cur='usd', to_cur='eur'):
+        return amount
+
+def fake_api(rate=None):
+    return FakeApi()
+
+def broken_api(rate=None):
+    return FakeApi(broken=('costs/countryinfo/FR',))
+
+class TestCrawler(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'snapshot.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_crawl(self):
+        snapshot = crawl_parallel(self.path, geonameids=[3], processes=2, api_factory=fake_api)
+        self.assertEqual(sorted(snapshot.paths('costs/locationinfo/')),
+                         ['costs/locationinfo/1', 'costs/locationinfo/2', 'costs/locationinfo/3'])
+        self.assertEqual(sorted(snapshot.paths('costs/countryinfo/')),
+                         ['costs/countryinfo/FR', 'costs/countryinfo/US'])
+        self.assertEqual(len(snapshot.get('categories/')), 1)
+        # Search responses are stored as received; only their locations are filtered.
+        self.assertEqual(snapshot.get('search/location/France'), DATA['search/location/France'])
+        # Country names are quoted as one path segment.
+        self.assertEqual(snapshot.paths('search/location/United'),
+                         ['search/location/United%20States'])
+        self.assertEqual(Checkpoint(self.path + CHECKPOINT_SUFFIX).pending(), [])
+
+    def test_resume(self):
+        with self.assertRaises(RuntimeError):
+            crawl_parallel(self.path, processes=2, api_factory=broken_api)
+        checkpoint = Checkpoint(self.path + CHECKPOINT_SUFFIX)
+        self.assertEqual(checkpoint.pending(), ['country/FR'])
+        us_meta = Snapshot(self.path).meta('costs/countryinfo/US')
+        snapshot = crawl_parallel(self.path, processes=2, api_factory=fake_api)
+        self.assertEqual(Checkpoint(self.path + CHECKPOINT_SUFFIX).pending(), [])
+        self.assertIn('costs/locationinfo/1', snapshot.paths())
+        # Finished shards aren't crawled again
+        self.assertEqual(snapshot.meta('costs/countryinfo/US'), us_meta)
+
+    def test_resume_warns_of_ignored_shards(self):
+        crawl_parallel(self.path, country_codes=['US'], processes=1, api_factory=fake_api)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            snapshot = crawl_parallel(self.path, country_codes=['US', 'FR'], processes=1,
+                                      api_factory=fake_api)
+        self.assertEqual(len(caught), 1)
+        self.assertIn('country/FR', str(caught[0].message))
+        self.assertNotIn('costs/countryinfo/FR', snapshot.paths())
+
+    def test_checkpoint_ignores_partial_line(self):
+        checkpoint = Checkpoint(self.path + CHECKPOINT_SUFFIX)
+        checkpoint.start(['shared', 'country/US'])
+        checkpoint.finish('shared')
+        with open(checkpoint.path, 'a') as checkpoint_file:
+            checkpoint_file.write('"coun')
+        self.assertEqual(Checkpoint(checkpoint.path).pending(), ['country/US'])
+
+if __name__ == '__main__':
+    unittest.main()
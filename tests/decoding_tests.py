@@ -0,0 +1,75 @@
+import json
+import unittest
+import context
+from httmock import HTTMock, urlmatch
+from budgetyourtrip_api import models
+from budgetyourtrip_api.api import Api
+from budgetyourtrip_api.cache import TieredCache
+from budgetyourtrip_api.decoding import BACKENDS, decode_data, get_decoder, project
+
+COST = {'category_id': '1', 'value_budget': '3', 'value_midrange': '6',
+        'value_luxury': '9', 'country_code': 'FR', 'geonameid': '12', 'extra': 'x' * 100}
+
+requests_made = []
+
+@urlmatch(path=r'.*/costs/location/.*')
+def costs_mock(url, request):
+    requests_made.append(url.path)
+    return {'status_code': 200, 'content': json.dumps({'data': [COST]})}
+
+class TestDecoding(unittest.TestCase):
+    def setUp(self):
+        del requests_made[:]
+
+    def test_backends_decode_bytes(self):
+        body = json.dumps({'data': [COST], 'status': True}).encode('utf-8')
+        for backend in BACKENDS:
+            try:
+                decoder = get_decoder(backend)
+            except ImportError:
+                continue
+            self.assertEqual(decode_data(body, decoder), [COST])
+
+    def test_invalid_json_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            decode_data(b'<html>', get_decoder())
+
+    def test_project(self):
+        self.assertEqual(sorted(project([COST], models.Cost)[0]),
+                         ['category_id', 'country_code', 'geonameid', 'value_budget',
+                          'value_luxury', 'value_midrange'])
+        info = {'info': {'geonameid': '12', 'name': 'Paris', 'population': 2000000},
+                'costs': [COST]}
+        projected = project(info, models.Location)
+        self.assertEqual(projected['info'], {'geonameid': '12', 'name': 'Paris'})
+        self.assertNotIn('extra', projected['costs'][0])
+        self.assertEqual(models.Location(projected), models.Location(info))
+
+    def test_api_caches_projected_data(self):
+        cache = TieredCache()
+        api = Api(cache=cache, decoder='json')
+        with HTTMock(costs_mock):
+            costs = api.location_costs(12)
+            raw = api.get('costs/location/12')
+            self.assertEqual(api.location_costs(12), costs)
+            self.assertEqual(api.location_costs(12), costs)
+        self.assertEqual(costs[0].budget, '3')
+        self.assertEqual(raw, [COST])
+        # The raw get found the entry projected for Cost and cached the full data, which
+        # answers every later caller.
+        self.assertEqual(cache.get('costs/location/12'), {'data': [COST], 'projected': False})
+        self.assertEqual(len(requests_made), 2)
+
+    def test_api_raw_and_model_callers_share_an_entry(self):
+        cache = TieredCache()
+        api = Api(cache=cache, decoder='json')
+        with HTTMock(costs_mock):
+            costs = api.location_costs(13)
+            self.assertNotIn('extra', cache.get('costs/location/13')['data'][0])
+            self.assertEqual(api.location_costs(13), costs)
+            self.assertEqual(api.get('costs/location/14'), [COST])
+            self.assertEqual(api.location_costs(14)[0].budget, '3')
+        self.assertEqual(requests_made, ['/api/v3/costs/location/13', '/api/v3/costs/location/14'])
+
+if __name__ == '__main__':
+    unittest.main()
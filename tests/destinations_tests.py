@@ -0,0 +1,68 @@
+import unittest
+import context
+from budgetyourtrip_api import models
+from budgetyourtrip_api.destinations import DestinationIndex
+from budgetyourtrip_api.rates import RateMatrix
+from budgetyourtrip_api.table import CostTable
+
+def costs(country_code, geonameid, accommodation, food, entertainment=None):
+    rows = [(1, accommodation), (4, food)]
+    if entertainment is not None:
+        rows.append((6, entertainment))
+    return [{'category_id': str(category), 'value_budget': str(value / 2),
+             'value_midrange': str(value), 'value_luxury': str(value * 3),
+             'country_code': country_code, 'geonameid': geonameid} for category, value in rows]
+
+DATA = (costs('FR', None, 80, 40, 20) + costs('TH', None, 20, 10, 5) +
+        costs('FR', '1', 100, 50, 30) + costs('FR', '2', 60, 30, 10) +
+        costs('TH', '3', 15, 20))
+
+class FakeApi(object):
+    def country_info_many(self, country_codes):
+        return [models.Country({'info': {'country_code': code, 'name': code},
+                                'costs': [item for item in DATA if item['country_code'] == code
+                                          and not item['geonameid']]})
+                for code in country_codes]
+
+    def locations_many(self, geonameids):
+        return [models.Location({'info': {'geonameid': str(geonameid), 'name': 'L' + str(geonameid),
+                                          'country_code': 'FR'},
+                                 'costs': [item for item in DATA
+                                           if item['geonameid'] == str(geonameid)]})
+                for geonameid in geonameids]
+
+    def convert_currency(self, amount, from_cur='usd', to_cur='eur'):
+        return amount * {'usd': 1.0, 'eur': 0.5}[to_cur]
+
+class TestDestinationIndex(unittest.TestCase):
+    def setUp(self):
+        rates = RateMatrix()
+        rates.load({'eur': 0.5})
+        self.index = DestinationIndex(CostTable.from_json(DATA),
+                                      {'FR': 'France', 'TH': 'Thailand', 1: 'Paris'}, rates)
+
+    def test_top(self):
+        top = self.index.top(3)
+        self.assertEqual([(d.country_code, d.geonameid, d.total) for d in top],
+                         [('TH', None, 35.0), ('FR', 2, 100.0), ('FR', None, 140.0)])
+        self.assertEqual(self.index.top(1, level='location', largest=True)[0].name, 'Paris')
+
+    def test_weights_filters_and_currency(self):
+        top = self.index.top(5, 'luxury', categories={1: 1, 4: 2}, currency='eur',
+                             level='location', max_total=200)
+        self.assertEqual([(d.geonameid, d.total) for d in top], [(3, 82.5), (2, 180.0)])
+        top = self.index.top(5, categories=(1, 4), where=lambda d: d.country_code == 'FR')
+        self.assertEqual([d.total for d in top], [90.0, 120.0, 150.0])
+
+    def test_missing_category(self):
+        self.assertNotIn(3, [d.geonameid for d in self.index.top(10)])
+        self.assertEqual(self.index.top(10, categories=(99,)), [])
+
+    def test_from_api(self):
+        index = DestinationIndex.from_api(FakeApi(), ['FR', 'TH'], [1, 2])
+        self.assertEqual(len(index), 4)
+        top = index.top(2, currency='eur')
+        self.assertEqual([(d.name, d.total) for d in top], [('TH', 17.5), ('L2', 50.0)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import context
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import requests
+from budgetyourtrip_api.api import Api, NOT_MODIFIED
+from budgetyourtrip_api.cache import NO_CACHE, TieredCache
+from budgetyourtrip_api.gateway import Gateway
+from budgetyourtrip_api.ratelimit import RetryPolicy
+
+class Upstream(object):
+    def __init__(self):
+        self.paths = []
+        self.failures = 1
+
+    async def handle(self, request):
+        path = request.match_info['path']
+        self.paths.append(path + ('?' + request.query_string if request.query_string else ''))
+        await asyncio.sleep(0.05)
+        if path == 'currencies/flaky' and self.failures:
+            self.failures -= 1
+            return web.Response(status=503, headers={'Retry-After': '0'})
+        if path.startswith('missing'):
+            return web.json_response({'status': False}, status=404)
+        if path.startswith('binary'):
+            return web.Response(body=b'\xff\xfe\x00')
+        if path.startswith('tagged'):
+            if request.headers.get('If-None-Match') == '"v1"':
+                return web.Response(status=304, headers={'ETag': '"v1"'})
+            return web.json_response({'status': True, 'data': {'path': path}},
+                                     headers={'ETag': '"v1"'})
+        return web.json_response({'status': True, 'data': {'path': path,
+                                                           'key': request.headers['X-API-KEY']}})
+
+class TestGateway(unittest.TestCase):
+    def run_with_gateway(self, calls):
+        async def run():
+            upstream_app = web.Application()
+            upstream_app.router.add_get('/api/v3/{path:.*}', self.upstream.handle)
+            async with TestServer(upstream_app) as upstream_server:
+                self.gateway = Gateway('secret', str(upstream_server.make_url('/api/v3/')),
+                                       retry=RetryPolicy(backoff=0))
+                async with TestServer(self.gateway.app()) as gateway_server:
+                    end_point = str(gateway_server.make_url('/api/v3/'))
+                    loop = asyncio.get_running_loop()
+                    with ThreadPoolExecutor(max_workers=8) as executor:
+                        return await loop.run_in_executor(None, calls, end_point, executor)
+        return asyncio.run(run())
+
+    def setUp(self):
+        self.upstream = Upstream()
+
+    def test_workers_share_one_upstream_request(self):
+        def calls(end_point, executor):
+            # One Api per simulated worker process, each without a cache of its own.
+            apis = [Api(cache=NO_CACHE, end_point=end_point)
+                    for _ in range(8)]
+            first = list(executor.map(lambda api: api.get('categories/3'), apis))
+            return first, apis[0].get('categories/3'), apis[1].get('missing/1')
+        first, again, missing = self.run_with_gateway(calls)
+        self.assertEqual(first, [{'path': 'categories/3', 'key': 'secret'}] * 8)
+        self.assertEqual(again, first[0])
+        self.assertIsNone(missing)
+        self.assertEqual(self.upstream.paths, ['categories/3', 'missing/1'])
+        self.assertEqual(self.gateway.stats.requests, 10)
+        self.assertEqual(self.gateway.stats.coalesced + self.gateway.stats.hits, 8)
+
+    def test_retries_and_params(self):
+        def calls(end_point, executor):
+            api = Api(cache=TieredCache(), end_point=end_point)
+            return api.get('currencies/flaky'), api.get('search/location/x', {'b': 2, 'a': 1})
+        flaky, search = self.run_with_gateway(calls)
+        self.assertEqual(flaky['path'], 'currencies/flaky')
+        self.assertEqual(search['path'], 'search/location/x')
+        self.assertEqual(self.upstream.paths,
+                         ['currencies/flaky', 'currencies/flaky', 'search/location/x?a=1&b=2'])
+
+    def test_revalidate_through_gateway(self):
+        def calls(end_point, executor):
+            api = Api(end_point=end_point)
+            return (api.revalidate('tagged/1'), api.revalidate('tagged/1', '"v1"'),
+                    api.revalidate('tagged/2', '"v1"'))
+        first, cached, forwarded = self.run_with_gateway(calls)
+        self.assertEqual(first, ({'path': 'tagged/1'}, '"v1"', None))
+        # Answered from the gateway's cache, then by the upstream
+        self.assertEqual(cached, (NOT_MODIFIED, '"v1"', None))
+        self.assertEqual(forwarded, (NOT_MODIFIED, '"v1"', None))
+        self.assertEqual(self.upstream.paths, ['tagged/1', 'tagged/2'])
+
+    def test_binary_body(self):
+        def calls(end_point, executor):
+            return [requests.get(end_point + 'binary/1').content for _ in range(2)]
+        self.assertEqual(self.run_with_gateway(calls), [b'\xff\xfe\x00'] * 2)
+        self.assertEqual(self.upstream.paths, ['binary/1'])
+
+if __name__ == '__main__':
+    unittest.main()
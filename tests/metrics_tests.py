@@ -0,0 +1,139 @@
+import json
+import types
+import unittest
+from unittest import mock
+import context
+from httmock import HTTMock, urlmatch
+from budgetyourtrip_api.api import Api
+from budgetyourtrip_api.cache import TieredCache
+from budgetyourtrip_api.metrics import (Instrumentation, MetricsRegistry, Histogram,
+                                        OpenTelemetryHook, path_template)
+from budgetyourtrip_api.ratelimit import RetryPolicy
+
+attempts = []
+
+@urlmatch(path=r'.*/costs/location/.*')
+def costs_mock(url, request):
+    attempts.append(url.path)
+    if len(attempts) == 1:
+        return {'status_code': 503, 'content': '', 'headers': {'Retry-After': '0'}}
+    return {'status_code': 200, 'content': json.dumps({'data': [
+        {'category_id': '1', 'value_budget': '3'}, {'category_id': '4', 'value_budget': '2'}]})}
+
+class Recorder(object):
+    def __init__(self):
+        self.events = []
+
+    def on_request_start(self, path):
+        self.events.append(('request_start', path))
+
+    def on_cache_hit(self, path):
+        self.events.append(('cache_hit', path))
+
+class FakeSpan(object):
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.ended = False
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def end(self):
+        self.ended = True
+
+class FakeTracer(object):
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, attributes=None):
+        self.spans.append(FakeSpan(name, attributes or {}))
+        return self.spans[-1]
+
+class TestPathTemplate(unittest.TestCase):
+    def test_ids_are_replaced(self):
+        self.assertEqual(path_template('costs/location/4167147'), 'costs/location/{id}')
+        self.assertEqual(path_template('categories/3'), 'categories/{id}')
+        self.assertEqual(path_template('categories/'), 'categories')
+        self.assertEqual(path_template('currencies/convert/usd/eur/10'),
+                         'currencies/convert/{id}/{id}/{id}')
+
+class TestHistogram(unittest.TestCase):
+    def test_quantile(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.05, 0.5, 2.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 3])
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.75), 1.0)
+        self.assertEqual(histogram.quantile(1.0), float('inf'))
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        del attempts[:]
+        self.metrics = MetricsRegistry()
+        self.recorder = Recorder()
+        self.api = Api(cache=TieredCache(), retry=RetryPolicy(backoff=0),
+                       instrumentation=Instrumentation(self.metrics, self.recorder))
+
+    def test_events(self):
+        with HTTMock(costs_mock):
+            self.api.location_costs(12)
+            self.api.location_costs(12)
+        path = 'costs/location/{id}'
+        self.assertEqual(self.metrics.requests, {(path, 503): 1, (path, 200): 1})
+        self.assertEqual(self.metrics.retries[path], 1)
+        self.assertEqual(self.metrics.cache_misses[path], 1)
+        self.assertEqual(self.metrics.cache_hits[path], 1)
+        self.assertEqual(self.metrics.latency[path].count, 2)
+        self.assertEqual(self.metrics.parse_time[path].count, 1)
+        self.assertEqual(self.metrics.build_time['Cost'].count, 2)
+        self.assertEqual(self.recorder.events, [('request_start', path)] * 2 +
+                         [('cache_hit', path)])
+
+    def test_prometheus(self):
+        with HTTMock(costs_mock):
+            self.api.location_costs(12)
+        text = self.metrics.to_prometheus()
+        self.assertIn('# TYPE budgetyourtrip_request_seconds histogram', text)
+        self.assertIn('budgetyourtrip_requests_total{path="costs/location/{id}",status="200"} 1',
+                      text)
+        self.assertIn('budgetyourtrip_request_seconds_count{path="costs/location/{id}"} 2', text)
+
+class TestOpenTelemetryHook(unittest.TestCase):
+    def setUp(self):
+        del attempts[:]
+
+    def test_spans(self):
+        tracer = FakeTracer()
+        api = Api(cache=TieredCache(), retry=RetryPolicy(backoff=0),
+                  instrumentation=Instrumentation(OpenTelemetryHook(tracer)))
+        with HTTMock(costs_mock):
+            api.location_costs(12)
+        path = 'costs/location/{id}'
+        self.assertEqual([span.name for span in tracer.spans], ['GET ' + path] * 2)
+        self.assertTrue(all(span.ended for span in tracer.spans))
+        self.assertEqual([span.attributes['http.status_code'] for span in tracer.spans],
+                         [503, 200])
+        self.assertEqual(tracer.spans[0].attributes['http.route'], path)
+
+    def test_end_without_start_is_ignored(self):
+        tracer = FakeTracer()
+        OpenTelemetryHook(tracer).on_request_end('categories', 200, 0.1, 10)
+        self.assertEqual(tracer.spans, [])
+
+    def test_default_tracer(self):
+        tracer = FakeTracer()
+        trace = types.ModuleType('opentelemetry.trace')
+        trace.get_tracer = mock.Mock(return_value=tracer)
+        package = types.ModuleType('opentelemetry')
+        package.trace = trace
+        with mock.patch.dict('sys.modules', {'opentelemetry': package,
+                                             'opentelemetry.trace': trace}):
+            hook = OpenTelemetryHook()
+        trace.get_tracer.assert_called_once_with('budgetyourtrip_api')
+        hook.on_request_start('categories')
+        self.assertEqual(tracer.spans[0].name, 'GET categories')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import context
+from budgetyourtrip_api import models
+
+COST_JSON = {'category_id': '1', 'value_budget': '10.5', 'value_midrange': '25',
+             'value_luxury': '80', 'country_code': 'US', 'geonameid': '4167147'}
+
+class TestModels(unittest.TestCase):
+    def test_fields_mapped_from_json(self):
+        cost = models.Cost(COST_JSON)
+        self.assertEqual(cost.id_, '1')
+        self.assertEqual(cost.midrange, '25')
+        self.assertEqual(cost.geoname_id, '4167147')
+
+    def test_missing_field_is_none(self):
+        category = models.Category({'category_id': '1'})
+        self.assertIsNone(category.description)
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(models.Cost(COST_JSON), '__dict__'))
+
+    def test_equality_and_repr(self):
+        self.assertEqual(models.Cost(COST_JSON), models.Cost(dict(COST_JSON)))
+        self.assertNotEqual(models.Cost(COST_JSON), models.Cost(dict(COST_JSON, value_budget='1')))
+        self.assertIn("'budget': '10.5'", repr(models.Cost(COST_JSON)))
+
+    def test_location_with_costs(self):
+        location = models.Location({'info': {'geonameid': '4167147', 'name': 'Orlando'},
+                                    'costs': [COST_JSON]})
+        self.assertEqual(location.name, 'Orlando')
+        self.assertEqual(location.accommodation_cost('budget'), 10.5)
+        self.assertIsNone(location.food_cost('budget'))
+
+    def test_cost_index(self):
+        country = models.Country({'info': {'country_code': 'US'},
+                                   'costs': [COST_JSON, dict(COST_JSON, category_id='12',
+                                                             value_budget='3')]})
+        self.assertEqual(country.cost(12, 'budget'), 3.0)
+        self.assertEqual(country.cost('1', 'luxury'), 80.0)
+        self.assertIsNone(country.cost(2, 'budget'))
+        self.assertEqual(country.costs_by_style('budget'), {1: 10.5, 12: 3.0})
+
+    def test_cost_index_skips_costs_without_category(self):
+        without_category = dict(COST_JSON, value_budget='99')
+        del without_category['category_id']
+        country = models.Country({'info': {'country_code': 'US'},
+                                   'costs': [without_category, COST_JSON]})
+        self.assertEqual(country.costs_by_style('budget'), {1: 10.5})
+
+    def test_cost_index_fetches_costs_once(self):
+        class FakeApi(object):
+            calls = 0
+            def location_costs(self, geonameid):
+                self.calls += 1
+                return [models.Cost(COST_JSON)]
+        api = FakeApi()
+        location = models.Location({'geonameid': '4167147'}, api)
+        self.assertEqual(location.accommodation_cost('midrange'), 25.0)
+        self.assertEqual(location.food_cost('midrange'), None)
+        self.assertEqual(api.calls, 1)
+
+    def test_missing_costs_fetched_once(self):
+        class FakeApi(object):
+            calls = 0
+            def country_costs(self, country_code):
+                self.calls += 1
+                return None
+            location_costs = country_costs
+        api = FakeApi()
+        country = models.Country({'country_code': 'XX'}, api)
+        location = models.Location({'geonameid': '1'}, api)
+        for _ in range(3):
+            self.assertIsNone(country.costs)
+            self.assertEqual(location.costs, -1)
+            self.assertIsNone(location.food_cost('budget'))
+        self.assertEqual(api.calls, 2)
+
+if __name__ == '__main__':
+    unittest.main()
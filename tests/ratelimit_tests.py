@@ -0,0 +1,60 @@
+import json
+import time
+import unittest
+import context
+import requests
+from httmock import HTTMock, urlmatch
+from budgetyourtrip_api.api import Api
+from budgetyourtrip_api.cache import TieredCache
+from budgetyourtrip_api.ratelimit import (TokenBucket, AdaptiveConcurrency, RetryPolicy,
+                                          parse_retry_after)
+
+responses = []
+
+@urlmatch(path=r'.*/categories/.*')
+def flaky_mock(url, request):
+    status = responses.pop(0)
+    if status != 200:
+        return {'status_code': status, 'headers': {'Retry-After': '0'}, 'content': ''}
+    return {'status_code': 200,
+            'content': json.dumps({'data': {'category_id': '1', 'name': 'Accommodation'}})}
+
+class TestRateLimit(unittest.TestCase):
+    def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=100, burst=1)
+        start = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.045)
+
+    def test_adaptive_concurrency_aimd(self):
+        limiter = AdaptiveConcurrency(initial=8, maximum=9)
+        limiter.throttled()
+        self.assertEqual(limiter.limit, 4)
+        for _ in range(100):
+            limiter.success()
+        self.assertEqual(limiter.limit, 9)
+
+    def test_retry_delay_honors_retry_after(self):
+        policy = RetryPolicy(backoff=0.001)
+        self.assertGreaterEqual(policy.delay(0, '2'), 2)
+        self.assertLessEqual(policy.delay(3), 0.008)
+        self.assertEqual(parse_retry_after('garbage'), 0)
+
+    def test_api_retries_throttled_requests(self):
+        del responses[:]
+        responses.extend([429, 503, 200])
+        api = Api(cache=TieredCache(), retry=RetryPolicy(backoff=0.001))
+        with HTTMock(flaky_mock):
+            self.assertEqual(api.category(1).name, 'Accommodation')
+        self.assertEqual(responses, [])
+
+    def test_api_gives_up_after_max_retries(self):
+        del responses[:]
+        responses.extend([503, 503])
+        api = Api(cache=TieredCache(), retry=RetryPolicy(max_retries=1, backoff=0.001))
+        with HTTMock(flaky_mock):
+            self.assertRaises(requests.HTTPError, api.category, 1)
+
+if __name__ == '__main__':
+    unittest.main()
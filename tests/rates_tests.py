@@ -0,0 +1,44 @@
+import unittest
+import context
+import numpy as np
+from budgetyourtrip_api.rates import RateMatrix
+
+class FakeApi(object):
+    rates = {'eur': 0.5, 'gbp': 0.25}
+
+    def __init__(self):
+        self.calls = 0
+
+    def convert_currency(self, amount, from_cur='usd', to_cur='eur'):
+        self.calls += 1
+        return amount * self.rates[to_cur]
+
+class TestRateMatrix(unittest.TestCase):
+    def test_learns_each_rate_once(self):
+        api = FakeApi()
+        matrix = RateMatrix(api)
+        self.assertEqual(matrix.convert(10, 'usd', 'eur'), 5.0)
+        self.assertEqual(matrix.convert(20, 'usd', 'eur'), 10.0)
+        self.assertEqual(api.calls, 1)
+
+    def test_cross_rate_through_pivot(self):
+        matrix = RateMatrix()
+        matrix.load({'eur': 0.5, 'gbp': 0.25})
+        self.assertAlmostEqual(matrix.rate('eur', 'gbp'), 0.5)
+
+    def test_convert_array(self):
+        matrix = RateMatrix()
+        matrix.load({'EUR': 0.5})
+        np.testing.assert_allclose(matrix.convert([2, 4], 'usd', 'eur'), [1, 2])
+
+    def test_convert_many_mixed_currencies(self):
+        matrix = RateMatrix()
+        matrix.load({'eur': 0.5, 'gbp': 0.25})
+        converted = matrix.convert_many([1, 1, 1], ['eur', 'gbp', 'usd'], 'usd')
+        np.testing.assert_allclose(converted, [2, 4, 1])
+
+    def test_unknown_rate_without_api(self):
+        self.assertRaises(KeyError, RateMatrix().rate, 'usd', 'jpy')
+
+if __name__ == '__main__':
+    unittest.main()
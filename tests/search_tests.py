@@ -0,0 +1,74 @@
+import unittest
+import context
+from budgetyourtrip_api import models
+from budgetyourtrip_api.search import LocationIndex
+
+def location(geonameid, name, country_name, latitude, longitude):
+    return models.Location({'geonameid': str(geonameid), 'name': name,
+                            'country_name': country_name, 'latitude': str(latitude),
+                            'longitude': str(longitude)})
+
+LOCATIONS = [
+    location(1, 'New York City', 'United States', 40.71, -74.01),
+    location(2, 'Newark', 'United States', 40.74, -74.17),
+    location(3, 'S\u00e3o Paulo', 'Brazil', -23.55, -46.63),
+    location(4, 'Paris', 'France', 48.86, 2.35),
+    location(5, 'Orlando', 'United States', 28.54, -81.38),
+]
+
+class FakeApi(object):
+    def __init__(self):
+        self.terms = []
+
+    def locations_search(self, search_term):
+        self.terms.append(search_term)
+        return [location(6, 'Reykjavik', 'Iceland', 64.15, -21.94)]
+
+class TestLocationIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = LocationIndex(LOCATIONS)
+
+    def names(self, locations):
+        return [l.name for l in locations]
+
+    def test_prefix(self):
+        self.assertEqual(self.names(self.index.search('new', threshold=1)),
+                         ['New York City', 'Newark'])
+        self.assertEqual(self.names(self.index.search('york', threshold=1)), ['New York City'])
+
+    def test_accents_and_country(self):
+        self.assertEqual(self.names(self.index.search('sao')), ['S\u00e3o Paulo'])
+        self.assertEqual(self.names(self.index.search('fran')), ['Paris'])
+
+    def test_trigram_typo(self):
+        self.assertEqual(self.names(self.index.search('orlnado', threshold=0.3))[0], 'Orlando')
+
+    def test_nearest(self):
+        results = self.index.nearest(40.73, -74.0, k=2)
+        self.assertEqual(self.names(l for _, l in results), ['New York City', 'Newark'])
+        self.assertLess(results[0][0], 5)
+        far = self.index.nearest(-33.9, 18.4, k=1)
+        self.assertEqual(far[0][1].name, 'S\u00e3o Paulo')
+
+    def test_remote_fallback(self):
+        api = FakeApi()
+        index = LocationIndex(LOCATIONS, api)
+        self.assertEqual(self.names(index.search('reykjav')), ['Reykjavik'])
+        self.assertEqual(self.names(index.search('reykjav')), ['Reykjavik'])
+        self.assertEqual(api.terms, ['reykjav'])
+
+    def test_unrelated_term_goes_remote(self):
+        api = FakeApi()
+        index = LocationIndex(LOCATIONS, api)
+        self.assertEqual(list(index._trigram_matches('xqz', 0.5)), [])
+        self.assertEqual(list(index._trigram_matches('nwe', 0.5)), [])
+        self.assertEqual(self.names(index.search('xqz')), ['Reykjavik'])
+        self.assertEqual(api.terms, ['xqz'])
+
+    def test_trigram_threshold(self):
+        self.assertEqual(self.names(self.index.search('orlnado')), ['Orlando'])
+        self.assertEqual(self.index.search('orlnado', threshold=0.6), [])
+        self.assertEqual(self.names(self.index.search('unitd states')), ['New York City', 'Newark', 'Orlando'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import pickle
+import unittest
+import context
+from budgetyourtrip_api import models
+from budgetyourtrip_api.serialization import to_bytes, from_bytes
+
+COST = {'category_id': '1', 'value_budget': '3.5', 'value_midrange': None,
+        'value_luxury': '12', 'country_code': 'FR', 'geonameid': '2988507'}
+
+class FakeApi(object):
+    def location_costs(self, geonameid):
+        return [models.Cost(dict(COST, geonameid=geonameid))]
+
+class TestSerialization(unittest.TestCase):
+    def setUp(self):
+        self.api = FakeApi()
+        self.objects = [
+            models.Location({'info': {'geonameid': '2988507', 'name': 'Paris île',
+                                      'latitude': 48.85},
+                             'costs': [COST]}, self.api),
+            models.Cost(COST),
+            models.Location({'geonameid': '3', 'name': 'Lyon'}, self.api),
+            models.Category({'category_id': '1', 'name': 'Accommodation'}),
+            models.Country({'country_code': 'US', 'name': 'USA'}),
+            models.Currency({'currency_code': 'EUR', 'currency': 'Euro', 'symbol': '€'}),
+        ]
+
+    def test_round_trip(self):
+        loaded = from_bytes(to_bytes(self.objects), self.api)
+        self.assertEqual(loaded, self.objects)
+        self.assertEqual(loaded[0].latitude, 48.85)
+        self.assertEqual(loaded[0].accommodation_cost('budget'), 3.5)
+        # Costs not loaded yet are fetched through the api bound on load
+        self.assertEqual(loaded[2].costs[0].geoname_id, '3')
+
+    def test_api_is_dropped(self):
+        data = to_bytes(self.objects)
+        self.assertIsNone(from_bytes(data)[2]._api)
+        with self.assertRaises(NotImplementedError):
+            from_bytes(data)[2].costs
+        self.assertEqual(from_bytes(to_bytes([])), [])
+
+    def test_invalid(self):
+        with self.assertRaises(TypeError):
+            to_bytes([object()])
+        with self.assertRaises(ValueError):
+            from_bytes(b'junk')
+
+    def test_truncated(self):
+        data = to_bytes(self.objects)
+        for size in range(len(data)):
+            with self.assertRaises(ValueError):
+                from_bytes(data[:size])
+
+    def test_pickle_drops_api(self):
+        loaded = pickle.loads(pickle.dumps(self.objects))
+        self.assertEqual(loaded, self.objects)
+        self.assertIsNone(loaded[0]._api)
+        self.assertEqual(len(loaded[0].costs), 1)
+        self.assertIsNone(loaded[2]._api)
+
+if __name__ == '__main__':
+    unittest.main()
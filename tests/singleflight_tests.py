@@ -0,0 +1,54 @@
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import context
+from httmock import HTTMock, urlmatch
+from budgetyourtrip_api.api import Api
+from budgetyourtrip_api.cache import TieredCache
+from budgetyourtrip_api.singleflight import SingleFlight
+
+calls = []
+
+@urlmatch(path=r'.*/costs/countryinfo/.*')
+def slow_country_mock(url, request):
+    calls.append(url.path)
+    time.sleep(0.2)
+    return {'status_code': 200,
+            'content': json.dumps({'data': {'country_code': 'US', 'name': 'United States'}})}
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_result(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        def work():
+            started.set()
+            time.sleep(0.1)
+            return object()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            first = executor.submit(flight.do, 'key', work)
+            started.wait()
+            others = [executor.submit(flight.do, 'key', work) for _ in range(3)]
+            results = set(id(future.result()) for future in [first] + others)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(flight.shared, 3)
+
+    def test_error_is_shared_and_not_kept(self):
+        flight = SingleFlight()
+        def fail():
+            raise ValueError
+        self.assertRaises(ValueError, flight.do, 'key', fail)
+        self.assertEqual(flight.do('key', lambda: 1), 1)
+
+    def test_api_coalesces_identical_requests(self):
+        del calls[:]
+        api = Api(cache=TieredCache())
+        with HTTMock(slow_country_mock):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                countries = list(executor.map(api.country_info, ['US'] * 8))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(set(country.id_ for country in countries), set(['US']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import context
+from httmock import HTTMock, urlmatch
+from budgetyourtrip_api import models
+from budgetyourtrip_api.api import Api, NOT_MODIFIED
+from budgetyourtrip_api.snapshot import OfflineApi, crawl, refresh
+
+COST = {'category_id': '1', 'value_budget': '10', 'value_midrange': '20', 'value_luxury': '40'}
+
+DATA = {
+    'categories/': [{'category_id': '1', 'name': 'Accommodation', 'description': 'Beds'}],
+    'currencies/': [{'currency_code': 'USD', 'currency': 'Dollar', 'symbol': '$'},
+                    {'currency_code': 'EUR', 'currency': 'Euro', 'symbol': 'E'}],
+    'costs/countryinfo/US': {'info': {'country_code': 'US', 'name': 'United States of America',
+                                      'currency_code': 'USD'},
+                             'costs': [dict(COST, country_code='US')]},
+    'costs/locationinfo/4167147': {'info': {'geonameid': '4167147', 'name': 'Orlando',
+                                            'country_code': 'US'},
+                                   'costs': [dict(COST, country_code='US', geonameid='4167147')]},
+}
+
+revalidations = []
+
+@urlmatch(path=r'.*/categories/1$')
+def revalidate_mock(url, request):
+    revalidations.append(request.headers.get('If-None-Match'))
+    if request.headers.get('If-None-Match') == '"v1"':
+        return {'status_code': 304, 'headers': {'ETag': '"v1"'}}
+    return {'status_code': 200, 'headers': {'ETag': '"v1"'},
+            'content': json.dumps({'data': {'category_id': '1'}})}
+
+class FakeApi(object):
+    def __init__(self):
+        self.paths = []
+
+    def get(self, path, params=None):
+        self.paths.append(path)
+        return DATA.get(path)
+
+    def revalidate(self, path, etag=None, last_modified=None):
+        self.paths.append(path)
+        if etag == 'v1':
+            return NOT_MODIFIED, 'v1', None
+        return DATA.get(path), 'v1', None
+
+    def convert_currency(self, amount, from_cur='usd', to_cur='eur'):
+        return amount * {'usd': 1.0, 'eur': 0.5}[to_cur.lower()]
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'snapshot.sqlite')
+        crawl(FakeApi(), self.path, country_codes=['US'], geonameids=[4167147]).close()
+        self.offline = OfflineApi(self.path)
+
+    def tearDown(self):
+        self.offline.snapshot.close()
+        shutil.rmtree(self.directory)
+
+    def test_serves_models(self):
+        self.assertEqual(self.offline.category(1).name, 'Accommodation')
+        self.assertEqual(len(self.offline.currencies()), 2)
+        self.assertEqual(self.offline.currency('eur').symbol, 'E')
+        self.assertEqual(self.offline.country_info('US').food_cost('budget'), None)
+        self.assertEqual(self.offline.location(4167147).accommodation_cost('luxury'), 40.0)
+        self.assertIsNone(self.offline.location(1))
+
+    def test_costs(self):
+        costs = self.offline.country_costs('US')
+        self.assertEqual(costs, [models.Cost(dict(COST, country_code='US'))])
+        self.assertEqual(len(self.offline.snapshot.cost_table()), 2)
+        self.assertEqual(len(self.offline.snapshot.cost_table(geonameid=4167147)), 1)
+
+    def test_search(self):
+        self.assertEqual([l.name for l in self.offline.locations_search('orl')], ['Orlando'])
+        self.assertEqual(self.offline.country_search('United')[0].id_, 'US')
+        self.assertIsNone(self.offline.country_search('France'))
+
+    def test_convert_currency(self):
+        self.assertEqual(self.offline.convert_currency(10, 'usd', 'eur'), 5.0)
+        self.assertIsNone(self.offline.convert_currency(10, 'usd', 'jpy'))
+
+class TestRefresh(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.snapshot = crawl(FakeApi(), os.path.join(self.directory, 'snapshot.sqlite'),
+                              country_codes=['US'], rates=False)
+
+    def tearDown(self):
+        self.snapshot.close()
+        shutil.rmtree(self.directory)
+
+    def test_nothing_due_after_crawl(self):
+        self.assertEqual(self.snapshot.due_paths(), [])
+        self.assertEqual(len(self.snapshot.due_paths(ttls={'': 0})), 3)
+
+    def test_unchanged_data_is_not_rewritten(self):
+        report = refresh(FakeApi(), self.snapshot, ttls={'': 0})
+        self.assertEqual(len(report.checked), 3)
+        self.assertEqual(report.changed, [])
+        self.assertEqual(self.snapshot.meta('categories/')[1], 'v1')
+        api = FakeApi()
+        refresh(api, self.snapshot, paths=['categories/'])
+        self.assertEqual(api.paths, ['categories/'])
+
+    def test_changed_costs_are_reported(self):
+        path = 'costs/countryinfo/US'
+        self.snapshot.put(path, {'info': DATA[path]['info'],
+                                 'costs': [dict(COST, value_budget='9', country_code='US')]})
+        report = refresh(FakeApi(), self.snapshot, paths=[path])
+        self.assertEqual(report.changed, [path])
+        self.assertEqual(report.cost_changes, [(path, 1, 'budget', 9.0, 10.0)])
+        self.assertEqual(self.snapshot.cost_table(country_code='US').budget.tolist(), [10.0])
+
+    def test_failed_paths_are_reported(self):
+        class FailingApi(FakeApi):
+            def revalidate(self, path, etag=None, last_modified=None):
+                if path == 'currencies/':
+                    raise IOError('connection reset')
+                return FakeApi.revalidate(self, path, None, None)
+        path = 'costs/countryinfo/US'
+        self.snapshot.put(path, {'info': DATA[path]['info'], 'costs': []})
+        report = refresh(FailingApi(), self.snapshot, ttls={'': 0})
+        self.assertEqual([failure[0] for failure in report.failed], ['currencies/'])
+        self.assertIsInstance(report.failed[0][1], IOError)
+        self.assertEqual(sorted(report.checked), ['categories/', path])
+        self.assertEqual(report.changed, [path])
+        self.assertEqual(self.snapshot.cost_table(country_code='US').budget.tolist(), [10.0])
+
+    def test_missing_data_drops_costs(self):
+        class GoneApi(FakeApi):
+            def revalidate(self, path, etag=None, last_modified=None):
+                return None, None, None
+        path = 'costs/locationinfo/4167147'
+        self.snapshot.put(path, DATA[path])
+        self.assertEqual(len(self.snapshot.cost_table(geonameid=4167147)), 1)
+        report = refresh(GoneApi(), self.snapshot, paths=[path, 'costs/countryinfo/US'])
+        self.assertEqual(sorted(report.changed), ['costs/countryinfo/US', path])
+        self.assertEqual(len(self.snapshot.cost_table()), 0)
+        self.assertIsNone(self.snapshot.get(path))
+
+class TestRevalidate(unittest.TestCase):
+    def setUp(self):
+        del revalidations[:]
+
+    def test_default_api_reaches_the_server(self):
+        # The default Api memoizes responses with cache_requests, which revalidate skips.
+        api = Api()
+        with HTTMock(revalidate_mock):
+            self.assertEqual(api.revalidate('categories/1'), ({'category_id': '1'}, '"v1"', None))
+            self.assertEqual(api.revalidate('categories/1', '"v1"'), (NOT_MODIFIED, '"v1"', None))
+            self.assertEqual(api.revalidate('categories/1'), ({'category_id': '1'}, '"v1"', None))
+        self.assertEqual(revalidations, [None, '"v1"', None])
+
+if __name__ == '__main__':
+    unittest.main()
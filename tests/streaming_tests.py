@@ -0,0 +1,141 @@
+import json
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import context
+import requests
+from httmock import HTTMock, urlmatch
+from budgetyourtrip_api.api import Api
+from budgetyourtrip_api.cache import TieredCache
+from budgetyourtrip_api.ratelimit import RetryPolicy
+from budgetyourtrip_api.streaming import iter_json_array, LazySequence
+
+BODY = json.dumps({'status': True, 'meta': {'x': [1, '}]']},
+                   'data': [{'currency_code': 'USD', 'currency': 'Dollar \u00e9', 'symbol': '$'},
+                            {'currency_code': 'EUR', 'currency': 'Euro', 'symbol': '\u20ac'}]}
+                  ).encode('utf-8')
+
+# Long enough that its first half spans several chunks read from the network.
+LONG_BODY = json.dumps({'data': [{'currency_code': 'C{0}'.format(i), 'currency': 'Currency',
+                                  'symbol': '$'} for i in range(2000)]}).encode('utf-8')
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+@urlmatch(path=r'.*/currencies/')
+def currencies_mock(url, request):
+    return {'status_code': 200, 'content': BODY}
+
+class SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        # Send the first half, then hold the rest back until the client has read it.
+        split = len(LONG_BODY) // 2
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(LONG_BODY)))
+        self.end_headers()
+        self.wfile.write(LONG_BODY[:split])
+        self.wfile.flush()
+        self.server.timed_out = not self.server.first_item_read.wait(2)
+        self.wfile.write(LONG_BODY[split:])
+
+    def log_message(self, *args):
+        pass
+
+class ErrorHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        # Not found, except for the unavailable path; both with a body left unread.
+        status = 503 if 'unavailable' in self.path else 404
+        body = json.dumps({'status': False, 'padding': 'x' * 65536}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestStreaming(unittest.TestCase):
+    def test_iter_json_array_any_chunk_size(self):
+        expected = json.loads(BODY.decode('utf-8'))['data']
+        for size in (1, 2, 7, 4096):
+            self.assertEqual(list(iter_json_array(chunked(BODY, size))), expected)
+
+    def test_iter_json_array_numbers_split_across_chunks(self):
+        self.assertEqual(list(iter_json_array([b'{"data": [12', b'34, 5]}'])), [1234, 5])
+
+    def test_iter_json_array_empty_and_missing(self):
+        self.assertEqual(list(iter_json_array([b'{"data": []}'])), [])
+        self.assertRaises(KeyError, list, iter_json_array([b'{"status": false}']))
+
+    def test_lazy_sequence_pulls_only_what_is_needed(self):
+        pulled = []
+        def numbers():
+            for i in range(10):
+                pulled.append(i)
+                yield i
+        sequence = LazySequence(numbers())
+        self.assertEqual(sequence[1], 1)
+        self.assertEqual(pulled, [0, 1])
+        self.assertEqual(list(sequence)[:3], [0, 1, 2])
+        self.assertEqual(len(sequence), 10)
+        self.assertEqual(sequence[-1], 9)
+
+    def test_api_stream(self):
+        api = Api(cache=TieredCache())
+        with HTTMock(currencies_mock):
+            currencies = api.currencies(stream=True)
+            self.assertIsInstance(currencies, LazySequence)
+            self.assertEqual([c.id_ for c in currencies], ['USD', 'EUR'])
+
+    def test_default_api_stream(self):
+        # The default Api memoizes responses with cache_requests, which streaming skips,
+        # since the memoizer reads the whole body before returning.
+        server = ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+        server.daemon_threads = True
+        server.first_item_read = threading.Event()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            api = Api(end_point='http://127.0.0.1:{0}/api/v3/'.format(server.server_port))
+            currencies = api.currencies(stream=True)
+            self.assertEqual(currencies[0].id_, 'C0')
+            server.first_item_read.set()
+            self.assertEqual(len(currencies), 2000)
+            self.assertFalse(server.timed_out)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_stream_errors_release_connections(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), ErrorHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        results = []
+
+        def calls():
+            api = Api(end_point='http://127.0.0.1:{0}/api/v3/'.format(server.server_port),
+                      retry=RetryPolicy(max_retries=2, backoff=0), max_connections=2)
+            for _ in range(10):
+                results.append(api.locations_search('missing', stream=True))
+            for _ in range(3):
+                try:
+                    api.locations_search('unavailable', stream=True)
+                except requests.HTTPError as error:
+                    results.append(error.response.status_code)
+        try:
+            # A leaked connection would leave the calls waiting on the pool forever.
+            thread = threading.Thread(target=calls, daemon=True)
+            thread.start()
+            thread.join(10)
+            self.assertFalse(thread.is_alive())
+            self.assertEqual(results, [None] * 10 + [503] * 3)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import importlib.util
+import types
+import unittest
+from unittest import mock
+import context
+import numpy as np
+from budgetyourtrip_api import models
+from budgetyourtrip_api.table import CostTable, NO_GEONAMEID
+
+COSTS_JSON = [
+    {'category_id': '1', 'value_budget': '10', 'value_midrange': '20', 'value_luxury': '40',
+     'country_code': 'US', 'geonameid': '4167147'},
+    {'category_id': '4', 'value_budget': '5', 'value_midrange': '8', 'value_luxury': None,
+     'country_code': 'US', 'geonameid': '4167147'},
+    {'category_id': '1', 'value_budget': '7', 'value_midrange': '15', 'value_luxury': '30',
+     'country_code': 'FR'},
+]
+
+def installed(name):
+    return importlib.util.find_spec(name) is not None
+
+class FakeColumns(object):
+    """Stands in for a DataFrame or an Arrow table: a dict of numpy columns."""
+    def __init__(self, data, copy=None):
+        self.data = dict(data)
+
+    def __getitem__(self, column):
+        return types.SimpleNamespace(to_numpy=lambda: self.data[column])
+
+    def column(self, column):
+        return self[column]
+
+def fake_modules():
+    pandas = types.ModuleType('pandas')
+    pandas.DataFrame = FakeColumns
+    pyarrow = types.ModuleType('pyarrow')
+    pyarrow.table = FakeColumns
+    return mock.patch.dict('sys.modules', {'pandas': pandas, 'pyarrow': pyarrow})
+
+class TestCostTable(unittest.TestCase):
+    def setUp(self):
+        self.table = CostTable.from_json(COSTS_JSON)
+
+    def test_columns_are_typed(self):
+        self.assertEqual(self.table.category_id.dtype, np.int16)
+        self.assertEqual(self.table.budget.dtype, np.float64)
+        self.assertTrue(np.isnan(self.table.luxury[1]))
+        self.assertEqual(self.table.geonameid[2], NO_GEONAMEID)
+
+    def test_from_costs_matches_from_json(self):
+        table = CostTable.from_costs([models.Cost(item) for item in COSTS_JSON])
+        for column in CostTable.columns:
+            np.testing.assert_array_equal(getattr(table, column), getattr(self.table, column))
+
+    def test_filter(self):
+        self.assertEqual(len(self.table.filter(category_id=1)), 2)
+        self.assertEqual(len(self.table.filter(category_id=1, country_code='US')), 1)
+        self.assertEqual(len(self.table.filter(country_code=['US', 'FR'])), 3)
+
+    def test_totals_and_by_category(self):
+        self.assertEqual(self.table.totals(), {'budget': 22, 'midrange': 43, 'luxury': 70})
+        self.assertEqual(self.table.by_category('budget'), {1: 17, 4: 5})
+
+    def test_concat(self):
+        self.assertEqual(len(CostTable.concat([self.table, self.table])), 6)
+
+    def assertTablesEqual(self, table, other):
+        for column in CostTable.columns:
+            np.testing.assert_array_equal(getattr(table, column), getattr(other, column))
+
+    def test_pandas_and_arrow_columns(self):
+        with fake_modules():
+            frame, arrow = self.table.to_pandas(), self.table.to_arrow()
+        self.assertEqual(sorted(frame.data), sorted(CostTable.columns))
+        self.assertIs(frame.data['budget'], self.table.budget)
+        self.assertIs(arrow.data['geonameid'], self.table.geonameid)
+        self.assertTablesEqual(CostTable.from_pandas(frame), self.table)
+        self.assertTablesEqual(CostTable.from_arrow(arrow), self.table)
+
+    @unittest.skipUnless(installed('pandas'), 'pandas is not installed')
+    def test_pandas_round_trip(self):
+        self.assertTablesEqual(CostTable.from_pandas(self.table.to_pandas()), self.table)
+
+    @unittest.skipUnless(installed('pyarrow'), 'pyarrow is not installed')
+    def test_arrow_round_trip(self):
+        self.assertTablesEqual(CostTable.from_arrow(self.table.to_arrow()), self.table)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import json
+import sys
+import threading
+import types
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import context
+import requests
+from budgetyourtrip_api.api import Api
+from budgetyourtrip_api.cache import NO_CACHE, TieredCache
+from budgetyourtrip_api.transport import configure_session, HTTP2Session
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.clients.add(self.client_address)
+        body = json.dumps({'data': {'path': self.path}}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class FakeSession(object):
+    def __init__(self):
+        self.headers = {}
+        self.timeouts = []
+
+    def get(self, url, params=None, headers=None, stream=False, timeout=None):
+        self.timeouts.append(timeout)
+        raise AssertionError('unused')
+
+class FakeHttpxResponse(object):
+    def __init__(self, request):
+        self.request = request
+        self.status_code = 404 if request['url'].endswith('missing') else 200
+        self.headers = {'Content-Type': 'application/json'}
+        self.url = request['url']
+        self.closed = False
+
+    def read(self):
+        return json.dumps({'data': {'url': self.url, 'params': self.request['params']}}).encode()
+
+    def json(self):
+        return json.loads(self.read().decode())
+
+    def iter_bytes(self, chunk_size):
+        body = self.read()
+        return (body[i:i + chunk_size] for i in range(0, len(body), chunk_size))
+
+    def close(self):
+        self.closed = True
+
+def fake_httpx():
+    """Build a stub of the parts of ``httpx`` used by HTTP2Session."""
+    httpx = types.ModuleType('httpx')
+    httpx.TimeoutException = type('TimeoutException', (Exception,), {})
+    httpx.TransportError = type('TransportError', (Exception,), {})
+    httpx.Limits = lambda **kwargs: kwargs
+
+    class Client(object):
+        def __init__(self, http2=False, limits=None):
+            self.http2, self.limits = http2, limits
+            self.headers = {}
+            self.sent = []
+            self.closed = False
+
+        def build_request(self, method, url, params=None, headers=None, timeout=None):
+            return {'method': method, 'url': url, 'params': params, 'timeout': timeout}
+
+        def send(self, request, stream=False):
+            self.sent.append((request, stream))
+            if request['url'].endswith('timeout'):
+                raise httpx.TimeoutException('slow')
+            if request['url'].endswith('down'):
+                raise httpx.TransportError('down')
+            return FakeHttpxResponse(request)
+
+        def close(self):
+            self.closed = True
+
+    httpx.Client = Client
+    return httpx
+
+class TestTransport(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.clients = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.end_point = 'http://127.0.0.1:{0}/api/v3/'.format(self.server.server_port)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_pool_options(self):
+        api = Api(cache=TieredCache(), max_connections=4, keep_alive=False,
+                  end_point=self.end_point)
+        adapter = api.session.get_adapter(self.end_point)
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertFalse(adapter._pool_block)
+        self.assertEqual(api.session.headers['Connection'], 'close')
+
+    def test_injected_session(self):
+        session = FakeSession()
+        api = Api(key='k', session=session, timeout=2.5, end_point=self.end_point)
+        self.assertIs(api.session, session)
+        self.assertEqual(session.headers['X-API-KEY'], 'k')
+        with self.assertRaises(AssertionError):
+            api.get('categories/')
+        self.assertEqual(session.timeouts, [2.5])
+
+    def test_shared_by_threads(self):
+        # Uncached, so that every call is a request; the blocking pool bounds the connections.
+        session = configure_session(requests.Session(), max_connections=2, block=True)
+        api = Api(cache=NO_CACHE, coalesce=False, session=session, timeout=5,
+                  end_point=self.end_point)
+        paths = ['costs/location/{0}'.format(i) for i in range(200)]
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(api.get, paths))
+        self.assertEqual([result['path'] for result in results],
+                         ['/api/v3/' + path for path in paths])
+        self.assertLessEqual(len(self.server.clients), 2)
+
+class TestHTTP2(unittest.TestCase):
+    def setUp(self):
+        self.httpx = sys.modules.get('httpx')
+        sys.modules['httpx'] = fake_httpx()
+
+    def tearDown(self):
+        if self.httpx is None:
+            del sys.modules['httpx']
+        else:
+            sys.modules['httpx'] = self.httpx
+
+    def test_session(self):
+        session = HTTP2Session(max_connections=3, keep_alive=False)
+        self.assertTrue(session._client.http2)
+        self.assertEqual(session._client.limits,
+                         {'max_connections': 3, 'max_keepalive_connections': 0})
+        response = session.get('https://host/a', params={'q': 1}, stream=True, timeout=2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.url, 'https://host/a')
+        self.assertEqual(response.json()['data']['params'], {'q': 1})
+        self.assertEqual(b''.join(response.iter_content(5)), response.content)
+        with response:
+            pass
+        self.assertTrue(response._response.closed)
+        self.assertEqual(session._client.sent[0][1], True)
+        with self.assertRaises(requests.HTTPError):
+            session.get('https://host/missing').raise_for_status()
+        with self.assertRaises(requests.Timeout):
+            session.get('https://host/timeout')
+        with self.assertRaises(requests.ConnectionError):
+            session.get('https://host/down')
+        session.close()
+        self.assertTrue(session._client.closed)
+
+    def test_api_over_http2(self):
+        api = Api(key='k', http2=True, end_point='https://host/api/v3/', timeout=3)
+        self.assertIsInstance(api.session, HTTP2Session)
+        self.assertEqual(api.session.headers['X-API-KEY'], 'k')
+        self.assertEqual(api.get('categories/1')['url'], 'https://host/api/v3/categories/1')
+        self.assertIsNone(api.get('missing'))
+        self.assertEqual(api.session._client.sent[0][0]['timeout'], 3)
+
+if __name__ == '__main__':
+    unittest.main()